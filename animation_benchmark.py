@@ -0,0 +1,83 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_TWEENS = [1_000, 5_000, 20_000]
+FRAMES = 30
+DURATION = 2
+
+button_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 1, Color.CYAN)
+
+
+mouse_keys = [ui.Key() for _ in range(5)]
+
+
+# What a tween per object would do: its own easing and its own setter call every frame
+class ObjectTween:
+    def __init__(self, element: ui.Button, end: Vector2, duration: float):
+        self.element = element
+        self.start = Vector2(element.position)
+        self.change = end - self.start
+        self.elapsed = 0
+        self.duration = duration
+
+    def update(self, delta_time_seconds: float):
+        self.elapsed += delta_time_seconds
+        t = min(self.elapsed / self.duration, 1)
+        eased = 2 * t * t if t < 0.5 else 1 - (2 - 2 * t) ** 2 / 2
+        self.element.position = self.start + self.change * eased
+
+
+def build_context(number_of_tweens: int, use_geometry_store: bool) -> tuple[ui.UIContext, list[ui.Button]]:
+    ui_context = ui.UIContext(1, use_geometry_store=use_geometry_store)
+    buttons = [ui.Button(Vector2(10 + (i * 7) % SCREEN_WIDTH, 10 + (i * 13) % SCREEN_HEIGHT), Vector2(12, 12),
+                         button_style, button_style, "", ui.default_ui_font, False, ui.null_function)
+               for i in range(number_of_tweens)]
+    for button in buttons:
+        ui_context.front_layer().add_element(button)
+    # Builds the geometry store
+    ui_context.update_state((0, 0), mouse_keys, 0)
+    return ui_context, buttons
+
+
+def time_object_tweens(number_of_tweens: int) -> float:
+    ui_context, buttons = build_context(number_of_tweens, False)
+    tweens = [ObjectTween(button, Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2), DURATION) for button in buttons]
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        for tween in tweens:
+            tween.update(1 / 60)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def time_animator(number_of_tweens: int, use_geometry_store: bool) -> float:
+    ui_context, buttons = build_context(number_of_tweens, use_geometry_store)
+    for button in buttons:
+        ui_context.animator.move(button, (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2), DURATION)
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        ui_context.animator.update(1 / 60)
+    return (time.perf_counter() - start) / FRAMES
+
+
+if __name__ == "__main__":
+    print("Time per frame to advance and apply the tweens of the positions of Buttons")
+    print(f"{'tweens':>10} {'per object':>11} {'Animator':>10} {'Animator + geometry store':>26}")
+    for number_of_tweens in NUMBERS_OF_TWEENS:
+        object_tweens = time_object_tweens(number_of_tweens)
+        animator = time_animator(number_of_tweens, False)
+        animator_geometry_store = time_animator(number_of_tweens, True)
+        print(f"{number_of_tweens:>10} {object_tweens * 1000:>8.3f} ms {animator * 1000:>7.3f} ms "
+              f"{animator_geometry_store * 1000:>23.3f} ms")
+
+    pygame.quit()
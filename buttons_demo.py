@@ -9,13 +9,10 @@ SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 SCREEN_SIZE = Vector2(SCREEN_WIDTH, SCREEN_HEIGHT)
 
-clock = pygame.time.Clock()
 FRAMES_PER_SECOND = 70
 
 sc = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
-mouse = ui.Mouse()
-
 
 
 
@@ -42,32 +39,29 @@ triangle_button = ui.TriangleButton(SCREEN_SIZE / 2, SCREEN_SIZE / 2,
                                     ui.null_function)
 
 
-ui_context = ui.UIContext(2)
+ui_context = ui.UIContext(2, retained_mode=True)
 
 ui_context.back_layer().add_element(triangle_button)
 ui_context.front_layer().add_element(text_button)
 
-delta_time = 0
+# F3 shows the frame statistics
+frame_statistics_style = ui.UIBoxElementStyle(Color.BLACK, Color.GREEN, 1, Color.GREEN)
+frame_statistics_overlay = ui.FrameStatisticsOverlay(Vector2(10, 10), frame_statistics_style, ui_context, visible=False)
+ui_context.front_layer().add_element(frame_statistics_overlay)
+
+# Nothing is drawn while the menu is static
+frame_driver = ui.FrameDriver(ui_context, FRAMES_PER_SECOND)
 
 
 if __name__ == "__main__":
     while True:
-        sc.fill(Color.BLACK)
-
-        events = pygame.event.get()
+        events = frame_driver.next_frame()
         for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
+            frame_statistics_overlay.handle_event(event)
 
-        mouse.update_state()
-        mouse_position = mouse.get_position()
-        mouse_pressed = mouse.get_pressed()
-
-        ui_context.update_state(mouse_position, mouse_pressed, delta_time)
-        ui_context.draw_elements(sc)
-
-        pygame.display.update()
-        delta_time = clock.get_time() / 1000
-        clock.tick(FRAMES_PER_SECOND)
+        dirty_rectangles = frame_driver.update_and_draw(sc)
 
+        pygame.display.update(dirty_rectangles)
@@ -0,0 +1,82 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_ELEMENTS = [1_000, 5_000, 20_000]
+PANEL_SIZE = 500
+PANEL_COLUMNS = 25
+FRAMES = 20
+
+button_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 1, Color.CYAN)
+
+
+mouse_keys = [ui.Key() for _ in range(5)]
+
+
+# Panels of buttons side by side, most of them beyond the right edge of the screen as in a scrolled view
+def build_buttons(number_of_elements: int) -> list[list[ui.Button]]:
+    panels = []
+    for panel_start in range(0, number_of_elements, PANEL_SIZE):
+        panel_x = len(panels) * (PANEL_COLUMNS * 22 + 20)
+        panels.append([ui.Button(Vector2(panel_x + 11 + (i % PANEL_COLUMNS) * 22, 11 + (i // PANEL_COLUMNS) * 22),
+                                 Vector2(20, 20), button_style, button_style, "", ui.default_ui_font, False,
+                                 ui.null_function)
+                       for i in range(min(PANEL_SIZE, number_of_elements - panel_start))])
+    return panels
+
+
+def build_context(number_of_elements: int, use_containers: bool) -> tuple[ui.UIContext, list[ui.UIElement]]:
+    ui_context = ui.UIContext(1)
+    top_level_elements = []
+    for buttons in build_buttons(number_of_elements):
+        if use_containers:
+            top_level_elements.append(ui.Container(buttons))
+        else:
+            top_level_elements.extend(buttons)
+    for element in top_level_elements:
+        ui_context.front_layer().add_element(element)
+    return ui_context, top_level_elements
+
+
+# The mouse stays over the first panel
+def time_frames(ui_context: ui.UIContext, surface: pygame.Surface) -> tuple[float, float]:
+    update_seconds = 0
+    draw_seconds = 0
+    for frame in range(FRAMES):
+        start = time.perf_counter()
+        ui_context.update_state((100 + frame, 100), mouse_keys, 0)
+        update_end = time.perf_counter()
+        ui_context.draw_elements(surface)
+        update_seconds += update_end - start
+        draw_seconds += time.perf_counter() - update_end
+    return update_seconds / FRAMES, draw_seconds / FRAMES
+
+
+if __name__ == "__main__":
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    print(f"{'elements':>10} {'update flat':>12} {'update containers':>18} "
+          f"{'draw flat':>10} {'draw containers':>16} {'draw hidden':>12}")
+    for number_of_elements in NUMBERS_OF_ELEMENTS:
+        update_flat, draw_flat = time_frames(build_context(number_of_elements, False)[0], surface)
+        ui_context, containers = build_context(number_of_elements, True)
+        update_containers, draw_containers = time_frames(ui_context, surface)
+        # Hiding a panel is a flag, its buttons are neither updated nor drawn
+        for container in containers:
+            container.visible = False
+        draw_hidden = time_frames(ui_context, surface)[1]
+
+        print(f"{number_of_elements:>10} {update_flat * 1000:>9.3f} ms {update_containers * 1000:>15.3f} ms "
+              f"{draw_flat * 1000:>7.3f} ms {draw_containers * 1000:>13.3f} ms {draw_hidden * 1000:>9.3f} ms")
+
+    pygame.quit()
@@ -0,0 +1,75 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_BUTTONS = [200, 1_000, 5_000]
+FRAMES = 100
+
+button_idle_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 2, Color.CYAN)
+button_hovered_style = ui.UIBoxElementStyle(Color.CYAN, Color.BLACK, 2, Color.BLACK)
+
+
+mouse_keys = [ui.Key() for _ in range(5)]
+
+
+# A static back layer of Buttons and a front layer of labels, the last one counts the frames
+def build_context(number_of_buttons: int, draw_list_mode: bool, cached_back_layer: bool) -> tuple[ui.UIContext, ui.Text]:
+    ui_context = ui.UIContext(2, draw_list_mode=draw_list_mode)
+    ui_context.back_layer().cached = cached_back_layer
+    for i in range(number_of_buttons):
+        ui_context.back_layer().add_element(
+            ui.Button(Vector2(30 + (i * 37) % (SCREEN_WIDTH - 60), 30 + (i * 53) % (SCREEN_HEIGHT - 60)), Vector2(50, 30),
+                      button_idle_style, button_hovered_style, "OK", ui.default_ui_font_slider_tick_mark, False,
+                      ui.null_function))
+    for i in range(20):
+        ui_context.front_layer().add_element(ui.Text(Vector2(80, 20 + i * 34), Color.WHITE, ui.default_ui_font, f"LABEL {i}"))
+    frame_counter = ui.Text(Vector2(SCREEN_WIDTH - 80, 20), Color.WHITE, ui.default_ui_font, "")
+    ui_context.front_layer().add_element(frame_counter)
+    return ui_context, frame_counter
+
+
+# A still screen, or a frame counter changing every frame in the front layer
+def time_frames(ui_context: ui.UIContext, frame_counter: ui.Text, surface: pygame.Surface,
+                counting: bool) -> tuple[float, float]:
+    draw_calls = 0
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        if counting:
+            frame_counter.text = str(frame)
+        ui_context.update_state((0, 0), mouse_keys, 0)
+        if not ui_context.draw_list_mode:
+            surface.fill(Color.BLACK)
+        ui_context.draw_elements(surface)
+        draw_calls += ui_context.draw_statistics()["draw_calls"]
+    return (time.perf_counter() - start) / FRAMES, draw_calls / FRAMES
+
+
+if __name__ == "__main__":
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    print(f"Time per frame, and draw calls per frame of the draw list mode, over {FRAMES} frames")
+    print(f"{'buttons':>8} {'screen':>8} {'immediate':>10} {'draw list':>10} {'calls':>7} "
+          f"{'draw list + cached layer':>25} {'calls':>7}")
+    for number_of_buttons in NUMBERS_OF_BUTTONS:
+        for counting in (False, True):
+            results = []
+            for draw_list_mode, cached_back_layer in ((False, False), (True, False), (True, True)):
+                ui_context, frame_counter = build_context(number_of_buttons, draw_list_mode, cached_back_layer)
+                # Fills the sprite cache
+                time_frames(ui_context, frame_counter, surface, counting)
+                results.append(time_frames(ui_context, frame_counter, surface, counting))
+            (immediate, _), (draw_list, draw_list_calls), (cached, cached_calls) = results
+            print(f"{number_of_buttons:>8} {'counter' if counting else 'still':>8} {immediate * 1000:>7.2f} ms "
+                  f"{draw_list * 1000:>7.2f} ms {draw_list_calls:>7.0f} {cached * 1000:>22.2f} ms {cached_calls:>7.0f}")
+
+    pygame.quit()
@@ -0,0 +1,84 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBER_OF_BUTTONS = 1_000
+FRAMES = 50
+
+
+# Vectors and rectangles made by ui are counted when they are freed,
+# results of arithmetic on a subclass instance are instances of the subclass too
+class CountedVector2(pygame.Vector2):
+    freed = 0
+
+    def __del__(self):
+        CountedVector2.freed += 1
+
+
+class CountedRect(pygame.Rect):
+    freed = 0
+
+    def __del__(self):
+        CountedRect.freed += 1
+
+
+ui.Vector2 = CountedVector2
+ui.Rectangle = CountedRect
+pygame.Rect = CountedRect
+
+
+button_idle_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 2, Color.CYAN)
+button_hovered_style = ui.UIBoxElementStyle(Color.CYAN, Color.BLACK, 2, Color.BLACK)
+
+
+def build_context() -> ui.UIContext:
+    ui_context = ui.UIContext(1)
+    columns = 40
+    for i in range(NUMBER_OF_BUTTONS):
+        position = CountedVector2(16 + (i % columns) * 32, 16 + (i // columns) * 28)
+        button = ui.Button(position, CountedVector2(28, 24),
+                           button_idle_style, button_hovered_style, "", ui.default_ui_font, False,
+                           ui.null_function)
+        ui_context.front_layer().add_element(button)
+    return ui_context
+
+
+def run_frames(ui_context: ui.UIContext, surface: pygame.Surface) -> tuple[float, float]:
+    mouse_keys = [ui.Key() for _ in range(5)]
+    mouse_positions = [(SCREEN_WIDTH * i / FRAMES, SCREEN_HEIGHT * i / FRAMES) for i in range(FRAMES)]
+
+    CountedVector2.freed = 0
+    CountedRect.freed = 0
+    start = time.perf_counter()
+    for mouse_position in mouse_positions:
+        ui_context.update_state(mouse_position, mouse_keys, 0)
+        ui_context.draw_elements(surface)
+    seconds = time.perf_counter() - start
+
+    allocations = CountedVector2.freed + CountedRect.freed
+    return allocations / FRAMES, seconds / FRAMES
+
+
+if __name__ == "__main__":
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    print(f"{NUMBER_OF_BUTTONS} Buttons, update_state + draw_elements")
+    print(f"{'geometry':>10} {'Vector2/Rect allocations per frame':>35} {'time per frame':>15}")
+    for cache_geometry in (False, True):
+        ui.UIBoxElement.CACHE_GEOMETRY = cache_geometry
+        ui_context = build_context()
+        # Fills the caches
+        run_frames(ui_context, surface)
+        allocations, seconds = run_frames(ui_context, surface)
+        print(f"{'cached' if cache_geometry else 'computed':>10} {allocations:>35.0f} {seconds * 1000:>12.3f} ms")
+
+    pygame.quit()
@@ -0,0 +1,79 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import random
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_ELEMENTS = [1_000, 10_000, 100_000]
+NUMBER_OF_LAYERS = 4
+FRAMES = 20
+
+button_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 2, Color.CYAN)
+
+
+mouse_keys = [ui.Key() for _ in range(5)]
+
+
+def build_context(number_of_elements: int, use_geometry_store: bool) -> tuple[ui.UIContext, list[ui.Button]]:
+    random.seed(0)
+    ui_context = ui.UIContext(NUMBER_OF_LAYERS, use_geometry_store=use_geometry_store)
+    buttons = []
+    for i in range(number_of_elements):
+        button = ui.Button(Vector2(random.uniform(0, SCREEN_WIDTH), random.uniform(0, SCREEN_HEIGHT)), Vector2(40, 20),
+                           button_style, button_style, "", ui.default_ui_font, False,
+                           ui.null_function)
+        ui_context.layer(i % NUMBER_OF_LAYERS).add_element(button)
+        buttons.append(button)
+    return ui_context, buttons
+
+
+def time_update_state(ui_context: ui.UIContext) -> float:
+    random.seed(1)
+    mouse_positions = [(random.uniform(0, SCREEN_WIDTH), random.uniform(0, SCREEN_HEIGHT)) for _ in range(FRAMES)]
+    # The first frame builds the store
+    ui_context.update_state(mouse_positions[0], mouse_keys, 0)
+    start = time.perf_counter()
+    for mouse_position in mouse_positions:
+        ui_context.update_state(mouse_position, mouse_keys, 0)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def time_move_per_element(buttons: list[ui.Button]) -> float:
+    offset = Vector2(0, 1)
+    start = time.perf_counter()
+    for button in buttons:
+        button.position = button.position + offset
+    return time.perf_counter() - start
+
+
+def time_move_geometry_store(ui_context: ui.UIContext, buttons: list[ui.Button]) -> float:
+    geometry_store = ui_context.geometry_store
+    start = time.perf_counter()
+    geometry_store.translate(buttons, (0, 1))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'elements':>10} {'update per-object':>18} {'update store':>13} {'move per-object':>16} {'move store':>11}")
+    for number_of_elements in NUMBERS_OF_ELEMENTS:
+        ui_context_objects, buttons_objects = build_context(number_of_elements, False)
+        ui_context_store, buttons_store = build_context(number_of_elements, True)
+
+        update_objects = time_update_state(ui_context_objects)
+        update_store = time_update_state(ui_context_store)
+        move_objects = time_move_per_element(buttons_objects)
+        move_store = time_move_geometry_store(ui_context_store, buttons_store)
+
+        print(f"{number_of_elements:>10} {update_objects * 1000:>15.3f} ms {update_store * 1000:>10.3f} ms "
+              f"{move_objects * 1000:>13.3f} ms {move_store * 1000:>8.3f} ms")
+
+    pygame.quit()
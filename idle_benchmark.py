@@ -0,0 +1,89 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+FRAMES_PER_SECOND = 70
+SECONDS = 3
+NUMBER_OF_BUTTONS = 200
+
+button_idle_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 2, Color.CYAN)
+button_hovered_style = ui.UIBoxElementStyle(Color.CYAN, Color.BLACK, 2, Color.BLACK)
+
+
+# A static menu, the mouse moves once in the middle of the run
+def build_context() -> ui.UIContext:
+    ui_context = ui.UIContext(1)
+    for i in range(NUMBER_OF_BUTTONS):
+        ui_context.front_layer().add_element(
+            ui.Button(Vector2(40 + (i % 20) * 60, 40 + (i // 20) * 60), Vector2(50, 40),
+                      button_idle_style, button_hovered_style, "OK", ui.default_ui_font_slider_tick_mark, False,
+                      ui.null_function))
+    return ui_context
+
+
+def post_mouse_motion():
+    pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2), rel=(0, 0),
+                                         buttons=(0, 0, 0)))
+
+
+def run_fixed_rate(surface: pygame.Surface) -> dict:
+    ui_context = build_context()
+    input_dispatcher = ui.InputDispatcher(ui_context)
+    clock = pygame.time.Clock()
+    frames = 0
+    delta_time = 0
+    start = time.perf_counter()
+    start_process_time = time.process_time()
+    moved = False
+    while time.perf_counter() - start < SECONDS:
+        if not moved and time.perf_counter() - start > SECONDS / 2:
+            post_mouse_motion()
+            moved = True
+        input_dispatcher.dispatch(pygame.event.get(), delta_time)
+        surface.fill(Color.BLACK)
+        ui_context.draw_elements(surface)
+        frames += 1
+        delta_time = clock.tick(FRAMES_PER_SECOND) / 1000
+    return {"frames": frames, "cpu_seconds": time.process_time() - start_process_time}
+
+
+def run_frame_driver(surface: pygame.Surface) -> dict:
+    ui_context = build_context()
+    # Wakes up to post the mouse motion on time
+    frame_driver = ui.FrameDriver(ui_context, FRAMES_PER_SECOND, idle_timeout_seconds=SECONDS / 10)
+    start = time.perf_counter()
+    moved = False
+    while time.perf_counter() - start < SECONDS:
+        if not moved and time.perf_counter() - start > SECONDS / 2:
+            post_mouse_motion()
+            moved = True
+        frame_driver.next_frame()
+        surface.fill(Color.BLACK)
+        frame_driver.update_and_draw(surface)
+    return frame_driver.statistics()
+
+
+if __name__ == "__main__":
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.event.get()
+
+    fixed_rate = run_fixed_rate(surface)
+    frame_driver = run_frame_driver(surface)
+
+    print(f"{SECONDS} s of a static menu of {NUMBER_OF_BUTTONS} Buttons at {FRAMES_PER_SECOND} frames per second")
+    print(f"{'':>12} {'frames':>7} {'cpu':>10}")
+    print(f"{'fixed rate':>12} {fixed_rate['frames']:>7} {fixed_rate['cpu_seconds'] * 1000:>7.0f} ms")
+    print(f"{'FrameDriver':>12} {frame_driver['frames']:>7} {frame_driver['cpu_seconds'] * 1000:>7.0f} ms"
+          f"  {frame_driver['frames_saved']} frames saved, idle {frame_driver['idle_seconds']:.2f} s")
+
+    pygame.quit()
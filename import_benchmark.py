@@ -0,0 +1,36 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+
+RUNS = 15
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Each one runs in a new interpreter and prints the seconds it took
+MEASUREMENTS = {
+    "import pygame": "import time; start = time.perf_counter(); import pygame; print(time.perf_counter() - start)",
+    "import ui": "import time; start = time.perf_counter(); import ui; print(time.perf_counter() - start)",
+    "first font": "import ui, time; start = time.perf_counter(); ui.default_font(); print(time.perf_counter() - start)",
+    "first text": "import ui, time; start = time.perf_counter(); ui.render_text(ui.default_font(), 'PLAY', False, ui.Color.WHITE); "
+                  "print(time.perf_counter() - start)",
+}
+
+
+# From another working directory, ui finds its fonts relative to the package
+def time_in_new_interpreter(code: str, working_directory: str) -> float:
+    environment = dict(os.environ, PYTHONPATH=PACKAGE_DIRECTORY, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    result = subprocess.run([sys.executable, "-c", code], cwd=working_directory, env=environment,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1])
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as working_directory:
+        print(f"Median of {RUNS} new interpreters, started in {working_directory}")
+        print(f"{'':>14} {'time':>10}")
+        for name, code in MEASUREMENTS.items():
+            times = [time_in_new_interpreter(code, working_directory) for _ in range(RUNS)]
+            print(f"{name:>14} {statistics.median(times) * 1000:>7.2f} ms")
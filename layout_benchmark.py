@@ -0,0 +1,72 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_ELEMENTS = [1_000, 5_000, 20_000]
+ROW_LENGTH = 50
+
+button_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 1, Color.CYAN)
+
+
+# A window centered on the screen: a title above rows of buttons, each row starting with a label
+def build_layout(number_of_elements: int) -> tuple[ui.AnchorLayout, list[ui.Text]]:
+    root = ui.AnchorLayout((SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2), (SCREEN_WIDTH, SCREEN_HEIGHT))
+    window = ui.VerticalStack(spacing=2, padding=4, alignment=ui.Layout.START)
+    window.add(ui.Text(Vector2(0, 0), Color.WHITE, ui.default_ui_font_slider_tick_mark, "WINDOW"))
+    labels = []
+    for row_start in range(0, number_of_elements, ROW_LENGTH):
+        row = ui.HorizontalStack(spacing=2)
+        label = ui.Text(Vector2(0, 0), Color.WHITE, ui.default_ui_font_slider_tick_mark, str(row_start))
+        row.add(label)
+        labels.append(label)
+        for _ in range(min(ROW_LENGTH, number_of_elements - row_start)):
+            row.add(ui.Button(Vector2(0, 0), Vector2(20, 10), button_style, button_style, "",
+                              ui.default_ui_font_slider_tick_mark, False, ui.null_function))
+        window.add(row)
+    root.add(window, ui.Anchor.CENTER)
+    return root, labels
+
+
+def time_call(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def resize(root: ui.AnchorLayout, width: int, height: int):
+    root.size = (width, height)
+    root.position = (width / 2, height / 2)
+    ui.Layout.update_layouts()
+
+
+def change_label(label: ui.Text):
+    label.text = label.text + "0"
+    ui.Layout.update_layouts()
+
+
+if __name__ == "__main__":
+    print(f"{'elements':>10} {'first layout':>13} {'resize':>10} {'label change':>13} {'unchanged':>10}")
+    for number_of_elements in NUMBERS_OF_ELEMENTS:
+        root, labels = build_layout(number_of_elements)
+        first_layout = time_call(ui.Layout.update_layouts)
+        # Every element moves with the center of the screen
+        resize_time = time_call(lambda: resize(root, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100))
+        # The label of the first row is the shortest, it gets longer without changing the width of the window,
+        # so only that row moves
+        label_change = time_call(lambda: change_label(labels[0]))
+        unchanged = time_call(ui.Layout.update_layouts)
+
+        print(f"{number_of_elements:>10} {first_layout * 1000:>10.3f} ms {resize_time * 1000:>7.3f} ms "
+              f"{label_change * 1000:>10.3f} ms {unchanged * 1000:>7.3f} ms")
+
+    pygame.quit()
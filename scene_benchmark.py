@@ -0,0 +1,86 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import json
+import tempfile
+import time
+import pygame
+import ui
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBER_OF_BUTTONS = 300
+NUMBER_OF_LABELS = 200
+NUMBER_OF_SLIDERS = 20
+RUNS = 5
+
+
+mouse_keys = [ui.Key() for _ in range(5)]
+
+
+# A settings screen: a grid of buttons with their own texts, labels and sliders with tick marks
+def scene_definition() -> dict:
+    buttons = [{"type": "Button", "position": [60 + (i % 15) * 80, 40 + (i // 15) * 30], "size": [76, 26],
+                "style_idle": "idle", "style_hovered": "hovered", "text": f"ITEM {i}", "font": "small",
+                "function": "select", "arguments": [i]}
+               for i in range(NUMBER_OF_BUTTONS)]
+    labels = [{"type": "Text", "position": [100 + (i % 10) * 120, 660 + (i // 10) % 2 * 20], "text": f"LABEL {i}",
+               "font": "small", "color": "white"}
+              for i in range(NUMBER_OF_LABELS)]
+    sliders = [{"type": "SliderFree", "position": [100 + (i % 5) * 260, 500 + (i // 5) * 40], "length": 200,
+                "slider_style": "track", "knob_style": "knob", "tick_mark_style": "track", "reference": f"slider {i}",
+                "min_value": 0, "max_value": 1, "default_value": 0.5, "values_to_display": [0, 0.5, 1]}
+               for i in range(NUMBER_OF_SLIDERS)]
+    return {
+        "fonts": {"small": {"path": ui.font_registry.resolve_path(ui.DEFAULT_FONT_PATH), "size": 16}},
+        "styles": {
+            "idle": {"rectangle_color": "black", "content_color": "cyan", "outline": 2, "outline_color": "cyan"},
+            "hovered": {"rectangle_color": "cyan", "content_color": "black", "outline": 2, "outline_color": "black"},
+            "track": {"rectangle_color": "green"},
+            "knob": {"rectangle_color": "green", "outline": 2, "outline_color": "white"},
+        },
+        "layers": [{"elements": sliders + labels}, {"elements": buttons}],
+    }
+
+
+# From the scene file to the first frame drawn, the surfaces not loaded from the raster cache are rendered there
+def time_startup(scene_path: str, surface: pygame.Surface, raster_cache_path) -> tuple[float, int]:
+    ui.sprite_cache.clear()
+    ui.text_metrics.clear()
+    ui.RenderStatistics.font_render_calls = 0
+    start = time.perf_counter()
+    scene = ui.load_scene(scene_path, {"select": ui.null_function}, raster_cache=raster_cache_path)
+    scene.ui_context.update_state((0, 0), mouse_keys, 0)
+    surface.fill(ui.Color.BLACK)
+    scene.ui_context.draw_elements(surface)
+    return time.perf_counter() - start, ui.RenderStatistics.font_render_calls
+
+
+if __name__ == "__main__":
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    with tempfile.TemporaryDirectory() as directory:
+        scene_path = os.path.join(directory, "scene.json")
+        with open(scene_path, "w") as file:
+            json.dump(scene_definition(), file)
+        raster_cache_path = os.path.join(directory, "raster_cache.bin")
+
+        results = {"no raster cache": [], "cold": [], "warm": []}
+        for _ in range(RUNS):
+            results["no raster cache"].append(time_startup(scene_path, surface, None))
+            ui.RasterCache(raster_cache_path).clear()
+            results["cold"].append(time_startup(scene_path, surface, raster_cache_path))
+            results["warm"].append(time_startup(scene_path, surface, raster_cache_path))
+        stored_surfaces = len(ui.RasterCache(raster_cache_path))
+
+        print(f"Startup of a scene of {NUMBER_OF_BUTTONS} Buttons, {NUMBER_OF_LABELS} Texts and {NUMBER_OF_SLIDERS} SliderFrees, "
+              f"up to the first frame, best of {RUNS}. {stored_surfaces} surfaces in the raster cache")
+        print(f"{'':>16} {'startup':>10} {'texts rendered':>15}")
+        for name, runs in results.items():
+            startup, font_render_calls = min(runs)
+            print(f"{name:>16} {startup * 1000:>7.1f} ms {font_render_calls:>15}")
+
+    pygame.quit()
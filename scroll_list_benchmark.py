@@ -0,0 +1,74 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_ROWS = [1_000, 100_000, 1_000_000]
+ROW_HEIGHT = 24
+FRAMES = 200
+
+list_style = ui.UIBoxElementStyle(Color.BLACK, None, 2, Color.WHITE)
+row_idle_style = ui.UIBoxElementStyle(Color.BLACK, Color.WHITE, 1, Color.CYAN)
+row_hovered_style = ui.UIBoxElementStyle(Color.CYAN, Color.BLACK, 1, Color.BLACK)
+slider_style = ui.UIBoxElementStyle(Color.GREEN, None, 0, None)
+knob_style = ui.UIBoxElementStyle(Color.GREEN, None, 2, Color.WHITE)
+
+
+mouse_keys = [ui.Key() for _ in range(5)]
+
+
+class LogSource:
+    def __init__(self):
+        self.requests = 0
+
+    def row_text(self, index: int) -> str:
+        self.requests += 1
+        return f"EVENT {index:07d}"
+
+
+def build_context(number_of_rows: int, log_source: LogSource) -> ui.UIContext:
+    ui_context = ui.UIContext(1)
+    ui_context.front_layer().add_element(
+        ui.ScrollList(Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2), Vector2(500, 600), list_style,
+                      ROW_HEIGHT, number_of_rows, log_source.row_text,
+                      row_idle_style, row_hovered_style, slider_style, knob_style))
+    return ui_context
+
+
+# One wheel step down per frame, then back up, so the rows seen on the way down are drawn again
+def time_scrolling(ui_context: ui.UIContext, surface: pygame.Surface) -> float:
+    mouse_position = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        ui_context.mouse_wheel(mouse_position, (0, -1 if frame < FRAMES // 2 else 1))
+        ui_context.update_state(mouse_position, mouse_keys, 0)
+        surface.fill(Color.BLACK)
+        ui_context.draw_elements(surface)
+    return (time.perf_counter() - start) / FRAMES
+
+
+if __name__ == "__main__":
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    print(f"{'rows':>10} {'build':>10} {'scroll frame':>13} {'rows requested':>15} {'sprite cache hits':>18}")
+    for number_of_rows in NUMBERS_OF_ROWS:
+        ui.sprite_cache.clear()
+        log_source = LogSource()
+        start = time.perf_counter()
+        ui_context = build_context(number_of_rows, log_source)
+        build_time = time.perf_counter() - start
+        scroll_time = time_scrolling(ui_context, surface)
+
+        print(f"{number_of_rows:>10} {build_time * 1000:>7.3f} ms {scroll_time * 1000:>10.3f} ms "
+              f"{log_source.requests:>15} {ui.sprite_cache.hits / (ui.sprite_cache.hits + ui.sprite_cache.misses):>17.0%}")
+
+    pygame.quit()
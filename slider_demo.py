@@ -1,6 +1,7 @@
 import pygame
 import ui
 import math
+import numpy
 from ui import Direction, Color
 from ui import Vector2
 
@@ -10,12 +11,10 @@ SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 SCREEN_SIZE = Vector2(SCREEN_WIDTH, SCREEN_HEIGHT)
 
-clock = pygame.time.Clock()
 FRAMES_PER_SECOND = 70
 
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
-mouse = ui.Mouse()
 
 
 function_x_to_y = lambda x: math.sin(x)
@@ -29,19 +28,6 @@ window_function_style = ui.UIBoxElementStyle(None, None, 1, Color.GREEN)
 window_function = ui.Box(SCREEN_SIZE / 2, Vector2(min_screen_side, min_screen_side) / 2, window_function_style)
 
 
-class RangeFloat:
-    def __init__(self, start, stop, step: float = 1.0):
-        self.start = start
-        self.stop = stop
-        self.step = step
-        self._value = start
-
-    def __iter__(self):
-        while self._value < self.stop:
-            yield self._value
-            self._value += self.step
-
-
 class FunctionRange:
     def __init__(self, start, stop):
         self.start = start
@@ -56,16 +42,37 @@ function_range_y = FunctionRange(-1, 1)
 function_range_x_span = function_range_x.stop - function_range_x.start
 function_range_y_span = function_range_y.stop - function_range_y.start
 
-previous_point_x = (function_range_x.stop + function_range_x.start) / 2
-previous_point_y = (function_range_y.stop + function_range_y.start) / 2
-point_x = ui.Reference((function_range_x.stop + function_range_x.start) / 2)
-point_y = ui.Reference((function_range_y.stop + function_range_y.start) / 2)
+EPSILON = 10 ** (-6)
+
+point_x = ui.Reference((function_range_x.stop + function_range_x.start) / 2, EPSILON)
+point_y = ui.Reference((function_range_y.stop + function_range_y.start) / 2, EPSILON)
+
+
+# Moving one slider moves the other one. The sliders follow their references,
+# and the epsilon stops the round trip through both functions
+def point_x_changed(x):
+    point_y.value = function_x_to_y(x)
+
+
+def point_y_changed(y):
+    point_x.value = function_y_to_x(y)
+
+
+point_x.subscribe(point_x_changed)
+point_y.subscribe(point_y_changed)
 
 #SALAD_COLOR = ui.Pixel(90, 198, 67)
 SALAD_COLOR = ui.Pixel(70, 160, 0)
 SALAD_COLOR = ui.Pixel(0, 190, 70)
 SALAD_COLOR = ui.Pixel(30, 140, 30)
 
+# Both axes have the same scale, the range of y is as long as the range of x
+plot_style = ui.UIBoxElementStyle(None, Color.GREEN, 0, None)
+plot = ui.Plot(window_function.position, window_function.size, plot_style,
+               numpy.sin,
+               (function_range_x.start, function_range_x.stop),
+               (-function_range_x.length / 2, function_range_x.length / 2))
+
 slider_style = ui.UIBoxElementStyle(ui.Pixel(0, 255, 0), None, 0, None)
 knob_style = ui.UIBoxElementStyle(Color.GREEN, None, 5, SALAD_COLOR)
 tick_mark_style = ui.UIBoxElementStyle(Color.GREEN, None, 0, None)
@@ -99,7 +106,9 @@ slider_y = ui.SliderFree(window_function.position_up_left_corner + Vector2(-wind
 
 ui_context = ui.UIContext(2)
 
+ui_context.back_layer().cached = True
 ui_context.back_layer().add_element(window_function)
+ui_context.back_layer().add_element(plot)
 ui_context.front_layer().add_element(slider_x)
 ui_context.front_layer().add_element(slider_y)
 
@@ -109,59 +118,22 @@ ui_context.front_layer().add_element(slider_y)
 #ui_context.front_layer().add_element(slider_x)
 #ui_context.front_layer().add_element(slider_y)
 
-delta_time = 0
-
-EPSILON = 10 ** (-6)
-
-
-def approximately_equal(x, y):
-    return abs(y - x) < EPSILON
+frame_driver = ui.FrameDriver(ui_context, FRAMES_PER_SECOND)
 
 
 if __name__ == "__main__":
     while True:
-        screen.fill(Color.BLACK)
-
-        events = pygame.event.get()
+        events = frame_driver.next_frame()
         for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
 
-        mouse.update_state()
-        mouse_position = mouse.get_position()
-        mouse_pressed = mouse.get_pressed()
-
-        previous_point_x = point_x.value
-        previous_point_y = point_y.value
-
-        ui_context.update_state(mouse_position, mouse_pressed, delta_time)
-        ui_context.draw_elements(screen)
-
-        if approximately_equal(point_x.value, previous_point_x):
-            slider_x.reference_value = function_y_to_x(point_y.value)
-        elif approximately_equal(point_y.value, previous_point_y):
-            slider_y.reference_value = function_x_to_y(point_x.value)
-
-        counter = 0
-        previous_point = None
-        for x in RangeFloat(function_range_x.start, function_range_x.stop, function_range_x.length / window_function.size.x):
-            y = function_x_to_y(x)
-
-            counter += 1
-            screen_dx = (x - function_range_x.start) / function_range_x.length * slider_x.length
-            screen_dy = y / function_range_y.length * slider_y.length
-            screen_point_position = window_function.position_up_left_corner + Vector2(0, window_function.size.y / 2) + Vector2(screen_dx, -screen_dy)
-
-            if previous_point is None:
-                pygame.draw.circle(screen, Color.GREEN, screen_point_position, 2)
-            else:
-                pygame.draw.line(screen, Color.GREEN, previous_point, screen_point_position)
-
-            previous_point = screen_point_position
+        screen.fill(Color.BLACK)
+        frame_driver.update_and_draw(screen)
 
-        ui.draw_text(screen, Vector2(0, 0), str(point_x.value), Color.GREEN, )
-        ui.draw_text(screen, Vector2(0, ui.default_ui_font.size("A")[1]), str(point_y.value), Color.GREEN, )
+        ui.draw_text(screen, Vector2(0, 0), str(point_x.value), Color.GREEN, use_glyph_atlas=True)
+        ui.draw_text(screen, Vector2(0, ui.measure_text(ui.default_ui_font, "A")[1]), str(point_y.value), Color.GREEN, use_glyph_atlas=True)
 
         pygame.draw.line(screen, Color.GREEN,
                          Vector2(slider_x.knob_box.position.x, window_function.position_bottom_left_corner.y),
@@ -175,6 +147,4 @@ if __name__ == "__main__":
         pygame.draw.circle(screen, Color.RED, Vector2(slider_x.knob_box.position.x, slider_y.knob_box.position.y), 5)
 
         pygame.display.update()
-        delta_time = clock.get_time() / 1000
-        clock.tick(FRAMES_PER_SECOND)
 
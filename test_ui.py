@@ -0,0 +1,170 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+import pytest
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+red_style = ui.UIBoxElementStyle(Color.RED, Color.RED, 0, Color.RED)
+
+
+@pytest.mark.skipif(ui.numpy is None, reason="the geometry store requires numpy")
+@pytest.mark.parametrize("cached", [False, True])
+def test_retained_mode_redraws_after_geometry_store_translate(cached):
+    surface = pygame.Surface((200, 100))
+    ui_context = ui.UIContext(1, use_geometry_store=True, retained_mode=True)
+    ui_context.layer(0).cached = cached
+    ui_context.append_element(0, ui.Box(Vector2(50, 50), Vector2(20, 20), red_style))
+    ui_context.draw_elements(surface)
+    assert surface.get_at((50, 50)) == Color.RED
+
+    ui_context.geometry_store.translate_all((100, 0))
+    assert ui_context.draw_elements(surface) == [surface.get_rect()]
+    assert surface.get_at((50, 50)) == Color.BLACK
+    assert surface.get_at((150, 50)) == Color.RED
+
+    assert ui_context.draw_elements(surface) == []
+
+
+def test_cached_geometry_follows_in_place_changes_and_is_not_shared():
+    box = ui.Box(Vector2(100, 100), Vector2(40, 40), red_style)
+    assert box.rectangle == (80, 80, 40, 40)
+
+    box.rectangle.move_ip(5, 5)
+    assert box.rectangle == (80, 80, 40, 40)
+
+    box.position.x += 50
+    assert box.rectangle == (130, 80, 40, 40)
+
+
+@pytest.mark.skipif(ui.numpy is None, reason="the Animator requires numpy")
+def test_animator_moves_elements_through_their_position():
+    slider = ui.SliderFree(Vector2(100, 100), 150, False, ui.Slider.DOWN, red_style, red_style, red_style,
+                           ui.Reference(0), ui.SliderValue(-1), ui.SliderValue(1), ui.SliderValue(0), [])
+    box = ui.Box(Vector2(50, 50), Vector2(20, 20), red_style)
+    ui_context = ui.UIContext(1, use_geometry_store=True)
+    ui_context.append_element(0, box)
+    ui_context.geometry_store
+    moved_elements = []
+    box.add_geometry_listener(moved_elements.append)
+
+    animator = ui.Animator()
+    animator.move(slider, (200, 100), 0.1, ui.Easing.LINEAR)
+    animator.move(box, (150, 50), 0.1, ui.Easing.LINEAR)
+    animator.update(0.1)
+    assert slider.position == (200, 100)
+    assert box.position == (150, 50)
+    assert box.rectangle == (140, 40, 20, 20)
+    assert moved_elements == [box]
+
+
+def test_reading_the_slider_knob_has_no_side_effects():
+    reference = ui.Reference(0)
+    slider = ui.SliderFree(Vector2(100, 100), 150, False, ui.Slider.DOWN, red_style, red_style, red_style,
+                           reference, ui.SliderValue(-1), ui.SliderValue(1), ui.SliderValue(0), [])
+    knob_box = slider.knob_box
+    changed_elements = []
+    knob_box.add_geometry_listener(changed_elements.append)
+    slider.add_geometry_listener(changed_elements.append)
+
+    for i in range(3):
+        assert slider.knob_box is knob_box
+    slider.bounding_rectangle
+    slider.draw(pygame.Surface((300, 200)))
+    assert changed_elements == []
+
+    knob_position = Vector2(knob_box.position)
+    reference.value = 1
+    ui.Reference.flush_notifications()
+    assert knob_box.position != knob_position
+    assert changed_elements == [knob_box]
+
+
+def test_scene_loader_warns_and_falls_back_for_missing_or_unknown_arguments():
+    loader = ui.SceneLoader()
+    with pytest.warns(UserWarning):
+        box = loader.build_element({"type": "Box"})
+    assert box.size == ui.SceneLoader.DEFAULT_SIZE
+    with pytest.warns(UserWarning):
+        slider = loader.build_element({"type": "SliderFree", "length": 100, "tick_mark_text_side": "bottom"})
+    assert slider is not None
+
+
+def test_scenes_sharing_a_raster_cache_keep_the_surfaces_of_each_other(tmp_path):
+    def scene(name: str, text: str) -> dict:
+        return {"name": name,
+                "styles": {"box": {"rectangle_color": "red", "content_color": "white"}},
+                "layers": [{"elements": [{"type": "TextBox", "size": [80, 30], "style": "box", "text": f"{text} {i}"}
+                                         for i in range(10)]}]}
+
+    path = str(tmp_path / "raster_cache.bin")
+    ui.load_scene(scene("menu", "PLAY"), raster_cache=path)
+    compactions = 0
+    for i in range(6):
+        raster_cache = ui.RasterCache(path)
+        ui.load_scene(scene("settings", f"OPTION {i}"), raster_cache=raster_cache)
+        compactions += raster_cache.compactions
+    assert compactions > 0
+
+    raster_cache = ui.RasterCache(path)
+    ui.load_scene(scene("menu", "PLAY"), raster_cache=raster_cache)
+    assert raster_cache.misses == 0
+    assert raster_cache.hits == 10
+
+
+def test_idle_frame_driver_runs_the_next_frame_at_once_after_a_change_or_wake():
+    surface = pygame.Surface((200, 100))
+    ui_context = ui.UIContext(1, retained_mode=True)
+    text = ui.Text(Vector2(10, 10), Color.WHITE, ui.default_font(), "A")
+    ui_context.append_element(0, text)
+    frame_driver = ui.FrameDriver(ui_context, idle_timeout_seconds=10)
+    while not frame_driver.idle:
+        frame_driver.next_frame()
+        frame_driver.update_and_draw(surface)
+
+    for change in (lambda: setattr(text, "text", "B"), frame_driver.wake):
+        change()
+        start = time.perf_counter()
+        assert frame_driver.next_frame() == []
+        frame_driver.update_and_draw(surface)
+        assert time.perf_counter() - start < 1
+        assert frame_driver.idle
+
+
+def test_weak_subscriptions_of_functions_and_methods():
+    reference = ui.Reference(0)
+    values = []
+
+    def append(value):
+        values.append(value)
+
+    class Subscriber:
+        def on_change(self, value):
+            values.append(-value)
+
+    subscriber = Subscriber()
+    reference.subscribe(append, weak=True)
+    reference.subscribe(subscriber.on_change, weak=True)
+    with pytest.raises(TypeError):
+        reference.subscribe(values.append, weak=True)
+
+    reference.value = 1
+    assert ui.Reference.flush_notifications() == 2
+    assert values == [1, -1]
+
+    del subscriber
+    reference.unsubscribe(append)
+    reference.value = 2
+    assert ui.Reference.flush_notifications() == 0
+
+
+def test_clearing_the_font_registry_reloads_the_default_fonts():
+    font = ui.default_ui_font
+    ui.font_registry.clear()
+    assert ui.default_ui_font is not font
+    assert ui.default_ui_font is ui.default_font()
+    assert ui.font_registry.path_and_size(ui.default_ui_font) is not None
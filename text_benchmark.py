@@ -0,0 +1,56 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import random
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+NUMBERS_OF_TEXTS = [10, 100, 1_000]
+FRAMES = 50
+
+
+# Numbers that change every frame, like the values of the sliders in slider_demo
+def frame_texts(number_of_texts: int) -> list[list[str]]:
+    random.seed(0)
+    return [[str(random.uniform(-100, 100)) for _ in range(number_of_texts)] for _ in range(FRAMES)]
+
+
+def time_draw_text(surface: pygame.Surface, texts: list[list[str]], use_glyph_atlas: bool) -> float:
+    start = time.perf_counter()
+    for frame in texts:
+        for i, text in enumerate(frame):
+            ui.draw_text(surface, Vector2((i % 4) * 320, (i // 4) * 20 % SCREEN_HEIGHT), text, Color.GREEN,
+                         ui.default_ui_font_slider_tick_mark, False, use_glyph_atlas)
+    return (time.perf_counter() - start) / FRAMES
+
+
+if __name__ == "__main__":
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    # The atlas is rasterized once
+    ui.glyph_atlas(ui.default_ui_font_slider_tick_mark, Color.GREEN)
+
+    print("Time per frame to draw texts that change every frame, and the same texts every frame")
+    print(f"{'texts':>10} {'font.render':>12} {'glyph atlas':>12} {'renders per frame':>18} "
+          f"{'same font.render':>17} {'same glyph atlas':>17}")
+    for number_of_texts in NUMBERS_OF_TEXTS:
+        texts = frame_texts(number_of_texts)
+        render = time_draw_text(surface, texts, False)
+        font_render_calls = ui.RenderStatistics.font_render_calls
+        atlas = time_draw_text(surface, texts, True)
+        atlas_font_render_calls = ui.RenderStatistics.font_render_calls - font_render_calls
+        same_texts = [texts[0]] * FRAMES
+        same_render = time_draw_text(surface, same_texts, False)
+        same_atlas = time_draw_text(surface, same_texts, True)
+        print(f"{number_of_texts:>10} {render * 1000:>9.3f} ms {atlas * 1000:>9.3f} ms "
+              f"{number_of_texts:>8} -> {atlas_font_render_calls / FRAMES:<7.0f} "
+              f"{same_render * 1000:>14.3f} ms {same_atlas * 1000:>14.3f} ms")
+
+    pygame.quit()
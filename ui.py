@@ -1,15 +1,30 @@
 import pygame
 from typing import Union
 from abc import ABC
-from multipledispatch import dispatch
 import typing
 import types
 import math
+import time
+import json
+import os
+import mmap
+import hashlib
+import struct
+import collections
+import weakref
 import warnings
 from warnings import warn
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
 
-pygame.init()
 
 
 Vector2 = pygame.Vector2
@@ -38,14 +53,480 @@ class Color:
     MAGENTA = Pixel(255, 0, 255)
 
 
-default_ui_font = Font("fonts/NES_Font.ttf", 32)
-default_ui_font_slider_tick_mark = Font("fonts/NES_Font.ttf", 24)
+# Importing ui doesn't initialise pygame, the font module is initialised when the first font is loaded
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_FONT_PATH = "fonts/NES_Font.ttf"
+DEFAULT_FONT_SIZE = 32
+DEFAULT_SLIDER_TICK_MARK_FONT_SIZE = 24
+
+
+# Loads a font when it is first asked for, and gives the same Font to everyone asking for the same file and size.
+# Relative paths are relative to the package, not to the working directory
+class FontRegistry:
+    def __init__(self, directory: str = PACKAGE_DIRECTORY):
+        self.directory = directory
+        self._fonts: dict[tuple[str, int], Font] = {}
+        self._paths_and_sizes: dict[Font, tuple[str, int]] = {}
+        # By the path as it was asked for, so a font asked for again doesn't resolve its path again
+        self._requested_fonts: dict[tuple[str, int], Font] = {}
+
+    def __len__(self) -> int:
+        return len(self._fonts)
+
+    def resolve_path(self, path: str) -> str:
+        return os.path.normpath(os.path.join(self.directory, path))
+
+    def get(self, path: str, size: int) -> Font:
+        font = self._requested_fonts.get((path, size))
+        if font is not None:
+            return font
+        key = (self.resolve_path(path), size)
+        font = self._fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self._fonts[key] = Font(key[0], size)
+            self._paths_and_sizes[font] = key
+        self._requested_fonts[(path, size)] = font
+        return font
+
+    # Of a font loaded through the registry, None for other fonts
+    def path_and_size(self, font: Font) -> Union[tuple[str, int], None]:
+        return self._paths_and_sizes.get(font)
+
+    # The default fonts read as module attributes are loaded again when they are next read
+    def clear(self):
+        self._fonts.clear()
+        self._paths_and_sizes.clear()
+        self._requested_fonts.clear()
+        if self is font_registry:
+            for name in _LAZY_ATTRIBUTES:
+                globals().pop(name, None)
+
+
+font_registry = FontRegistry()
+
+
+def load_font(path: str, size: int) -> Font:
+    return font_registry.get(path, size)
+
+
+def default_font() -> Font:
+    return font_registry.get(DEFAULT_FONT_PATH, DEFAULT_FONT_SIZE)
+
+
+def default_slider_tick_mark_font() -> Font:
+    return font_registry.get(DEFAULT_FONT_PATH, DEFAULT_SLIDER_TICK_MARK_FONT_SIZE)
+
+
+# default_ui_font and default_ui_font_slider_tick_mark are loaded when they are first read,
+# then they are module attributes like the others
+_LAZY_ATTRIBUTES = {"default_ui_font": default_font, "default_ui_font_slider_tick_mark": default_slider_tick_mark_font}
+
+
+def __getattr__(name: str):
+    function = _LAZY_ATTRIBUTES.get(name)
+    if function is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = function()
+    return value
 
 
 def null_function():
     pass
 
 
+# Counted for every text rendered and surface created by ui, read by the UIProfiler
+class RenderStatistics:
+    font_render_calls = 0
+    surface_allocations = 0
+
+
+def render_text(font: Font, text: str, antialiasing: bool, color: Pixel) -> pygame.Surface:
+    RenderStatistics.font_render_calls += 1
+    RenderStatistics.surface_allocations += 1
+    return font.render(text, antialiasing, color)
+
+
+# Sizes of rendered texts, measuring a text with FreeType costs about as much as rendering it.
+# When the cache is full the least recently used size is dropped
+class TextMetricsCache:
+    MAXIMUM_SIZE = 4096
+
+    def __init__(self, maximum_size: int = MAXIMUM_SIZE):
+        self.maximum_size = maximum_size
+        self._sizes = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def size(self, font: Font, text: str) -> tuple[int, int]:
+        key = (font, text)
+        size = self._sizes.get(key)
+        if size is not None:
+            self.hits += 1
+            self._sizes.move_to_end(key)
+            return size
+
+        self.misses += 1
+        size = self._sizes[key] = font.size(text)
+        if len(self._sizes) > self.maximum_size:
+            self._sizes.popitem(last=False)
+        return size
+
+    def clear(self):
+        self._sizes.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+text_metrics = TextMetricsCache()
+
+
+def measure_text(font: Font, text: str) -> tuple[int, int]:
+    return text_metrics.size(font, text)
+
+
+def new_surface(size: Union[tuple[int, int], Vector2], flags: int = 0) -> pygame.Surface:
+    RenderStatistics.surface_allocations += 1
+    return pygame.Surface(size, flags)
+
+
+# Converts to the pixel format of the display, if there is one, so blitting doesn't convert every frame
+def to_display_format(surface: pygame.Surface) -> pygame.Surface:
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if surface.get_flags() & pygame.SRCALPHA else surface.convert()
+
+
+# The glyphs of a font in one color, each rasterized once into its own sprite. A text is drawn with one
+# Surface.blits call, a blit per glyph, placed by the widths of the glyphs and the kerning of the pairs of glyphs.
+# The sprites are run-length encoded, so their empty pixels are skipped: glyphs blitted from the areas of a single
+# atlas surface can't be, and together cost more than a font.render. Font doesn't expose kerning, it is the width
+# of a pair minus the widths of its glyphs, measured once per font when a character is first drawn, for its pairs
+# with the characters drawn before it. Draws the same pixels as render_text for fonts with whole pixel advances,
+# like NES_Font, other fonts can be a pixel off. Characters outside of printable ASCII are rasterized when they
+# are first drawn. The blits of a text are kept, a text drawn again at the same place reuses them
+class GlyphAtlas:
+    INITIAL_CHARACTERS = "".join(chr(code) for code in range(32, 127))
+    # Texts whose blits are kept, the least recently drawn are dropped
+    MAXIMUM_LAYOUTS = 1024
+
+    # The pairs of glyphs with kerning of each font and the characters whose pairs were measured,
+    # shared by the atlases of all colors and dropped with the font
+    _font_kerning: "weakref.WeakKeyDictionary[Font, dict[str, int]]" = weakref.WeakKeyDictionary()
+    _font_measured_characters: "weakref.WeakKeyDictionary[Font, set[str]]" = weakref.WeakKeyDictionary()
+
+    def __init__(self, font: Font, color: Pixel, antialiasing: bool = False):
+        self.font = font
+        self.color = Pixel(color)
+        self.antialiasing = antialiasing
+        self.height = font.get_height()
+
+        # (sprite, width) by character
+        self._glyphs: dict[str, tuple[pygame.Surface, int]] = {}
+        self._kerning = GlyphAtlas._font_kerning.setdefault(font, {})
+        self._measured_characters = GlyphAtlas._font_measured_characters.setdefault(font, set())
+        # (position, blits) of the last draw by text
+        self._layouts: collections.OrderedDict[str, tuple] = collections.OrderedDict()
+        self.add_glyphs(self.INITIAL_CHARACTERS)
+
+    # Glyphs without antialiasing keep the color key of font.render, the others their per pixel alpha
+    def add_glyphs(self, characters: str):
+        for character in characters:
+            if character in self._glyphs:
+                continue
+            glyph = to_display_format(render_text(self.font, character, self.antialiasing, self.color))
+            if glyph.get_flags() & pygame.SRCALPHA:
+                glyph.set_alpha(255, pygame.RLEACCEL)
+            else:
+                glyph.set_colorkey(glyph.get_colorkey(), pygame.RLEACCEL)
+            self._glyphs[character] = (glyph, glyph.get_width())
+
+    # Measures the pairs of the new characters with themselves and the characters measured before
+    def _measure_kerning(self, characters: str):
+        size = self.font.size
+        measured = self._measured_characters
+        for character in dict.fromkeys(characters):
+            if character in measured:
+                continue
+            measured.add(character)
+            width = size(character)[0]
+            for other in measured:
+                other_width = size(other)[0]
+                for pair in (character + other, other + character):
+                    pair_kerning = size(pair)[0] - width - other_width
+                    if pair_kerning:
+                        self._kerning[pair] = pair_kerning
+
+    # The blits of the glyphs of the text with its up left corner at (x, y), and the x after the text
+    def _layout(self, text: str, x: int, y: int) -> tuple[list, int]:
+        if not self._measured_characters.issuperset(text):
+            self._measure_kerning(text)
+        glyphs = self._glyphs
+        kerning = self._kerning
+        blits = []
+        start_x = x
+        try:
+            if not kerning:
+                for character in text:
+                    glyph, width = glyphs[character]
+                    blits.append((glyph, (x, y)))
+                    x += width
+            else:
+                for i, character in enumerate(text):
+                    glyph, width = glyphs[character]
+                    blits.append((glyph, (x, y)))
+                    x += width + kerning.get(text[i:i + 2], 0)
+        except KeyError:
+            self.add_glyphs(text)
+            return self._layout(text, start_x, y)
+        return blits, x
+
+    def size(self, text: str) -> tuple[int, int]:
+        return self._layout(text, 0, 0)[1], self.height
+
+    # Coordinates are truncated towards zero, as by Surface.blit
+    def draw(self, surface: pygame.Surface, position_up_left_corner: Union[Vector2, list[float]], text: str):
+        position = (int(position_up_left_corner[0]), int(position_up_left_corner[1]))
+        layout = self._layouts.get(text)
+        if layout is None or layout[0] != position:
+            layout = self._layouts[text] = (position, self._layout(text, position[0], position[1])[0])
+            if len(self._layouts) > self.MAXIMUM_LAYOUTS:
+                self._layouts.popitem(last=False)
+        self._layouts.move_to_end(text)
+        surface.blits(layout[1], doreturn=False)
+
+
+# Atlases by font, color and antialiasing, created when they are first used. The least recently used atlas
+# is dropped once there are more than GLYPH_ATLASES_MAXIMUM_SIZE, like those of the colors of a fading text
+GLYPH_ATLASES_MAXIMUM_SIZE = 32
+glyph_atlases: collections.OrderedDict[tuple, GlyphAtlas] = collections.OrderedDict()
+
+
+def glyph_atlas(font: Font, color: Pixel, antialiasing: bool = False) -> GlyphAtlas:
+    key = (font, color_key(color), antialiasing)
+    atlas = glyph_atlases.get(key)
+    if atlas is None:
+        atlas = glyph_atlases[key] = GlyphAtlas(font, color, antialiasing)
+        if len(glyph_atlases) > GLYPH_ATLASES_MAXIMUM_SIZE:
+            glyph_atlases.popitem(last=False)
+    else:
+        glyph_atlases.move_to_end(key)
+    return atlas
+
+
+# Pre-rendered sprites shared between all the elements that look the same.
+# When the cache is full the least recently used sprite is dropped
+class SpriteCache:
+    MAXIMUM_SIZE = 512
+
+    def __init__(self, maximum_size: int = MAXIMUM_SIZE):
+        self.maximum_size = maximum_size
+        self._sprites = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    # render is only called on a miss, and returns what is stored for the key, or None if it can't be cached
+    def get(self, key: tuple, render):
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = render()
+        if sprite is not None:
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.maximum_size:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    # Stores a sprite rendered elsewhere, like one loaded from a RasterCache
+    def put(self, key: tuple, sprite):
+        self._sprites[key] = sprite
+        self._sprites.move_to_end(key)
+        if len(self._sprites) > self.maximum_size:
+            self._sprites.popitem(last=False)
+
+    def clear(self):
+        self._sprites.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+sprite_cache = SpriteCache()
+
+
+# Surfaces rasterized by a previous run, stored as raw RGBA pixels in one file, each by the hash of everything
+# its pixels depend on, so a changed style, text or font file is rasterized again. The versions of pygame and
+# SDL_ttf are part of the hash. The file is memory-mapped when it is first read, loading a surface costs a copy
+# instead of rendering text and shapes. Saved surfaces are appended to the file by flush. The surfaces that weren't
+# loaded or saved through this RasterCache for the scene that stored them are stale, like the surfaces of a style
+# that changed since: when they take more than COMPACT_STALE_FRACTION of the file, flush writes the file again
+# without them. Surfaces are stored with the name of their scene, so scenes sharing a file don't drop
+# the surfaces of each other
+class RasterCache:
+    FORMAT_VERSION = 2
+    MAGIC = b"UIRASTR2"
+    # Hash, hash of the name of the scene, width, height and the offset stored with the surface, followed by the pixels
+    ENTRY_HEADER = struct.Struct("<32s32sIIdd")
+    COMPACT_STALE_FRACTION = 0.5
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: dict[bytes, tuple[int, bytes, int, int, float, float]] = {}
+        self._data = None
+        self._read = False
+        self._pending: list[bytes] = []
+        # Hashes of the surfaces loaded or saved, and of the names of the scenes they were loaded or saved for
+        self._used: set[bytes] = set()
+        self._scenes: set[bytes] = set()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        if not self._read:
+            self._read_entries()
+        return len(self._entries)
+
+    # content must have the same repr in every run, so it can't hold fonts or other objects without a value repr
+    @classmethod
+    def content_hash(cls, content) -> bytes:
+        versions = (cls.FORMAT_VERSION, pygame.version.ver, pygame.font.get_sdl_ttf_version())
+        return hashlib.sha256(repr((versions, content)).encode()).digest()
+
+    @staticmethod
+    def scene_hash(scene: str) -> bytes:
+        return hashlib.sha256(scene.encode()).digest()
+
+    def _read_entries(self):
+        self._read = True
+        try:
+            with open(self.path, "rb") as file:
+                if os.fstat(file.fileno()).st_size <= len(self.MAGIC):
+                    return
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return
+        if data[:len(self.MAGIC)] != self.MAGIC:
+            data.close()
+            return
+
+        offset = len(self.MAGIC)
+        while offset + self.ENTRY_HEADER.size <= len(data):
+            content_hash, scene_hash, width, height, x, y = self.ENTRY_HEADER.unpack_from(data, offset)
+            offset += self.ENTRY_HEADER.size
+            # Written by a run that stopped in the middle of it
+            if offset + width * height * 4 > len(data):
+                break
+            self._entries[content_hash] = (offset, scene_hash, width, height, x, y)
+            offset += width * height * 4
+        self._data = data
+
+    # Returns the surface and its offset, or None if it isn't stored
+    def load(self, content_hash: bytes, scene: str = "") -> Union[tuple[pygame.Surface, tuple[float, float]], None]:
+        if not self._read:
+            self._read_entries()
+        self._scenes.add(self.scene_hash(scene))
+        entry = self._entries.get(content_hash)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._used.add(content_hash)
+        offset, _, width, height, x, y = entry
+        RenderStatistics.surface_allocations += 1
+        # The pixels are copied out of the map, so it can be closed while the surface lives
+        surface = pygame.image.frombuffer(self._data[offset:offset + width * height * 4], (width, height), "RGBA")
+        return to_display_format(surface), (x, y)
+
+    def save(self, content_hash: bytes, surface: pygame.Surface, offset: tuple[float, float] = (0, 0), scene: str = ""):
+        scene_hash = self.scene_hash(scene)
+        self._scenes.add(scene_hash)
+        self._used.add(content_hash)
+        self._pending.append(self.ENTRY_HEADER.pack(content_hash, scene_hash, surface.get_width(), surface.get_height(),
+                                                    offset[0], offset[1]))
+        self._pending.append(pygame.image.tobytes(surface, "RGBA"))
+
+    # Stored for one of the scenes of this RasterCache, but neither loaded nor saved
+    def _stale(self, content_hash: bytes) -> bool:
+        return content_hash not in self._used and self._entries[content_hash][1] in self._scenes
+
+    # The entries that were written again count as stale too, only the last one is read
+    def _stale_size(self) -> int:
+        if self._data is None:
+            return 0
+        kept_size = len(self.MAGIC) + sum(self.ENTRY_HEADER.size + width * height * 4
+                                          for content_hash, (_, _, width, height, _, _) in self._entries.items()
+                                          if not self._stale(content_hash))
+        return len(self._data) - kept_size
+
+    # The saved surfaces are appended with one write, a file that isn't a raster cache is replaced.
+    # The file is compacted instead if it has too many stale surfaces
+    def flush(self):
+        if not self._read:
+            self._read_entries()
+        stale_size = self._stale_size()
+        if stale_size and stale_size > self.COMPACT_STALE_FRACTION * (len(self._data) + sum(map(len, self._pending))):
+            self._compact()
+        elif self._pending:
+            mode = "ab" if self._data is not None else "wb"
+            self.close()
+            with open(self.path, mode) as file:
+                if mode == "wb":
+                    file.write(self.MAGIC)
+                file.write(b"".join(self._pending))
+        else:
+            return
+        self.writes += len(self._pending) // 2
+        self._pending.clear()
+
+    # Writes the surfaces that aren't stale into a new file, which replaces the old one once it is complete
+    def _compact(self):
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(self.MAGIC)
+            for content_hash, (offset, scene_hash, width, height, x, y) in self._entries.items():
+                if not self._stale(content_hash):
+                    file.write(self.ENTRY_HEADER.pack(content_hash, scene_hash, width, height, x, y))
+                    file.write(self._data[offset:offset + width * height * 4])
+            file.write(b"".join(self._pending))
+        self.close()
+        os.replace(temporary_path, self.path)
+        self.compactions += 1
+
+    # Unmaps the file, it is read again when it is next loaded from
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        self._entries.clear()
+        self._read = False
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._pending.clear()
+        self._used.clear()
+        self._scenes.clear()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compactions = 0
+
+
 def point_vs_rect(point: Union[Vector2, list[float]], rectangle: Rectangle):
     return (rectangle[0] <= point[0] <= rectangle[0] + rectangle[2] and
             rectangle[1] <= point[1] <= rectangle[1] + rectangle[3])
@@ -84,25 +565,195 @@ def collide_float(rectangle1: Rectangle, rectangle2: Rectangle):
     return False
 
 
+# Takes the place of the surface given to UIElement.draw and records what is drawn on it instead of drawing it.
+# The commands are kept in a list that is reused from frame to frame, and are drawn on a surface by replay,
+# consecutive blits with one Surface.blits call. The arguments are copied when they are recorded, except for the
+# surfaces blitted: a surface is taken as unchanged while it is the same object, surfaces must not be drawn on
+# in place once blitted. Texts are rendered only when they are replayed
+class DrawList:
+    BLIT = 0
+    TEXT = 1
+    FILL = 2
+    RECT = 3
+    LINES = 4
+    AALINES = 5
+    POLYGON = 6
+    SET_CLIP = 7
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, size: tuple[int, int] = (0, 0), capacity: int = INITIAL_CAPACITY):
+        self._commands: list[Union[tuple, None]] = [None] * max(1, capacity)
+        self._length = 0
+        self._size = (int(size[0]), int(size[1]))
+        self._clip = Rectangle((0, 0), self._size)
+        # Of the last replay, a Surface.blits call counts as one
+        self.draw_calls = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def capacity(self) -> int:
+        return len(self._commands)
+
+    # The commands are dropped, not the list holding them
+    def clear(self, size: tuple[int, int]):
+        self._length = 0
+        self._size = (int(size[0]), int(size[1]))
+        self._clip = Rectangle((0, 0), self._size)
+
+    def same_commands(self, other: "DrawList") -> bool:
+        return self._length == other._length and self._commands[:self._length] == other._commands[:other._length]
+
+    def _record(self, command: tuple):
+        if self._length == len(self._commands):
+            self._commands.extend([None] * len(self._commands))
+        self._commands[self._length] = command
+        self._length += 1
+
+    # The part of the Surface interface used by the elements
+    def get_size(self) -> tuple[int, int]:
+        return self._size
+
+    def get_width(self) -> int:
+        return self._size[0]
+
+    def get_height(self) -> int:
+        return self._size[1]
+
+    def get_rect(self, **kwargs) -> Rectangle:
+        rectangle = Rectangle((0, 0), self._size)
+        for name, value in kwargs.items():
+            setattr(rectangle, name, value)
+        return rectangle
+
+    def get_clip(self) -> Rectangle:
+        return Rectangle(self._clip)
+
+    def set_clip(self, rectangle: Union[Rectangle, None] = None):
+        surface_rectangle = Rectangle((0, 0), self._size)
+        self._clip = surface_rectangle if rectangle is None else Rectangle(rectangle).clip(surface_rectangle)
+        self._record((self.SET_CLIP, Rectangle(self._clip)))
+
+    # Nothing is returned, unlike Surface.blit
+    def blit(self, source: pygame.Surface, dest, area: Union[Rectangle, None] = None, special_flags: int = 0):
+        self._record((self.BLIT, source, (dest[0], dest[1]), None if area is None else Rectangle(area), special_flags))
+
+    def blits(self, blit_sequence, doreturn: bool = True):
+        for blit in blit_sequence:
+            self.blit(*blit)
+
+    def fill(self, color: Pixel, rectangle: Union[Rectangle, None] = None, special_flags: int = 0):
+        self._record((self.FILL, color_key(color), None if rectangle is None else Rectangle(rectangle), special_flags))
+
+    def text(self, font: Font, text: str, antialiasing: bool, color: Pixel, position: Union[Vector2, tuple]):
+        self._record((self.TEXT, font, text, antialiasing, color_key(color), (position[0], position[1])))
+
+    def rect(self, color: Pixel, rectangle: Union[Rectangle, list[float]], width: int = 0):
+        self._record((self.RECT, color_key(color), tuple(rectangle), width))
+
+    def lines(self, color: Pixel, closed: bool, points):
+        self._record((self.LINES, color_key(color), closed, tuple((point[0], point[1]) for point in points)))
+
+    def aalines(self, color: Pixel, closed: bool, points):
+        self._record((self.AALINES, color_key(color), closed, tuple((point[0], point[1]) for point in points)))
+
+    def polygon(self, color: Pixel, points):
+        self._record((self.POLYGON, color_key(color), tuple((point[0], point[1]) for point in points)))
+
+    # Returns the number of draw calls made, the clip of the surface is restored afterwards
+    def replay(self, surface: pygame.Surface) -> int:
+        draw_calls = 0
+        blits = []
+        previous_clip = surface.get_clip()
+        commands = self._commands
+        for i in range(self._length):
+            command = commands[i]
+            kind = command[0]
+            if kind == self.BLIT:
+                blits.append(command[1:])
+                continue
+            if kind == self.TEXT:
+                _, font, text, antialiasing, color, position = command
+                blits.append((render_text(font, text, antialiasing, color), position))
+                continue
+
+            if blits:
+                surface.blits(blits, doreturn=False)
+                draw_calls += 1
+                blits = []
+            if kind == self.SET_CLIP:
+                surface.set_clip(command[1])
+                continue
+            if kind == self.FILL:
+                surface.fill(command[1], command[2], command[3])
+            elif kind == self.RECT:
+                pygame.draw.rect(surface, command[1], command[2], command[3])
+            elif kind == self.LINES:
+                pygame.draw.lines(surface, command[1], command[2], command[3])
+            elif kind == self.AALINES:
+                pygame.draw.aalines(surface, command[1], command[2], command[3])
+            elif kind == self.POLYGON:
+                pygame.draw.polygon(surface, command[1], command[2])
+            draw_calls += 1
+
+        if blits:
+            surface.blits(blits, doreturn=False)
+            draw_calls += 1
+        surface.set_clip(previous_clip)
+        self.draw_calls = draw_calls
+        return draw_calls
+
+
+# Same as the pygame.draw functions, the shapes are recorded if the surface is a DrawList
+def draw_rect(surface, color: Pixel, rectangle: Union[Rectangle, list[float]], width: int = 0):
+    if isinstance(surface, DrawList):
+        surface.rect(color, rectangle, width)
+    else:
+        pygame.draw.rect(surface, color, rectangle, width)
+
+
+def draw_lines(surface, color: Pixel, closed: bool, points):
+    if isinstance(surface, DrawList):
+        surface.lines(color, closed, points)
+    else:
+        pygame.draw.lines(surface, color, closed, points)
+
+
+def draw_aalines(surface, color: Pixel, closed: bool, points):
+    if isinstance(surface, DrawList):
+        surface.aalines(color, closed, points)
+    else:
+        pygame.draw.aalines(surface, color, closed, points)
+
+
+def draw_polygon(surface, color: Pixel, points):
+    if isinstance(surface, DrawList):
+        surface.polygon(color, points)
+    else:
+        pygame.draw.polygon(surface, color, points)
+
+
 def draw_border(surface: pygame.Surface, rectangle: Rectangle, border_color: Pixel, thickness: float):
     # UP
-    pygame.draw.rect(surface, border_color, [rectangle[0] - thickness, rectangle[1] - thickness,
-                                             rectangle[2] + 2 * thickness, thickness])
+    draw_rect(surface, border_color, [rectangle[0] - thickness, rectangle[1] - thickness,
+                                      rectangle[2] + 2 * thickness, thickness])
     # DOWN
-    pygame.draw.rect(surface, border_color, [rectangle[0] - thickness, rectangle[1] + rectangle[3],
-                                             rectangle[2] + 2 * thickness, thickness])
+    draw_rect(surface, border_color, [rectangle[0] - thickness, rectangle[1] + rectangle[3],
+                                      rectangle[2] + 2 * thickness, thickness])
     # RIGHT
-    pygame.draw.rect(surface, border_color, [rectangle[0] + rectangle[2], rectangle[1],
-                                             thickness, rectangle[3]])
+    draw_rect(surface, border_color, [rectangle[0] + rectangle[2], rectangle[1],
+                                      thickness, rectangle[3]])
     # LEFT
-    pygame.draw.rect(surface, border_color, [rectangle[0] - thickness, rectangle[1],
-                                             thickness, rectangle[3]])
+    draw_rect(surface, border_color, [rectangle[0] - thickness, rectangle[1],
+                                      thickness, rectangle[3]])
 
 
 def draw_rectangle(surface: pygame.Surface, rectangle: Rectangle, rectangle_color: Pixel,
                    outline: float = 0, outline_color: Pixel = None):
     if rectangle_color is not None:
-        pygame.draw.rect(surface, rectangle_color, rectangle)
+        draw_rect(surface, rectangle_color, rectangle)
 
     if outline != 0 and outline_color is not None:
         draw_border(surface, rectangle, outline_color, outline)
@@ -112,22 +763,31 @@ def draw_rounded_border(surface: pygame.Surface, rectangle: Rectangle, border_co
     if thickness == 0:
         return
     # UP
-    pygame.draw.rect(surface, border_color, [rectangle[0] - thickness + offset, rectangle[1] - thickness,
-                                             rectangle[2] + 2 * thickness - offset * 2, thickness])
+    draw_rect(surface, border_color, [rectangle[0] - thickness + offset, rectangle[1] - thickness,
+                                      rectangle[2] + 2 * thickness - offset * 2, thickness])
     # DOWN
-    pygame.draw.rect(surface, border_color, [rectangle[0] - thickness + offset, rectangle[1] + rectangle[3],
-                                             rectangle[2] + 2 * thickness - offset * 2, thickness])
+    draw_rect(surface, border_color, [rectangle[0] - thickness + offset, rectangle[1] + rectangle[3],
+                                      rectangle[2] + 2 * thickness - offset * 2, thickness])
     # RIGHT
-    pygame.draw.rect(surface, border_color, [rectangle[0] + rectangle[2], rectangle[1] - thickness + offset,
-                                             thickness, rectangle[3] + thickness * 2 - offset * 2])
+    draw_rect(surface, border_color, [rectangle[0] + rectangle[2], rectangle[1] - thickness + offset,
+                                      thickness, rectangle[3] + thickness * 2 - offset * 2])
     # LEFT
-    pygame.draw.rect(surface, border_color, [rectangle[0] - thickness, rectangle[1] - thickness + 1,
-                                             thickness, rectangle[3] + thickness * 2 - offset * 2])
+    draw_rect(surface, border_color, [rectangle[0] - thickness, rectangle[1] - thickness + 1,
+                                      thickness, rectangle[3] + thickness * 2 - offset * 2])
 
 
+# Text that changes every frame is better drawn from the glyph atlas than rendered again
 def draw_text(surface: pygame.Surface, position_up_left_corner: Vector2, text: str, color: Pixel,
-              font: Font = default_ui_font, enable_antialiasing: bool = False):
-    text_surface = font.render(text, enable_antialiasing, color)
+              font: Union[Font, None] = None, enable_antialiasing: bool = False, use_glyph_atlas: bool = False):
+    if font is None:
+        font = default_font()
+    if use_glyph_atlas:
+        glyph_atlas(font, color, enable_antialiasing).draw(surface, position_up_left_corner, text)
+        return
+    if isinstance(surface, DrawList):
+        surface.text(font, text, enable_antialiasing, color, position_up_left_corner)
+        return
+    text_surface = render_text(font, text, enable_antialiasing, color)
     surface.blit(text_surface, position_up_left_corner)
 
 
@@ -197,23 +857,103 @@ class Mouse(ScanHardware):
         self._position = pygame.mouse.get_pos()
 
     def get_position(self) -> Vector2:
-        return Vector2(pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1])
+        return Vector2(pygame.mouse.get_pos())
 
     def get_previous_position(self) -> Vector2:
         return self._previous_position
 
 
+# A Mouse whose state is changed by the events from pygame.event.get() instead of polling
+class EventMouse(Mouse):
+    # pygame reports the wheel as buttons 4 and 5 too, so the side buttons come after it
+    EVENT_BUTTON_TO_KEY = {1: Mouse.LEFT, 2: Mouse.MIDDLE, 3: Mouse.RIGHT, 6: Mouse.BACK, 7: Mouse.FORWARD}
+
+    def __init__(self):
+        super().__init__()
+        self._raw_states = [False] * self.buttons
+        self._raw_position = Vector2(0, 0)
+
+    def get_keys_raw_states(self) -> list[bool]:
+        return self._raw_states
+
+    def update_state(self):
+        ScanHardware.update_state(self)
+        self._previous_position = self._position
+        self._position = Vector2(self._raw_position)
+
+    def get_position(self) -> Vector2:
+        return Vector2(self._position)
+
+    @property
+    def any_key_held(self) -> bool:
+        return any(self._raw_states)
+
+    # Returns True if a key changed its state
+    def process_event(self, event: pygame.event.Event) -> bool:
+        if event.type == pygame.MOUSEMOTION:
+            self._raw_position = Vector2(event.pos)
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            self._raw_position = Vector2(event.pos)
+            key = self.EVENT_BUTTON_TO_KEY.get(event.button)
+            if key is not None:
+                self._raw_states[key] = event.type == pygame.MOUSEBUTTONDOWN
+                return True
+        return False
+
+
 class UIElement(ABC):
     def __init__(self):
         self._collides_with_mouse = False
         self._active = False
+        self._geometry_listeners = []
+        self._redraw_listeners = []
 
     def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
         pass
 
+    # Returns True if the element used the scroll, then the elements behind it don't get it
+    def on_mouse_wheel(self, mouse_position: Vector2, scroll: Vector2) -> bool:
+        return False
+
     def draw(self, surface):
         pass
 
+    # The area outside of which the element can't collide with the mouse,
+    # None means the element has to be updated wherever the mouse is
+    @property
+    def bounding_rectangle(self) -> Union[Rectangle, None]:
+        return None
+
+    # The area the element draws in, None means it can draw anywhere on the surface
+    @property
+    def visual_rectangle(self) -> Union[Rectangle, None]:
+        return None
+
+    def add_geometry_listener(self, listener):
+        self._geometry_listeners.append(listener)
+
+    def remove_geometry_listener(self, listener):
+        if listener in self._geometry_listeners:
+            self._geometry_listeners.remove(listener)
+
+    def add_redraw_listener(self, listener):
+        self._redraw_listeners.append(listener)
+
+    def remove_redraw_listener(self, listener):
+        if listener in self._redraw_listeners:
+            self._redraw_listeners.remove(listener)
+
+    # Must be called whenever the element would draw differently
+    def invalidate(self):
+        for listener in self._redraw_listeners:
+            listener(self)
+
+    # Must be called whenever the bounding rectangle of the element changes
+    def _geometry_changed(self):
+        for listener in self._geometry_listeners:
+            listener(self)
+        self.invalidate()
+
     @property
     def collides_with_mouse(self) -> bool:
         return self._collides_with_mouse
@@ -224,27 +964,661 @@ class UIElement(ABC):
 
 
 class UILayer:
-    def __init__(self):
+    def __init__(self, cached: bool = False):
         self.elements: list[UIElement] = []
+        self._change_listeners = []
+
+        # A cached layer is drawn into its own surface, which is redrawn only when one of its elements is invalidated
+        self._cached = False
+        self._cache_surface = None
+        self._cache_outdated = True
+        self.cached = cached
+
+    @property
+    def cached(self) -> bool:
+        return self._cached
+
+    @cached.setter
+    def cached(self, cached: bool):
+        if cached == self._cached:
+            return
+        self._cached = cached
+        for element in self.elements:
+            if cached:
+                element.add_redraw_listener(self._on_element_invalidated)
+            else:
+                element.remove_redraw_listener(self._on_element_invalidated)
+        self._cache_surface = None
+        self._cache_outdated = True
 
     def add_element(self, element: UIElement):
         self.elements.append(element)
+        if self._cached:
+            element.add_redraw_listener(self._on_element_invalidated)
+        self._changed()
+
+    def insert_element(self, index_of_element: int, element: UIElement):
+        self.elements.insert(index_of_element, element)
+        if self._cached:
+            element.add_redraw_listener(self._on_element_invalidated)
+        self._changed()
+
+    def remove_element(self, element: UIElement):
+        self.elements.remove(element)
+        element.remove_redraw_listener(self._on_element_invalidated)
+        self._changed()
+
+    def add_change_listener(self, listener):
+        self._change_listeners.append(listener)
+
+    # Must be called if self.elements was modified directly
+    def _changed(self):
+        self._cache_outdated = True
+        for listener in self._change_listeners:
+            listener(self)
+
+    def _on_element_invalidated(self, element: UIElement):
+        self._cache_outdated = True
+
+    def invalidate(self):
+        self._cache_outdated = True
+
+    def _update_cache(self, size: tuple[int, int]):
+        if self._cache_surface is None or self._cache_surface.get_size() != size:
+            self._cache_surface = new_surface(size, pygame.SRCALPHA)
+        elif not self._cache_outdated:
+            return
+
+        self._cache_surface.fill((0, 0, 0, 0))
+        for element in self.elements:
+            element.draw(self._cache_surface)
+        self._cache_outdated = False
+
+    # Only the area of the surface is drawn if it is specified
+    def draw(self, surface, area: Union[Rectangle, None] = None):
+        if not self._cached:
+            for element in self.elements:
+                element.draw(surface)
+            return
+
+        self._update_cache(surface.get_size())
+        if area is None:
+            surface.blit(self._cache_surface, (0, 0))
+        else:
+            surface.blit(self._cache_surface, area, area)
+
+    # Draws what the elements recorded. The surface of a cached layer is drawn again only if the recording changed,
+    # then blitted. Returns the number of draw calls made
+    def replay(self, surface, draw_list: DrawList, changed: bool) -> int:
+        if not self._cached:
+            return draw_list.replay(surface)
+
+        size = surface.get_size()
+        draw_calls = 1
+        if self._cache_surface is None or self._cache_surface.get_size() != size:
+            self._cache_surface = new_surface(size, pygame.SRCALPHA)
+            changed = True
+        if changed:
+            self._cache_surface.fill((0, 0, 0, 0))
+            draw_calls += 1 + draw_list.replay(self._cache_surface)
+        surface.blit(self._cache_surface, (0, 0))
+        self._cache_outdated = False
+        return draw_calls
+
+
+# Owns elements, which are updated and drawn through it in the same order as the elements of a layer.
+# Its rectangles are the unions of the rectangles of its elements: the elements aren't updated while the mouse is
+# outside the bounding rectangle, and only the elements inside the clip rectangle of the surface are drawn.
+# A hidden container is neither updated nor drawn, a disabled one is drawn but not updated
+class Container(UIElement):
+    # More changed areas than this are redrawn as the whole container
+    MAX_DIRTY_RECTANGLES = 64
+
+    def __init__(self, elements: list[UIElement] = (), visible: bool = True, enabled: bool = True):
+        super().__init__()
+        self.elements: list[UIElement] = []
+        self._visible = visible
+        self._enabled = enabled
+
+        # Rectangles of the elements, updated when they change
+        self._bounding_rectangles: dict[UIElement, Union[Rectangle, None]] = {}
+        self._visual_rectangles: dict[UIElement, Union[Rectangle, None]] = {}
+        self._bounding_rectangle = None
+        self._visual_rectangle = None
+        self._bounding_rectangle_outdated = True
+        self._visual_rectangle_outdated = True
+
+        # Areas of the elements that changed since the last take_dirty_rectangles, None if the whole container did
+        self._dirty_rectangles: Union[list[Rectangle], None] = []
+        self._elements_to_revisit: list[UIElement] = []
+
+        for element in elements:
+            self.add_element(element)
+
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    @visible.setter
+    def visible(self, visible: bool):
+        if visible != self._visible:
+            self._visible = visible
+            self._dirty_rectangles = None
+            self.invalidate()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self._enabled = enabled
+
+    def add_element(self, element: UIElement):
+        self.insert_element(len(self.elements), element)
+
+    def insert_element(self, index_of_element: int, element: UIElement):
+        self.elements.insert(index_of_element, element)
+        element.add_geometry_listener(self._on_element_geometry_changed)
+        element.add_redraw_listener(self._on_element_invalidated)
+        self._bounding_rectangles[element] = element.bounding_rectangle
+        self._visual_rectangles[element] = self._element_visual_rectangle(element)
+        self._elements_changed()
+
+    def remove_element(self, element: UIElement):
+        self.elements.remove(element)
+        element.remove_geometry_listener(self._on_element_geometry_changed)
+        element.remove_redraw_listener(self._on_element_invalidated)
+        del self._bounding_rectangles[element]
+        del self._visual_rectangles[element]
+        if element in self._elements_to_revisit:
+            self._elements_to_revisit.remove(element)
+        self._elements_changed()
+
+    def _elements_changed(self):
+        self._bounding_rectangle_outdated = True
+        self._visual_rectangle_outdated = True
+        self._dirty_rectangles = None
+        self._geometry_changed()
+
+    @staticmethod
+    def _element_visual_rectangle(element: UIElement) -> Union[Rectangle, None]:
+        rectangle = element.visual_rectangle
+        # Covers the rounding of float geometry
+        return None if rectangle is None else rectangle.inflate(2, 2)
+
+    # An empty container covers no area, an unbounded element makes the container unbounded too
+    @staticmethod
+    def _union(rectangles) -> Union[Rectangle, None]:
+        union = None
+        for rectangle in rectangles:
+            if rectangle is None:
+                return None
+            union = Rectangle(rectangle) if union is None else union.union(rectangle)
+        return Rectangle(0, 0, 0, 0) if union is None else union
+
+    @property
+    def bounding_rectangle(self) -> Union[Rectangle, None]:
+        if self._bounding_rectangle_outdated:
+            self._bounding_rectangle = self._union(self._bounding_rectangles.values())
+            self._bounding_rectangle_outdated = False
+        return self._bounding_rectangle
+
+    @property
+    def visual_rectangle(self) -> Union[Rectangle, None]:
+        if self._visual_rectangle_outdated:
+            self._visual_rectangle = self._union(self._visual_rectangles.values())
+            self._visual_rectangle_outdated = False
+        return self._visual_rectangle
+
+    @staticmethod
+    def _strictly_inside(rectangle: Union[Rectangle, None], union: Union[Rectangle, None]) -> bool:
+        return (rectangle is not None and union is not None and
+                union.left < rectangle.left and rectangle.right < union.right and
+                union.top < rectangle.top and rectangle.bottom < union.bottom)
+
+    # The union only changes if the element was, or now is, on its border
+    def _on_element_geometry_changed(self, element: UIElement):
+        old_rectangle = self._bounding_rectangles[element]
+        new_rectangle = element.bounding_rectangle
+        self._bounding_rectangles[element] = new_rectangle
+        if self._bounding_rectangle_outdated:
+            return
+        union = self._bounding_rectangle
+        if self._strictly_inside(old_rectangle, union) and self._strictly_inside(new_rectangle, union):
+            return
+        self._bounding_rectangle_outdated = True
+        for listener in self._geometry_listeners:
+            listener(self)
+
+    def _on_element_invalidated(self, element: UIElement):
+        old_rectangle = self._visual_rectangles[element]
+        new_rectangle = self._element_visual_rectangle(element)
+        self._visual_rectangles[element] = new_rectangle
+        self._visual_rectangle_outdated = True
+
+        # A nested container reports the areas of its own elements that changed
+        element_dirty_rectangles = element.take_dirty_rectangles() if isinstance(element, Container) else None
+        if self._dirty_rectangles is not None:
+            if element_dirty_rectangles is None:
+                element_dirty_rectangles = [old_rectangle, new_rectangle]
+            if (any(rectangle is None for rectangle in element_dirty_rectangles) or
+                    len(self._dirty_rectangles) + len(element_dirty_rectangles) > self.MAX_DIRTY_RECTANGLES):
+                self._dirty_rectangles = None
+            else:
+                self._dirty_rectangles.extend(element_dirty_rectangles)
+        self.invalidate()
+
+    # Returns the areas that changed since the last call, or None if the whole container has to be redrawn
+    def take_dirty_rectangles(self) -> Union[list[Rectangle], None]:
+        dirty_rectangles = self._dirty_rectangles
+        self._dirty_rectangles = []
+        return dirty_rectangles
+
+    # Called once the whole container was drawn
+    def clear_dirty_rectangles(self):
+        self._dirty_rectangles = []
+        for element in self.elements:
+            if isinstance(element, Container):
+                element.clear_dirty_rectangles()
+
+    def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
+        self._collides_with_mouse = False
+        self._active = False
+
+        # The elements that were hovered or active are updated once more, so they can reset their state
+        if not (self._visible and self._enabled):
+            for element in self._elements_to_revisit:
+                element.on_update(True, mouse_position, mouse_key, delta_time_seconds)
+            self._elements_to_revisit = []
+            return
+
+        bounding_rectangle = self.bounding_rectangle
+        if bounding_rectangle is None or point_vs_rect(mouse_position, bounding_rectangle):
+            elements = self.elements
+        elif self._elements_to_revisit:
+            elements = self._elements_to_revisit
+        else:
+            return
+
+        mouse_is_taken = mouse_already_collides_with_another_element
+        for element in elements:
+            element.on_update(mouse_is_taken, mouse_position, mouse_key, delta_time_seconds)
+            if element.collides_with_mouse:
+                self._collides_with_mouse = True
+                mouse_is_taken = True
+            if element.active:
+                self._active = True
+                mouse_is_taken = True
+        self._elements_to_revisit = [element for element in elements if element.collides_with_mouse or element.active]
+
+    def on_mouse_wheel(self, mouse_position: Vector2, scroll: Vector2) -> bool:
+        if not (self._visible and self._enabled):
+            return False
+        bounding_rectangle = self.bounding_rectangle
+        if bounding_rectangle is not None and not point_vs_rect(mouse_position, bounding_rectangle):
+            return False
+        for element in self.elements:
+            if element.on_mouse_wheel(mouse_position, scroll):
+                return True
+        return False
+
+    def draw(self, surface):
+        if not self._visible:
+            return
+        clip = surface.get_clip()
+        visual_rectangle = self.visual_rectangle
+        if visual_rectangle is not None and not visual_rectangle.colliderect(clip):
+            return
+        visual_rectangles = self._visual_rectangles
+        for element in self.elements:
+            rectangle = visual_rectangles[element]
+            if rectangle is None or rectangle.colliderect(clip):
+                element.draw(surface)
+
+
+class SpatialHash:
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            warnings.warn("WARNING: cell_size is incorrect")
+        self.cell_size = max(1, cell_size)
+        self._cells: dict[tuple[int, int], list[UIElement]] = {}
+        self._cells_of_element: dict[UIElement, list[tuple[int, int]]] = {}
+
+    def cell_of_point(self, point: Union[Vector2, list[float]]) -> tuple[int, int]:
+        return math.floor(point[0] / self.cell_size), math.floor(point[1] / self.cell_size)
+
+    def cells_of_rectangle(self, rectangle: Rectangle) -> list[tuple[int, int]]:
+        # point_vs_rect includes the right and bottom edges, so do the cells
+        x_min, y_min = self.cell_of_point((rectangle[0], rectangle[1]))
+        x_max, y_max = self.cell_of_point((rectangle[0] + rectangle[2], rectangle[1] + rectangle[3]))
+        return [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+    def __contains__(self, element: UIElement) -> bool:
+        return element in self._cells_of_element
+
+    def __len__(self) -> int:
+        return len(self._cells_of_element)
+
+    def insert(self, element: UIElement, rectangle: Rectangle):
+        cells = self.cells_of_rectangle(rectangle)
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(element)
+        self._cells_of_element[element] = cells
+
+    def remove(self, element: UIElement):
+        for cell in self._cells_of_element.pop(element, []):
+            elements_in_cell = self._cells[cell]
+            elements_in_cell.remove(element)
+            if not elements_in_cell:
+                del self._cells[cell]
+
+    def move(self, element: UIElement, rectangle: Rectangle):
+        if self._cells_of_element.get(element) == self.cells_of_rectangle(rectangle):
+            return
+        self.remove(element)
+        self.insert(element, rectangle)
+
+    def clear(self):
+        self._cells.clear()
+        self._cells_of_element.clear()
+
+    def query_point(self, point: Union[Vector2, list[float]]) -> list[UIElement]:
+        return self._cells.get(self.cell_of_point(point), [])
+
+
+# Positions, sizes and outlines of UIBoxElements in contiguous arrays, one row per element.
+# An attached element reads and writes its geometry through its row
+class GeometryStore:
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        if numpy is None:
+            raise ImportError("GeometryStore requires numpy")
+        capacity = max(1, capacity)
+        self.positions = numpy.zeros((capacity, 2))
+        self.sizes = numpy.zeros((capacity, 2))
+        self.outlines = numpy.zeros(capacity)
+        self._elements: list[UIElement] = []
+        # Changes whenever elements are moved without being notified
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.outlines)
+
+    @property
+    def elements(self) -> list[UIElement]:
+        return self._elements
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name in ("positions", "sizes", "outlines"):
+            array = getattr(self, name)
+            grown_array = numpy.zeros((capacity,) + array.shape[1:])
+            grown_array[:len(array)] = array
+            setattr(self, name, grown_array)
+
+    def attach(self, element: UIElement) -> int:
+        if len(self._elements) == self.capacity:
+            self._grow()
+        row = len(self._elements)
+        self.positions[row] = element.position
+        self.sizes[row] = element.size
+        self.outlines[row] = element.style.outline
+        self._elements.append(element)
+        element._attach_to_geometry_store(self, row)
+        return row
+
+    def detach_all(self):
+        for element in self._elements:
+            element._detach_from_geometry_store()
+        self._elements.clear()
+
+    def position(self, row: int) -> Vector2:
+        x, y = self.positions[row]
+        return Vector2(x, y)
+
+    def size(self, row: int) -> Vector2:
+        x, y = self.sizes[row]
+        return Vector2(x, y)
+
+    # Rows whose rectangle with outline contains the point.
+    # Inflated by a pixel to cover the rounding of pygame.Rect in the per-element test
+    def rows_containing_point(self, point: Union[Vector2, list[float]]):
+        n = len(self._elements)
+        half_sizes = self.sizes[:n] / 2 + self.outlines[:n, None] + 1
+        distances = numpy.abs(self.positions[:n] - (point[0], point[1]))
+        return numpy.flatnonzero((distances <= half_sizes).all(axis=1))
+
+    def elements_containing_point(self, point: Union[Vector2, list[float]]) -> list[UIElement]:
+        return [self._elements[row] for row in self.rows_containing_point(point)]
+
+    # Moves all the elements with a single array operation, geometry listeners are NOT notified.
+    # The UIContext that owns the store redraws everything on its next draw_elements call instead
+    def translate(self, elements: list[UIElement], offset: Union[Vector2, list[float]]):
+        rows = numpy.fromiter((element._geometry_row for element in elements), dtype=numpy.intp, count=len(elements))
+        self.positions[rows] += (offset[0], offset[1])
+        self.version += 1
+
+    def translate_all(self, offset: Union[Vector2, list[float]]):
+        self.positions[:len(self._elements)] += (offset[0], offset[1])
+        self.version += 1
+
+
+class ProfileCounter:
+    def __init__(self, name: str, category: str):
+        self.name = name
+        self.category = category
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.font_render_calls = 0
+        self.surface_allocations = 0
+
+    def add(self, seconds: float, font_render_calls: int, surface_allocations: int):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.font_render_calls += font_render_calls
+        self.surface_allocations += surface_allocations
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "category": self.category, "calls": self.calls,
+                "total_ms": self.total_seconds * 1000, "max_ms": self.max_seconds * 1000,
+                "font_render_calls": self.font_render_calls, "surface_allocations": self.surface_allocations}
+
+
+# Times on_update and draw of every element and layer of a UIContext, or only of the layers if not per_element.
+# Counters are aggregated over the whole run, the trace events are kept for the last trace_frames frames
+class UIProfiler:
+    def __init__(self, trace_frames: int = 120, per_element: bool = True):
+        self.per_element = per_element
+        self.counters: dict[tuple[str, str], ProfileCounter] = {}
+        self._trace_frames = collections.deque(maxlen=max(1, trace_frames))
+        self._frame_events = []
+        self._frame_start = None
+        self._layer = None
+        self.frames = 0
+
+    @staticmethod
+    def element_name(element: UIElement) -> str:
+        return f"{type(element).__name__}@{id(element):x}"
+
+    def _record(self, name: str, category: str, start: float, end: float, font_render_calls: int, surface_allocations: int):
+        key = (name, category)
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = ProfileCounter(name, category)
+        counter.add(end - start, font_render_calls, surface_allocations)
+
+        if self._frame_start is None:
+            self._frame_start = start
+        self._frame_events.append({"name": name, "cat": category, "ph": "X", "pid": 0, "tid": 0,
+                                   "ts": start * 1_000_000, "dur": (end - start) * 1_000_000,
+                                   "args": {"font_render_calls": font_render_calls, "surface_allocations": surface_allocations}})
+
+    def measure(self, name: str, category: str, function, *args):
+        font_render_calls = RenderStatistics.font_render_calls
+        surface_allocations = RenderStatistics.surface_allocations
+        start = time.perf_counter()
+        result = function(*args)
+        end = time.perf_counter()
+        self._record(name, category, start, end,
+                     RenderStatistics.font_render_calls - font_render_calls,
+                     RenderStatistics.surface_allocations - surface_allocations)
+        return result
+
+    def measure_element(self, element: UIElement, category: str, function, *args):
+        if not self.per_element:
+            return function(*args)
+        return self.measure(self.element_name(element), category, function, *args)
+
+    def begin_layer(self, index_of_layer: int, category: str):
+        if self._layer is not None and self._layer[:2] == (index_of_layer, category):
+            return
+        self.end_layer()
+        self._layer = (index_of_layer, category, time.perf_counter(),
+                       RenderStatistics.font_render_calls, RenderStatistics.surface_allocations)
+
+    def end_layer(self):
+        if self._layer is None:
+            return
+        index_of_layer, category, start, font_render_calls, surface_allocations = self._layer
+        self._layer = None
+        self._record(f"layer {index_of_layer}", category, start, time.perf_counter(),
+                     RenderStatistics.font_render_calls - font_render_calls,
+                     RenderStatistics.surface_allocations - surface_allocations)
+
+    def end_frame(self):
+        self.end_layer()
+        end = time.perf_counter()
+        start = self._frame_start if self._frame_start is not None else end
+        self._frame_events.append({"name": f"frame {self.frames}", "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                                   "ts": start * 1_000_000, "dur": (end - start) * 1_000_000})
+        self._trace_frames.append(self._frame_events)
+        self._frame_events = []
+        self._frame_start = None
+        self.frames += 1
+
+    def reset(self):
+        self.counters.clear()
+        self._trace_frames.clear()
+        self._frame_events = []
+        self._frame_start = None
+        self._layer = None
+
+    # The slowest counters first
+    def report(self, category: Union[str, None] = None) -> list[ProfileCounter]:
+        counters = [counter for counter in self.counters.values() if category is None or counter.category == category]
+        return sorted(counters, key=lambda counter: counter.total_seconds, reverse=True)
+
+    # Can be opened in chrome://tracing or ui.perfetto.dev
+    def chrome_trace(self) -> dict:
+        events = [event for frame_events in self._trace_frames for event in frame_events]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"counters": [counter.as_dict() for counter in self.report()]}}
+
+    def export_chrome_trace(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
 
 
 class UIContext:
-    def __init__(self, number_of_layers: int):
+    def __init__(self, number_of_layers: int, spatial_hash_cell_size: Union[float, None] = None,
+                 use_geometry_store: bool = False, retained_mode: bool = False, draw_list_mode: bool = False):
         if number_of_layers < 1 or type(number_of_layers) != int:
             warnings.warn("WARNING: number_of_layers is incorrect")
         self.layers: list[UILayer()] = [UILayer() for _ in range(max(1, int(number_of_layers)))]
+        for layer in self.layers:
+            layer.add_change_listener(self._on_layer_changed)
+
+        # In the retained mode the surface is not cleared by the caller,
+        # only the parts of it that changed are cleared with the background and redrawn
+        self._retained_mode = retained_mode
+        self.background: Union[Pixel, pygame.Surface, None] = Color.BLACK
+        self._redraw_all = True
+        self._drawn_surface = None
+        self._drawn_rectangles: dict[UIElement, Rectangle] = {}
+        self._invalidated_elements: set[UIElement] = set()
+
+        if retained_mode and draw_list_mode:
+            warnings.warn("WARNING: the draw list is not used together with the retained mode")
+            draw_list_mode = False
+
+        # In the draw list mode the elements record what they draw, and the layers are drawn from the recordings
+        # at the end of the frame. As in the retained mode the surface is not cleared by the caller:
+        # nothing is drawn if no layer recorded anything different from the previous frame,
+        # and a cached layer is drawn again into its surface only if its own recording changed
+        self._draw_list_mode = draw_list_mode
+        self._draw_lists = [DrawList() for _ in self.layers]
+        self._previous_draw_lists = [DrawList() for _ in self.layers]
+        self._draw_statistics = {"commands": 0, "draw_calls": 0, "layers_replayed": 0}
+
+        # Checked once per element, costs nothing else while profiling is disabled
+        self.profiler: Union[UIProfiler, None] = None
+        self._layer_index_of_element: Union[dict[UIElement, int], None] = None
+
+        if use_geometry_store and spatial_hash_cell_size is not None:
+            warnings.warn("WARNING: the spatial hash is not used together with the geometry store")
+            spatial_hash_cell_size = None
+
+        # Without the spatial hash or the geometry store every element is updated every frame
+        self._spatial_hash = None if spatial_hash_cell_size is None else SpatialHash(spatial_hash_cell_size)
+        self._geometry_store = GeometryStore() if use_geometry_store else None
+        self._drawn_geometry_store_version = None
+        self._spatial_hash_outdated = True
+        self._element_order: dict[UIElement, tuple[int, int]] = {}
+        self._unbounded_elements: list[UIElement] = []
+        self._elements_to_revisit: list[UIElement] = []
+
+        # Created when it is first used, advanced by update_state
+        self._animator = None
+        self._has_active_element = False
+
+        # Root layouts laid out by this UIContext that have something to lay out
+        self._dirty_layouts: list[Layout] = []
+
+        # Called with the wall-clock time between the ends of two draw_elements calls, once per frame
+        self._frame_listeners = []
+        self._frame_end = None
+
+    @property
+    def animator(self) -> "Animator":
+        if self._animator is None:
+            self._animator = Animator()
+        return self._animator
+
+    @property
+    def is_animating(self) -> bool:
+        return self._animator is not None and len(self._animator) > 0
+
+    # An element was active in the last update_state, like a slider being dragged
+    @property
+    def has_active_element(self) -> bool:
+        return self._has_active_element
+
+    @property
+    def spatial_hash(self) -> Union[SpatialHash, None]:
+        return self._spatial_hash
+
+    @property
+    def geometry_store(self) -> Union[GeometryStore, None]:
+        if self._geometry_store is not None and self._spatial_hash_outdated:
+            self.rebuild_spatial_hash()
+        return self._geometry_store
 
     def insert_front_element(self, index_of_layer: int, element: UIElement):
-        self.layers[index_of_layer].insert(0, element)
+        self.layers[index_of_layer].insert_element(0, element)
 
     def insert_element(self, index_of_layer: int, index_of_element: int, element: UIElement):
-        self.layers[index_of_layer].insert(index_of_element, element)
+        self.layers[index_of_layer].insert_element(index_of_element, element)
 
     def append_element(self, index_of_layer: int, element: UIElement):
-        self.layers[index_of_layer].append(element)
+        self.layers[index_of_layer].add_element(element)
 
     def layer(self, index_of_layer: int):
         return self.layers[index_of_layer]
@@ -255,24 +1629,485 @@ class UIContext:
     def back_layer(self) -> UILayer:
         return self.layers[len(self.layers) - 1]
 
+    # The layout is laid out by this UIContext only, not by Layout.update_layouts
+    def add_layout(self, layout: "Layout"):
+        if layout.parent is not None:
+            warnings.warn("WARNING: only a layout without a parent can be added to a UIContext")
+            return
+        layout._set_dirty_roots(self._dirty_layouts)
+
+    def remove_layout(self, layout: "Layout"):
+        if layout._dirty_roots is self._dirty_layouts:
+            layout._set_dirty_roots(None)
+
+    # Lays out the layouts added to this UIContext and the root layouts that weren't added to any
+    def update_layouts(self):
+        Layout._update_roots(self._dirty_layouts)
+        Layout.update_layouts()
+
+    @property
+    def retained_mode(self) -> bool:
+        return self._retained_mode
+
+    @property
+    def draw_list_mode(self) -> bool:
+        return self._draw_list_mode
+
+    # Of the last frame drawn in the draw list mode: the commands recorded, the draw calls made to draw them,
+    # a Surface.blits call counts as one, and the layers that were drawn again
+    def draw_statistics(self) -> dict:
+        return dict(self._draw_statistics)
+
+    def _on_layer_changed(self, layer: UILayer):
+        self._spatial_hash_outdated = True
+        self._redraw_all = True
+        self._layer_index_of_element = None
+
+    def enable_profiling(self, trace_frames: int = 120, per_element: bool = True) -> UIProfiler:
+        self.profiler = UIProfiler(trace_frames, per_element)
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = None
+
+    def add_frame_listener(self, listener):
+        self._frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener):
+        if listener in self._frame_listeners:
+            self._frame_listeners.remove(listener)
+
+    # The time until now is not part of the next frame, like the time spent waiting for events
+    def start_frame(self):
+        self._frame_end = time.perf_counter()
+
+    def layer_index_of(self, element: UIElement) -> int:
+        if self._layer_index_of_element is None:
+            self._layer_index_of_element = {element: index_of_layer
+                                            for index_of_layer, layer in enumerate(self.layers)
+                                            for element in layer.elements}
+        return self._layer_index_of_element[element]
+
+    def _on_element_invalidated(self, element: UIElement):
+        self._invalidated_elements.add(element)
+
+    # The whole surface is redrawn by the next draw_elements call
+    def invalidate(self):
+        self._redraw_all = True
+
+    # The next draw_elements call has something to draw differently: a reference with notifications to send,
+    # a layout to lay out, elements moved by the geometry store, a redraw requested by invalidate or, in the retained
+    # mode, an invalidated element. Elements invalidated in the other modes aren't tracked
+    @property
+    def has_pending_changes(self) -> bool:
+        return bool(Reference._changed or self._redraw_all or self._invalidated_elements
+                    or self._dirty_layouts or Layout._dirty_roots
+                    or (self._geometry_store is not None and self._geometry_store.version != self._drawn_geometry_store_version))
+
+    def _on_element_geometry_changed(self, element: UIElement):
+        if self._spatial_hash_outdated or self._spatial_hash is None:
+            return
+        rectangle = element.bounding_rectangle
+        if rectangle is None or element not in self._spatial_hash:
+            self._spatial_hash_outdated = True
+        else:
+            self._spatial_hash.move(element, rectangle)
+
+    # Also reattaches the elements to the geometry store, if it is used instead of the spatial hash
+    def rebuild_spatial_hash(self):
+        for element in self._element_order:
+            element.remove_geometry_listener(self._on_element_geometry_changed)
+        if self._spatial_hash is not None:
+            self._spatial_hash.clear()
+        if self._geometry_store is not None:
+            self._geometry_store.detach_all()
+        self._element_order.clear()
+        self._unbounded_elements.clear()
+
+        for index_of_layer, layer in enumerate(self.layers):
+            for index_of_element, element in enumerate(layer.elements):
+                self._element_order[element] = (index_of_layer, index_of_element)
+                if self._geometry_store is not None:
+                    if getattr(element, "GEOMETRY_STORE_COMPATIBLE", False):
+                        self._geometry_store.attach(element)
+                    else:
+                        self._unbounded_elements.append(element)
+                    continue
+
+                element.add_geometry_listener(self._on_element_geometry_changed)
+                rectangle = element.bounding_rectangle
+                if rectangle is None:
+                    self._unbounded_elements.append(element)
+                else:
+                    self._spatial_hash.insert(element, rectangle)
+
+        self._elements_to_revisit = [element for element in self._elements_to_revisit if element in self._element_order]
+        self._spatial_hash_outdated = False
+
+    # Elements are returned front to back, the same order as without the spatial hash
+    def elements_to_update(self, mouse_position: Vector2) -> list[UIElement]:
+        if self._spatial_hash is None and self._geometry_store is None:
+            return [element for layer in self.layers for element in layer.elements]
+
+        if self._spatial_hash_outdated:
+            self.rebuild_spatial_hash()
+
+        # Elements that were hovered or active on the previous frame are updated once more, so they can reset their state
+        if self._geometry_store is not None:
+            elements = set(self._geometry_store.elements_containing_point(mouse_position))
+        else:
+            elements = set(self._spatial_hash.query_point(mouse_position))
+        elements.update(self._unbounded_elements)
+        elements.update(self._elements_to_revisit)
+        return sorted(elements, key=self._element_order.__getitem__)
+
     def update_state(self, mouse_position: Union[tuple, Vector2], mouse_keys: list[Key], delta_time_seconds: float):
+        if self._animator is not None:
+            self._animator.update(delta_time_seconds)
+        self.update_layouts()
         mouse_position_vector2 = Vector2(mouse_position[0], mouse_position[1])
         mouse_collides_with_another_element = False
         mouse_controls_another_element = False
         mouse_left_key = mouse_keys[Mouse.LEFT]
-        for layer in self.layers:
-            for element in layer.elements:
+        elements = self.elements_to_update(mouse_position_vector2)
+        profiler = self.profiler
+        for element in elements:
+            if profiler is None:
                 element.on_update(mouse_collides_with_another_element or mouse_controls_another_element, mouse_position_vector2, mouse_left_key, delta_time_seconds)
-                if element.collides_with_mouse:
-                    mouse_collides_with_another_element = True
-                if element.active:
-                    mouse_controls_another_element = True
+            else:
+                profiler.begin_layer(self.layer_index_of(element), "update")
+                profiler.measure_element(element, "update", element.on_update,
+                                         mouse_collides_with_another_element or mouse_controls_another_element, mouse_position_vector2, mouse_left_key, delta_time_seconds)
+            if element.collides_with_mouse:
+                mouse_collides_with_another_element = True
+            if element.active:
+                mouse_controls_another_element = True
+        if profiler is not None:
+            profiler.end_layer()
+        self._has_active_element = mouse_controls_another_element
+
+        if self._spatial_hash is not None or self._geometry_store is not None:
+            self._elements_to_revisit = [element for element in elements if element.collides_with_mouse or element.active]
+
+    def mouse_wheel(self, mouse_position: Union[tuple, Vector2], scroll: Union[tuple, Vector2]):
+        mouse_position_vector2 = Vector2(mouse_position[0], mouse_position[1])
+        scroll_vector2 = Vector2(scroll[0], scroll[1])
+        for element in self.elements_to_update(mouse_position_vector2):
+            if element.on_mouse_wheel(mouse_position_vector2, scroll_vector2):
+                return
+
+    # Returns the list of rectangles of the surface that were redrawn
+    def draw_elements(self, surface) -> list[Rectangle]:
+        # Bindings run before drawing, so the elements they change are drawn in the same frame
+        Reference.flush_notifications()
+        self.update_layouts()
+        # The geometry store moves its elements without notifying them, so what was drawn of them is outdated
+        geometry_store = self._geometry_store
+        if geometry_store is not None and geometry_store.version != self._drawn_geometry_store_version:
+            self._drawn_geometry_store_version = geometry_store.version
+            self.invalidate()
+            for layer in self.layers:
+                layer.invalidate()
+        redrawn_rectangles = self._draw_elements(surface)
+        if self.profiler is not None:
+            self.profiler.end_frame()
+
+        frame_end = time.perf_counter()
+        if self._frame_end is not None:
+            for listener in self._frame_listeners:
+                listener(frame_end - self._frame_end)
+        self._frame_end = frame_end
+        return redrawn_rectangles
+
+    def _draw_elements(self, surface) -> list[Rectangle]:
+        if self._draw_list_mode:
+            return self._draw_recorded(surface)
+        if not self._retained_mode:
+            for i in range(len(self.layers) - 1, -1, -1):
+                self._draw_layer(i, surface)
+            self._redraw_all = False
+            return [surface.get_rect()]
+
+        if surface is not self._drawn_surface:
+            self._redraw_all = True
+
+        dirty_rectangles = [] if self._redraw_all else self._dirty_rectangles(surface)
+        if dirty_rectangles is None or self._redraw_all:
+            return self._redraw_surface(surface)
+
+        for dirty_rectangle in dirty_rectangles:
+            self._redraw_rectangle(surface, dirty_rectangle)
+        return dirty_rectangles
+
+    # A cached layer is timed as a whole
+    def _draw_layer(self, index_of_layer: int, surface, area: Union[Rectangle, None] = None):
+        layer = self.layers[index_of_layer]
+        profiler = self.profiler
+        if profiler is None:
+            layer.draw(surface, area)
+            return
+
+        profiler.begin_layer(index_of_layer, "draw")
+        if layer.cached:
+            profiler.measure(f"layer {index_of_layer} cache", "draw", layer.draw, surface, area)
+        else:
+            for element in layer.elements:
+                profiler.measure_element(element, "draw", element.draw, surface)
+        profiler.end_layer()
+
+    # The draw lists of the previous frame are reused for this one
+    def _record_layer(self, index_of_layer: int, size: tuple[int, int]) -> bool:
+        draw_list = self._previous_draw_lists[index_of_layer]
+        previous_draw_list = self._draw_lists[index_of_layer]
+        self._draw_lists[index_of_layer] = draw_list
+        self._previous_draw_lists[index_of_layer] = previous_draw_list
+
+        draw_list.clear(size)
+        if self.profiler is not None:
+            self.profiler.begin_layer(index_of_layer, "draw")
+        for element in self.layers[index_of_layer].elements:
+            self._draw_element(element, draw_list)
+        if self.profiler is not None:
+            self.profiler.end_layer()
+        return not draw_list.same_commands(previous_draw_list)
+
+    def _draw_recorded(self, surface) -> list[Rectangle]:
+        size = surface.get_size()
+        changed_layers = [self._record_layer(i, size) for i in range(len(self.layers))]
+        commands = sum(len(draw_list) for draw_list in self._draw_lists)
+
+        if surface is self._drawn_surface and not self._redraw_all and not any(changed_layers):
+            self._draw_statistics = {"commands": commands, "draw_calls": 0, "layers_replayed": 0}
+            return []
+
+        draw_calls = 0
+        layers_replayed = 0
+        if self.background is not None:
+            self._clear(surface, surface.get_rect())
+            draw_calls += 1
+        for i in range(len(self.layers) - 1, -1, -1):
+            layer = self.layers[i]
+            if self.profiler is None:
+                draw_calls += layer.replay(surface, self._draw_lists[i], changed_layers[i])
+            else:
+                draw_calls += self.profiler.measure(f"layer {i} replay", "draw", layer.replay,
+                                                    surface, self._draw_lists[i], changed_layers[i])
+            if changed_layers[i] or not layer.cached:
+                layers_replayed += 1
+
+        self._draw_statistics = {"commands": commands, "draw_calls": draw_calls, "layers_replayed": layers_replayed}
+        self._drawn_surface = surface
+        self._redraw_all = False
+        return [surface.get_rect()]
+
+    def _draw_element(self, element: UIElement, surface):
+        if self.profiler is None:
+            element.draw(surface)
+        else:
+            self.profiler.measure_element(element, "draw", element.draw, surface)
+
+    def _element_visual_rectangle(self, element: UIElement, surface) -> Rectangle:
+        rectangle = element.visual_rectangle
+        if rectangle is None:
+            return surface.get_rect()
+        # Covers the rounding of float geometry
+        return rectangle.inflate(2, 2)
+
+    def _clear(self, surface, rectangle: Rectangle):
+        if self.background is None:
+            return
+        if isinstance(self.background, pygame.Surface):
+            surface.blit(self.background, rectangle, rectangle)
+        else:
+            surface.fill(self.background, rectangle)
+
+    def _redraw_surface(self, surface) -> list[Rectangle]:
+        for element in self._drawn_rectangles:
+            element.remove_redraw_listener(self._on_element_invalidated)
+        self._drawn_rectangles.clear()
+        self._invalidated_elements.clear()
 
-    def draw_elements(self, surface):
+        self._clear(surface, surface.get_rect())
         for i in range(len(self.layers) - 1, -1, -1):
             layer = self.layers[i]
             for element in layer.elements:
-                element.draw(surface)
+                element.add_redraw_listener(self._on_element_invalidated)
+                self._drawn_rectangles[element] = self._element_visual_rectangle(element, surface)
+                if isinstance(element, Container):
+                    element.clear_dirty_rectangles()
+            self._draw_layer(i, surface)
+
+        self._drawn_surface = surface
+        self._redraw_all = False
+        return [surface.get_rect()]
+
+    # Returns None if the whole surface has to be redrawn
+    def _dirty_rectangles(self, surface) -> Union[list[Rectangle], None]:
+        surface_rectangle = surface.get_rect()
+        dirty_rectangles = []
+        for element in self._invalidated_elements:
+            new_rectangle = self._element_visual_rectangle(element, surface)
+            if new_rectangle == surface_rectangle:
+                return None
+            # A container reports the areas of its elements that changed, instead of its whole area
+            element_dirty_rectangles = element.take_dirty_rectangles() if isinstance(element, Container) else None
+            if element_dirty_rectangles is None:
+                dirty_rectangles.append(self._drawn_rectangles[element])
+                dirty_rectangles.append(new_rectangle)
+            else:
+                dirty_rectangles.extend(element_dirty_rectangles)
+            self._drawn_rectangles[element] = new_rectangle
+        self._invalidated_elements.clear()
+
+        # Overlapping rectangles are merged, so no element is drawn twice over the same area
+        merged_rectangles = []
+        for rectangle in dirty_rectangles:
+            rectangle = rectangle.clip(surface_rectangle)
+            if rectangle.width == 0 or rectangle.height == 0:
+                continue
+            index = rectangle.collidelist(merged_rectangles)
+            while index != -1:
+                rectangle.union_ip(merged_rectangles.pop(index))
+                index = rectangle.collidelist(merged_rectangles)
+            merged_rectangles.append(rectangle)
+        return merged_rectangles
+
+    def _redraw_rectangle(self, surface, dirty_rectangle: Rectangle):
+        previous_clip = surface.get_clip()
+        surface.set_clip(dirty_rectangle)
+        self._clear(surface, dirty_rectangle)
+        for i in range(len(self.layers) - 1, -1, -1):
+            layer = self.layers[i]
+            if layer.cached:
+                self._draw_layer(i, surface, dirty_rectangle)
+                continue
+            if self.profiler is not None:
+                self.profiler.begin_layer(i, "draw")
+            for element in layer.elements:
+                if self._drawn_rectangles[element].colliderect(dirty_rectangle):
+                    self._draw_element(element, surface)
+            if self.profiler is not None:
+                self.profiler.end_layer()
+        surface.set_clip(previous_clip)
+
+
+# Feeds the UIContext every mouse transition from the event queue in order,
+# so presses shorter than a frame aren't lost and a dragged slider sees every motion
+class InputDispatcher:
+    def __init__(self, ui_context: UIContext, mouse: Union[EventMouse, None] = None):
+        self.ui_context = ui_context
+        self.mouse = mouse if mouse is not None else EventMouse()
+
+    def _update_ui_context(self, delta_time_seconds: float):
+        self.mouse.update_state()
+        self.ui_context.update_state(self.mouse.get_position(), self.mouse.get_pressed(), delta_time_seconds)
+
+    # Must be called once per frame with all the events of the frame, the UIContext is updated at least once
+    def dispatch(self, events: list[pygame.event.Event], delta_time_seconds: float):
+        for event in events:
+            if event.type == pygame.MOUSEWHEEL:
+                self.ui_context.mouse_wheel(self.mouse.get_position(), (event.x, event.y))
+            elif self.mouse.process_event(event):
+                self._update_ui_context(0)
+            # Moves without a held key only matter for hovering, the last one is handled below
+            elif event.type == pygame.MOUSEMOTION and self.mouse.any_key_held:
+                self._update_ui_context(0)
+
+        self._update_ui_context(delta_time_seconds)
+
+
+# Runs the frames of a UIContext at frames_per_second while something can change. After IDLE_FRAMES frames without
+# events, active elements or running animations, next_frame blocks in pygame.event.wait until an event arrives,
+# which brings back the full rate, or until idle_timeout_seconds pass, which runs a single frame for the elements
+# that change on their own. It doesn't wait while the UIContext has pending changes, like a reference that was set.
+# A change the UIContext doesn't see, like a Text changed outside of the retained mode or from another thread,
+# is drawn without waiting by calling wake
+class FrameDriver:
+    IDLE_FRAMES = 3
+    IDLE_TIMEOUT_SECONDS = 1.0
+    # Posted by wake, it isn't returned by next_frame
+    WAKE_EVENT = pygame.event.custom_type()
+
+    def __init__(self, ui_context: UIContext, frames_per_second: int = 70,
+                 input_dispatcher: Union[InputDispatcher, None] = None,
+                 idle_timeout_seconds: float = IDLE_TIMEOUT_SECONDS):
+        self.ui_context = ui_context
+        self.frames_per_second = frames_per_second
+        self.input_dispatcher = input_dispatcher if input_dispatcher is not None else InputDispatcher(ui_context)
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.clock = pygame.time.Clock()
+
+        self._events: list[pygame.event.Event] = []
+        self._delta_time_seconds = 0
+        self._quiet_frames = 0
+
+        self.frames = 0
+        self.idle_frames = 0
+        self.idle_seconds = 0
+        self._start_time = time.perf_counter()
+        self._start_process_time = time.process_time()
+
+    @property
+    def idle(self) -> bool:
+        return self._quiet_frames >= self.IDLE_FRAMES
+
+    @property
+    def delta_time_seconds(self) -> float:
+        return self._delta_time_seconds
+
+    # Ends the wait of an idle driver, so the next frame runs now. Can be called from any thread
+    def wake(self):
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(self.WAKE_EVENT))
+
+    # Returns the events of the frame. The events come from the display, which is initialised by the first call
+    # if it isn't already, importing ui doesn't initialise it
+    def next_frame(self) -> list[pygame.event.Event]:
+        if not pygame.display.get_init():
+            pygame.display.init()
+        if self.idle and not self.ui_context.has_pending_changes:
+            start = time.perf_counter()
+            event = pygame.event.wait(int(self.idle_timeout_seconds * 1000))
+            self.idle_seconds += time.perf_counter() - start
+            self._events = self._without_wake_events(([] if event.type == pygame.NOEVENT else [event]) + pygame.event.get())
+            self.idle_frames += 1
+            # The time spent waiting is not a frame
+            self.clock.tick()
+            self.ui_context.start_frame()
+            self._delta_time_seconds = 1 / self.frames_per_second
+        else:
+            self._delta_time_seconds = self.clock.tick(self.frames_per_second) / 1000
+            self._events = self._without_wake_events(pygame.event.get())
+        return self._events
+
+    def _without_wake_events(self, events: list[pygame.event.Event]) -> list[pygame.event.Event]:
+        return [event for event in events if event.type != self.WAKE_EVENT]
+
+    # Returns the rectangles of the surface that were redrawn
+    def update_and_draw(self, surface) -> list[Rectangle]:
+        self.input_dispatcher.dispatch(self._events, self._delta_time_seconds)
+        redrawn_rectangles = self.ui_context.draw_elements(surface)
+        self.frames += 1
+
+        if self._events or self.ui_context.has_active_element or self.ui_context.is_animating:
+            self._quiet_frames = 0
+        else:
+            self._quiet_frames += 1
+        return redrawn_rectangles
+
+    # The frames saved are the frames the full rate would have run while the driver was waiting
+    def statistics(self) -> dict:
+        wall_seconds = time.perf_counter() - self._start_time
+        process_seconds = time.process_time() - self._start_process_time
+        return {
+            "frames": self.frames,
+            "idle_frames": self.idle_frames,
+            "frames_saved": max(0, round(self.idle_seconds * self.frames_per_second) - self.idle_frames),
+            "idle_seconds": self.idle_seconds,
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": process_seconds,
+            "cpu_usage": process_seconds / wall_seconds if wall_seconds > 0 else 0,
+        }
 
 
 class UIBoxElementStyle:
@@ -285,89 +2120,247 @@ class UIBoxElementStyle:
         self.outline_color = outline_color
         self.antialiasing = antialiasing
 
+    # Equal for styles that draw the same, even if they are different objects or were modified in place
+    @property
+    def cache_key(self) -> tuple:
+        return (color_key(self.rectangle_color), color_key(self.content_color),
+                self.outline, color_key(self.outline_color), self.antialiasing)
+
 
 EMPTY_UI_BOX_ELEMENT_STYLE = UIBoxElementStyle(None, None, 0, None, False)
 
 
+def color_key(color: Union[Pixel, tuple, None]) -> Union[tuple, None]:
+    return None if color is None else tuple(color)
+
+
+# A property of UIBoxElement computed once from position, size and style.outline.
+# Every read returns a copy of the cached value, so it can be modified in place
+def cached_geometry_property(function):
+    name = function.__name__
+
+    def getter(self):
+        if not self.CACHE_GEOMETRY:
+            return function(self)
+        geometry_cache = self._valid_geometry_cache()
+        value = geometry_cache.get(name)
+        if value is None:
+            value = geometry_cache[name] = function(self)
+        return value.copy()
+
+    getter.__name__ = name
+    getter.__doc__ = function.__doc__
+    return property(getter)
+
+
 class UIBoxElement(UIElement, ABC):
+    GEOMETRY_STORE_COMPATIBLE = True
+    CACHE_GEOMETRY = True
+
     def __init__(self, position: Vector2, size: Vector2, style: UIBoxElementStyle):
         super().__init__()
 
-        self.position = Vector2(position[0], position[1])
+        self._geometry_store = None
+        self._geometry_row = None
+        self._style = None
+        self._geometry_cache = {}
+        self._geometry_cache_key = None
+
+        self.position = position
         self.size = size
         self.style = style
 
+    # Assign position, size and style instead of modifying them in place, so the UIContext can see the element move.
+    # Modified in place, the derived geometry still follows, but the UIContext doesn't redraw or rehash the element,
+    # and the copy returned while the element is attached to a geometry store isn't written back
+    @property
+    def position(self) -> Vector2:
+        if self._geometry_store is not None:
+            return self._geometry_store.position(self._geometry_row)
+        return self._position
+
+    @position.setter
+    def position(self, position: Union[Vector2, list[float]]):
+        self._position = Vector2(position[0], position[1])
+        if self._geometry_store is not None:
+            self._geometry_store.positions[self._geometry_row] = self._position
+        self._position_changed()
+
+    # Must be called once the position was written, by the setter or into the row of the geometry store
+    def _position_changed(self):
+        self._geometry_cache.clear()
+        self._geometry_changed()
+
+    @property
+    def size(self) -> Vector2:
+        if self._geometry_store is not None:
+            return self._geometry_store.size(self._geometry_row)
+        return self._size
+
+    @size.setter
+    def size(self, size: Union[Vector2, list[float]]):
+        self._size = Vector2(size[0], size[1])
+        if self._geometry_store is not None:
+            self._geometry_store.sizes[self._geometry_row] = self._size
+        self._geometry_cache.clear()
+        self._geometry_changed()
+
     @property
+    def style(self) -> UIBoxElementStyle:
+        return self._style
+
+    @style.setter
+    def style(self, style: UIBoxElementStyle):
+        previous_style = self._style
+        self._style = style
+        if self._geometry_store is not None:
+            self._geometry_store.outlines[self._geometry_row] = style.outline
+        if previous_style is None or previous_style.outline != style.outline:
+            self._geometry_changed()
+        elif previous_style is not style:
+            self.invalidate()
+
+    def _attach_to_geometry_store(self, geometry_store: GeometryStore, row: int):
+        self._geometry_store = geometry_store
+        self._geometry_row = row
+        self._geometry_cache.clear()
+
+    # The element keeps the geometry it had in the store
+    def _detach_from_geometry_store(self):
+        self._position = self.position
+        self._size = self.size
+        self._geometry_store = None
+        self._geometry_row = None
+        self._geometry_cache.clear()
+
+    # The position and size may be modified in place, the outline is read from the style, which may be shared
+    # and modified in place, and the geometry store can move the element without notifying it
+    def _valid_geometry_cache(self) -> dict:
+        if self._geometry_store is None:
+            position = self._position
+            size = self._size
+            key = (position.x, position.y, size.x, size.y, self._style.outline)
+        else:
+            key = (self._geometry_store.version, self._style.outline)
+        if key != self._geometry_cache_key:
+            self._geometry_cache.clear()
+            self._geometry_cache_key = key
+        return self._geometry_cache
+
+    @cached_geometry_property
     def position_up_left_corner(self) -> Vector2:
         return self.position - self.size / 2
 
-    @property
+    @cached_geometry_property
     def position_up_left_corner_outline(self) -> Vector2:
         return self.position - self.size / 2 - Vector2(self.style.outline, self.style.outline)
 
-    @property
+    @cached_geometry_property
     def position_up_right_corner(self) -> Vector2:
         return self.position + Vector2(self.size.x, -self.size.y) / 2
 
-    @property
+    @cached_geometry_property
     def position_up_right_corner_outline(self) -> Vector2:
         return self.position + Vector2(self.size.x, -self.size.y) / 2 + Vector2(self.style.outline, -self.style.outline)
 
-    @property
+    @cached_geometry_property
     def position_bottom_right_corner(self) -> Vector2:
         return self.position + Vector2(self.size.x, self.size.y) / 2
 
-    @property
+    @cached_geometry_property
     def position_bottom_right_corner_outline(self) -> Vector2:
         return self.position + Vector2(self.size.x, self.size.y) / 2 + Vector2(self.style.outline, self.style.outline)
 
-    @property
+    @cached_geometry_property
     def size_with_outline(self) -> Vector2:
         return Vector2(self.size.x, self.size.y) + 2 * Vector2(self.style.outline, self.style.outline)
 
-    @property
+    @cached_geometry_property
     def position_bottom_left_corner(self) -> Vector2:
         return self.position + Vector2(-self.size.x, self.size.y) / 2
 
-    @property
+    @cached_geometry_property
     def position_bottom_left_corner_outline(self) -> Vector2:
         return self.position + Vector2(-self.size.x, self.size.y) / 2 + Vector2(-self.style.outline, self.style.outline)
 
-    @property
+    @cached_geometry_property
     def rectangle(self) -> pygame.Rect:
         return pygame.Rect(self.position_up_left_corner[0], self.position_up_left_corner[1], self.size[0], self.size[1])
 
-    @property
+    @cached_geometry_property
     def rectangle_with_outline(self) -> pygame.Rect:
         position = self.position_up_left_corner_outline
         size = self.size + 2 * Vector2(self.style.outline, self.style.outline)
         return pygame.Rect(position[0], position[1], size[0], size[1])
 
+    @property
+    def bounding_rectangle(self) -> Rectangle:
+        return self.rectangle_with_outline
+
+    @property
+    def visual_rectangle(self) -> Rectangle:
+        return self.rectangle_with_outline
+
     def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
         self._collides_with_mouse = not mouse_already_collides_with_another_element and point_vs_rect(mouse_position, self.rectangle_with_outline)
 
 
 class Text(UIBoxElement):
-    def __init__(self, position: Union[Vector2, list[float]], color: Pixel, font: Font, text: str, antialiasing: bool = False):
+    # The rectangle of a text depends on the text, not on the size
+    GEOMETRY_STORE_COMPATIBLE = False
+
+    def __init__(self, position: Union[Vector2, list[float]], color: Pixel, font: Font, text: str, antialiasing: bool = False,
+                 use_glyph_atlas: bool = False):
         super().__init__(position, Vector2(0, 0), EMPTY_UI_BOX_ELEMENT_STYLE)
         self.color = color
         self.font = font
         self.text = text
         self.antialiasing = antialiasing
+        self.use_glyph_atlas = use_glyph_atlas
+
+        # Rendered again only when the text, the font or the color change
+        self._text_surface = None
+        self._text_surface_key = None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+        self.invalidate()
 
     @property
     def text_size(self):
-        return Vector2(self.font.size(self.text)[0], self.font.size(self.text)[1])
+        return Vector2(measure_text(self.font, self.text))
 
     @property
     def rectangle_with_outline(self) -> pygame.Rect:
         position = self.position_up_left_corner_outline
-        return pygame.Rect(position[0], position[1], self.text_size[0], self.text_size[1])
+        return pygame.Rect(position, self.text_size)
+
+    @property
+    def visual_rectangle(self) -> Rectangle:
+        text_size = self.text_size
+        return pygame.Rect(self.position - text_size / 2, text_size)
+
+    def _text_surface_cache_key(self) -> tuple:
+        return (self.font, self.text, self.antialiasing, color_key(self.color))
+
+    def text_surface(self) -> pygame.Surface:
+        key = self._text_surface_cache_key()
+        if key != self._text_surface_key:
+            self._text_surface = render_text(self.font, self.text, self.antialiasing, self.color)
+            self._text_surface_key = key
+        return self._text_surface
 
     def draw(self, surface):
-        text_surface = self.font.render(self.text, self.antialiasing, self.color)
         text_position = self.position - self.text_size / 2
-        surface.blit(text_surface, text_position)
+        if self.use_glyph_atlas:
+            glyph_atlas(self.font, self.color, self.antialiasing).draw(surface, text_position, self.text)
+            return
+        surface.blit(self.text_surface(), text_position)
 
 
 class Box(UIBoxElement):
@@ -375,23 +2368,92 @@ class Box(UIBoxElement):
                  style: UIBoxElementStyle):
         super().__init__(position, size, style)
 
+    # Set to False to draw the shapes of every box on every frame instead of blitting a cached sprite
+    CACHE_SPRITES = True
+    SPRITE_MARGIN = 1
+
+    # The fill and the border are drawn from the integer rectangle, so the sprite doesn't depend on where it is
+    def _sprite_key(self) -> tuple:
+        rectangle = self.rectangle
+        return (type(self), self.style.cache_key, rectangle.width, rectangle.height)
+
+    def _sprite_rectangle(self) -> Rectangle:
+        margin = math.ceil(self.style.outline) + self.SPRITE_MARGIN
+        return self.rectangle.inflate(2 * margin, 2 * margin)
+
+    # Returns the sprite and where it is blitted relative to the up left corner of the rectangle.
+    # The sprite is drawn with its up left corner at the origin, so it doesn't depend on where the box is.
+    # Coordinates are truncated towards zero, so a box reaching negative coordinates is drawn without a sprite
+    def _render_sprite(self) -> Union[tuple[pygame.Surface, tuple[int, int]], None]:
+        rectangle = self.rectangle
+        sprite_rectangle = self._sprite_rectangle()
+        sprite = new_surface(sprite_rectangle.size, pygame.SRCALPHA)
+        self.draw_shapes(sprite, (-sprite_rectangle.x, -sprite_rectangle.y))
+        return to_display_format(sprite), (sprite_rectangle.x - rectangle.x, sprite_rectangle.y - rectangle.y)
+
+    def draw_shapes(self, surface: pygame.Surface, offset: tuple[int, int] = (0, 0)):
+        draw_rectangle(surface, self.rectangle.move(offset), self.style.rectangle_color, self.style.outline, self.style.outline_color)
+
     def draw(self, surface):
-        draw_rectangle(surface, self.rectangle, self.style.rectangle_color, self.style.outline, self.style.outline_color)
+        if not self.CACHE_SPRITES:
+            self.draw_shapes(surface)
+            return
+
+        sprite = sprite_cache.get(self._sprite_key(), self._render_sprite)
+        if sprite is None:
+            self.draw_shapes(surface)
+            return
+
+        sprite, (x, y) = sprite
+        rectangle = self.rectangle
+        sprite_position = (rectangle.x + x, rectangle.y + y)
+        if sprite_position[0] < 0 or sprite_position[1] < 0:
+            self.draw_shapes(surface)
+        else:
+            surface.blit(sprite, sprite_position)
 
 
 class TextBox(Box):
     def __init__(self, position: Vector2, size: Vector2,
                  style: UIBoxElementStyle,
-                 text: str, font: Font = default_ui_font, antialiasing: bool = False):
+                 text: str, font: Union[Font, None] = None, antialiasing: bool = False):
         super().__init__(position, size, style)
         self.text = text
-        self.font = font
+        self.font = font if font is not None else default_font()
         self.antialiasing = antialiasing
 
-    def draw(self, surface):
-        super().draw(surface)
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+        self.invalidate()
+
+    @property
+    def text_rectangle(self) -> Rectangle:
+        text_size = Vector2(measure_text(self.font, self.text))
+        return pygame.Rect(self.position - text_size / 2, text_size)
+
+    # The text is centered on the box and can stick out of it
+    @property
+    def visual_rectangle(self) -> Rectangle:
+        return self.rectangle_with_outline.union(self.text_rectangle)
 
-        ui_text_element = Text(self.position, self.style.content_color, self.font, self.text, self.style.antialiasing)
+    # The text can fall on either side of a pixel boundary, depending on the sub-pixel position of the box
+    def _sprite_key(self) -> tuple:
+        rectangle = self.rectangle
+        text_rectangle = self.text_rectangle
+        return super()._sprite_key() + (self.text, self.font, text_rectangle.x - rectangle.x, text_rectangle.y - rectangle.y)
+
+    def _sprite_rectangle(self) -> Rectangle:
+        return super()._sprite_rectangle().union(self.text_rectangle)
+
+    def draw_shapes(self, surface: pygame.Surface, offset: tuple[int, int] = (0, 0)):
+        super().draw_shapes(surface, offset)
+
+        ui_text_element = Text(self.position + Vector2(offset), self.style.content_color, self.font, self.text, self.style.antialiasing)
         ui_text_element.draw(surface)
 
 
@@ -420,8 +2482,8 @@ class Button(TextBox):
     def pressed(self):
         return self._pressed
 
-    def on_update(self, mouse_collides_with_another_element: bool, mouse_controls_another_active_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
-        self._collides_with_mouse = not mouse_collides_with_another_element and not mouse_controls_another_active_element and point_vs_rect(mouse_position, self.rectangle)
+    def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
+        self._collides_with_mouse = not mouse_already_collides_with_another_element and point_vs_rect(mouse_position, self.rectangle)
         self._active = self.collides_with_mouse and mouse_key.pressed
         if self.active:
             self.style = self.style_pressed
@@ -443,34 +2505,285 @@ class TextButton(Button):
                  style_idle: UIBoxElementStyle, style_hovered: UIBoxElementStyle,
                  text: str, font: Font, antialiasing: bool,
                  function, *args):
-        text_size = Vector2(Font.size(font, text))
+        text_size = Vector2(measure_text(font, text))
         super().__init__(position, text_size, style_idle, style_hovered, text, font, antialiasing, function, *args)
 
 
+# Shows the frame times of the last frames and how they split between the layers of a UIContext.
+# Doesn't collide with the mouse, the text is rendered again only when the numbers change.
+# With a UIContext, one frame is recorded per draw_elements call, timed by the wall clock,
+# and the layers are profiled only while the overlay is visible.
+# Without one, the frames are recorded from the delta times of the updates, except the updates without time
+class FrameStatisticsOverlay(UIBoxElement):
+    # Updated wherever the mouse is, so it is never culled
+    GEOMETRY_STORE_COMPATIBLE = False
+
+    HISTORY_LENGTH = 300
+    SPARKLINE_HEIGHT = 40
+    PADDING = 4
+    # Weight of the newest frame in the per-layer averages
+    LAYER_SMOOTHING = 0.1
+
+    def __init__(self, position_up_left_corner: Vector2, style: UIBoxElementStyle,
+                 ui_context: Union[UIContext, None] = None, font: Union[Font, None] = None,
+                 history_length: int = HISTORY_LENGTH, visible: bool = True, hotkey: Union[int, None] = pygame.K_F3):
+        self.font = font if font is not None else default_slider_tick_mark_font()
+        self.ui_context = ui_context
+        self.hotkey = hotkey
+        self._visible = visible
+
+        self._frame_times = [0.0] * max(2, history_length)
+        self._next_frame_index = 0
+        self._number_of_frames = 0
+
+        number_of_layers = 0 if ui_context is None else len(ui_context.layers)
+        self._layer_milliseconds = [[0.0, 0.0] for _ in range(number_of_layers)]
+        self._layer_total_seconds = [[0.0, 0.0] for _ in range(number_of_layers)]
+        # The profiler enabled by the overlay, a profiler enabled by someone else is left alone
+        self._profiler = None
+        if ui_context is not None:
+            ui_context.add_frame_listener(self._on_frame)
+            self._update_profiling()
+
+        self._lines = [""] * (4 + number_of_layers)
+        self._line_surfaces: list[Union[pygame.Surface, None]] = [None] * len(self._lines)
+
+        line_height = self.font.get_linesize()
+        text_width = max(measure_text(self.font, self._statistics_line("AVG", 999.9))[0], measure_text(self.font, self._layer_line(99, 99.99, 99.99))[0])
+        size = Vector2(max(len(self._frame_times), text_width) + 2 * self.PADDING,
+                       len(self._lines) * line_height + self.SPARKLINE_HEIGHT + 3 * self.PADDING)
+        super().__init__(Vector2(position_up_left_corner) + size / 2, size, style)
+
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    @visible.setter
+    def visible(self, visible: bool):
+        if visible != self._visible:
+            self._visible = visible
+            self._update_profiling()
+            self.invalidate()
+
+    @property
+    def bounding_rectangle(self) -> Union[Rectangle, None]:
+        return None
+
+    # Per-layer times are read from a profiler that only times the layers
+    def _update_profiling(self):
+        if self.ui_context is None:
+            return
+        if self._visible and self.ui_context.profiler is None:
+            self._profiler = self.ui_context.enable_profiling(per_element=False)
+            self._layer_total_seconds = [[0.0, 0.0] for _ in self._layer_total_seconds]
+        elif not self._visible and self._profiler is not None:
+            if self.ui_context.profiler is self._profiler:
+                self.ui_context.disable_profiling()
+            self._profiler = None
+
+    # Stops recording the frames of the UIContext
+    def detach(self):
+        if self.ui_context is None:
+            return
+        self._visible = False
+        self._update_profiling()
+        self.ui_context.remove_frame_listener(self._on_frame)
+        self.ui_context = None
+
+    def handle_event(self, event: pygame.event.Event):
+        if self.hotkey is not None and event.type == pygame.KEYDOWN and event.key == self.hotkey:
+            self.visible = not self.visible
+
+    def record_frame(self, frame_time_seconds: float):
+        self._frame_times[self._next_frame_index] = frame_time_seconds
+        self._next_frame_index = (self._next_frame_index + 1) % len(self._frame_times)
+        self._number_of_frames = min(self._number_of_frames + 1, len(self._frame_times))
+
+    # Oldest first
+    @property
+    def frame_times(self) -> list[float]:
+        if self._number_of_frames < len(self._frame_times):
+            return self._frame_times[:self._number_of_frames]
+        return self._frame_times[self._next_frame_index:] + self._frame_times[:self._next_frame_index]
+
+    def statistics(self) -> dict[str, float]:
+        frame_times = sorted(self.frame_times)
+        if not frame_times:
+            return {"mean": 0.0, "p95": 0.0, "p99": 0.0, "worst": 0.0}
+        last_index = len(frame_times) - 1
+        return {"mean": sum(frame_times) / len(frame_times),
+                "p95": frame_times[round(0.95 * last_index)],
+                "p99": frame_times[round(0.99 * last_index)],
+                "worst": frame_times[-1]}
+
+    def _record_layer_times(self):
+        profiler = self.ui_context.profiler if self.ui_context is not None else None
+        if profiler is None:
+            return
+        for index_of_layer, layer_milliseconds in enumerate(self._layer_milliseconds):
+            for index_of_category, category in enumerate(("update", "draw")):
+                counter = profiler.counters.get((f"layer {index_of_layer}", category))
+                total_seconds = 0.0 if counter is None else counter.total_seconds
+                frame_milliseconds = (total_seconds - self._layer_total_seconds[index_of_layer][index_of_category]) * 1000
+                self._layer_total_seconds[index_of_layer][index_of_category] = total_seconds
+                layer_milliseconds[index_of_category] += self.LAYER_SMOOTHING * (frame_milliseconds - layer_milliseconds[index_of_category])
+
+    def _on_frame(self, frame_time_seconds: float):
+        self.record_frame(frame_time_seconds)
+        self._record_layer_times()
+        if self._visible:
+            self.invalidate()
+
+    # The InputDispatcher also updates the UIContext without time between the frames
+    def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
+        if self.ui_context is None and delta_time_seconds > 0:
+            self.record_frame(delta_time_seconds)
+            if self._visible:
+                self.invalidate()
+
+    @staticmethod
+    def _statistics_line(name: str, milliseconds: float) -> str:
+        return f"{name} {milliseconds:5.1f} MS"
+
+    @staticmethod
+    def _layer_line(index_of_layer: int, update_milliseconds: float, draw_milliseconds: float) -> str:
+        return f"L{index_of_layer} U{update_milliseconds:5.2f} D{draw_milliseconds:5.2f}"
+
+    def _update_lines(self):
+        statistics = self.statistics()
+        lines = [self._statistics_line("AVG", statistics["mean"] * 1000),
+                 self._statistics_line("P95", statistics["p95"] * 1000),
+                 self._statistics_line("P99", statistics["p99"] * 1000),
+                 self._statistics_line("MAX", statistics["worst"] * 1000)]
+        for index_of_layer, (update_milliseconds, draw_milliseconds) in enumerate(self._layer_milliseconds):
+            lines.append(self._layer_line(index_of_layer, update_milliseconds, draw_milliseconds))
+
+        for i, line in enumerate(lines):
+            if line != self._lines[i] or self._line_surfaces[i] is None:
+                self._lines[i] = line
+                self._line_surfaces[i] = render_text(self.font, line, self.style.antialiasing, self.style.content_color)
+
+    def draw(self, surface):
+        if not self._visible:
+            return
+        draw_rectangle(surface, self.rectangle, self.style.rectangle_color, self.style.outline, self.style.outline_color)
+        self._update_lines()
+
+        left, top = self.position_up_left_corner + Vector2(self.PADDING, self.PADDING)
+        line_height = self.font.get_linesize()
+        for i, line_surface in enumerate(self._line_surfaces):
+            surface.blit(line_surface, (left, top + i * line_height))
+
+        frame_times = self.frame_times
+        if len(frame_times) < 2:
+            return
+        bottom = top + len(self._lines) * line_height + self.PADDING + self.SPARKLINE_HEIGHT
+        scale = self.SPARKLINE_HEIGHT / max(max(frame_times), 1e-6)
+        points = [(left + i, bottom - frame_time * scale) for i, frame_time in enumerate(frame_times)]
+        draw_lines(surface, self.style.content_color, False, points)
+
+
+# x' = a * x + b * y + c
+# y' = d * x + e * y + f
+class AffineTransform:
+    def __init__(self, a: float = 1, b: float = 0, c: float = 0, d: float = 0, e: float = 1, f: float = 0):
+        self.matrix = (a, b, c, d, e, f)
+
+    @staticmethod
+    def translation(offset: Union[Vector2, list[float]]) -> "AffineTransform":
+        return AffineTransform(1, 0, offset[0], 0, 1, offset[1])
+
+    # Rotates in SCREEN space CLOCKWISE by degrees around the center
+    @staticmethod
+    def rotation(degrees: Union[float, int], center: Union[Vector2, list[float]] = (0, 0)) -> "AffineTransform":
+        cosine = math.cos(math.radians(degrees))
+        sine = math.sin(math.radians(degrees))
+        return AffineTransform(cosine, -sine, center[0] - center[0] * cosine + center[1] * sine,
+                               sine, cosine, center[1] - center[0] * sine - center[1] * cosine)
+
+    @staticmethod
+    def scaling(scale: Union[Vector2, list[float]], center: Union[Vector2, list[float]] = (0, 0)) -> "AffineTransform":
+        return AffineTransform(scale[0], 0, center[0] - center[0] * scale[0],
+                               0, scale[1], center[1] - center[1] * scale[1])
+
+    # (first @ second) applies second, then first
+    def __matmul__(self, other: "AffineTransform") -> "AffineTransform":
+        a1, b1, c1, d1, e1, f1 = self.matrix
+        a2, b2, c2, d2, e2, f2 = other.matrix
+        return AffineTransform(a1 * a2 + b1 * d2, a1 * b2 + b1 * e2, a1 * c2 + b1 * f2 + c1,
+                               d1 * a2 + e1 * d2, d1 * b2 + e1 * e2, d1 * c2 + e1 * f2 + f1)
+
+    # Applies self, then other
+    def then(self, other: "AffineTransform") -> "AffineTransform":
+        return other @ self
+
+    @staticmethod
+    def compose(transforms: list["AffineTransform"]) -> "AffineTransform":
+        composition = AffineTransform()
+        for transform in transforms:
+            composition = transform @ composition
+        return composition
+
+    def apply(self, point: Union[Vector2, list[float]]) -> Vector2:
+        a, b, c, d, e, f = self.matrix
+        return Vector2(a * point[0] + b * point[1] + c, d * point[0] + e * point[1] + f)
+
+
+# The points are kept in an Nx2 array if numpy is installed, so a transform is a single matrix product
 class Polygon:
     def __init__(self, position: Vector2, points: list[Vector2]):
         self.position = position
         self.points = points
         self._scale = Vector2(1, 1)
 
+    @property
+    def points(self) -> list[Vector2]:
+        if numpy is None:
+            return list(self._points)
+        return [Vector2(x, y) for x, y in self._points]
+
+    @points.setter
+    def points(self, points: list[Vector2]):
+        if numpy is None:
+            self._points = [Vector2(point[0], point[1]) for point in points]
+        else:
+            self._points = numpy.array([(point[0], point[1]) for point in points], dtype=float).reshape(-1, 2)
+        self._points_key = None
+
+    # Equal for polygons with the same points
+    @property
+    def points_key(self) -> tuple:
+        if self._points_key is None:
+            self._points_key = tuple((float(point[0]), float(point[1])) for point in self._points)
+        return self._points_key
+
+    def transform(self, transform: AffineTransform):
+        a, b, c, d, e, f = transform.matrix
+        if numpy is None:
+            self._points = [transform.apply(point) for point in self._points]
+        else:
+            self._points = self._points @ numpy.array([[a, d], [b, e]]) + (c, f)
+        self._points_key = None
+
+    # The transforms are composed into one matrix, which is applied once
+    def transform_all(self, transforms: list[AffineTransform]):
+        self.transform(AffineTransform.compose(transforms))
+
+    def translated_points(self, offset: Union[Vector2, list[float]]) -> list[tuple[float, float]]:
+        if numpy is None:
+            return [(point[0] + offset[0], point[1] + offset[1]) for point in self._points]
+        return (self._points + (offset[0], offset[1])).tolist()
+
     # Rotates the polygon in SCREEN space CLOCKWISE by degrees
     def rotate(self, degrees: Union[float, int]):
-        cosine = math.cos(math.radians(degrees))
-        sine = math.sin(math.radians(degrees))
-        for i in range(len(self.points)):
-            x0, y0 = self.points[i].x, self.points[i].y
-            x = x0 * cosine - y0 * sine
-            y = x0 * sine + y0 * cosine
-            self.points[i] = Vector2(x, y)
+        self.transform(AffineTransform.rotation(degrees))
 
     def get_scale(self) -> Vector2:
         return self._scale
 
     def scale(self, new_scale: Vector2):
         scale = Vector2(new_scale.x / self.get_scale().x, new_scale.y / self.get_scale().y)
-        for i in range(len(self.points)):
-            self.points[i].x = self.position.x + (self.points[i].x - self.position.x) * scale.x
-            self.points[i].y = self.position.y + (self.points[i].y - self.position.y) * scale.y
+        self.transform(AffineTransform.scaling(scale, self.position))
         self._scale = new_scale
 
     def scale_by(self, relative_scale: Vector2):
@@ -484,7 +2797,7 @@ class TriangleButton(Button):
                  style_idle: UIBoxElementStyle, style_hovered: UIBoxElementStyle,
                  triangle_scale: Vector2, angle_degrees: float, antialiasing: bool,
                  function, *args):
-        super().__init__(position, size, style_idle, style_hovered, "", default_ui_font, antialiasing, function, *args)
+        super().__init__(position, size, style_idle, style_hovered, "", default_font(), antialiasing, function, *args)
         self.triangle_scale = triangle_scale
         self.triangle_mesh = Polygon(
             Vector2(0, 0),
@@ -495,21 +2808,730 @@ class TriangleButton(Button):
         self.triangle_mesh.scale_by(Vector2(triangle_side, triangle_side))
         self.triangle_mesh.rotate(angle_degrees)
 
-    def draw(self, surface):
-        super().draw(surface)
-        draw_rectangle(surface, self.rectangle, self.style.rectangle_color)
-        draw_rounded_border(surface, self.rectangle, self.style.outline_color, self.style.outline)
+    # The triangle depends on the sub-pixel part of the position. There is no text, so the sprite only covers the box
+    def _sprite_key(self) -> tuple:
+        position = self.position
+        return Box._sprite_key(self) + (position.x % 1, position.y % 1, self.triangle_mesh.points_key, self.antialiasing)
+
+    def _sprite_rectangle(self) -> Rectangle:
+        return Box._sprite_rectangle(self)
 
-        translated_triangle_mesh_points = [point + self.position for point in self.triangle_mesh.points]
+    def draw_shapes(self, surface: pygame.Surface, offset: tuple[int, int] = (0, 0)):
+        rectangle = self.rectangle.move(offset)
+        draw_rectangle(surface, rectangle, self.style.rectangle_color, self.style.outline, self.style.outline_color)
+        if self.style.outline_color is not None:
+            draw_rounded_border(surface, rectangle, self.style.outline_color, self.style.outline)
 
-        pygame.draw.polygon(surface, self.style.content_color, translated_triangle_mesh_points)
+        translated_triangle_mesh_points = self.triangle_mesh.translated_points(self.position + Vector2(offset))
+        draw_polygon(surface, self.style.content_color, translated_triangle_mesh_points)
         if self.antialiasing:
-            pygame.draw.aalines(surface, self.style.content_color, True, translated_triangle_mesh_points)
+            draw_aalines(surface, self.style.content_color, True, translated_triangle_mesh_points)
+
+
+# Plots y = function(x), or a series of points, with x_range mapped onto the width of the box and
+# y_range onto its height, y_range[0] at the bottom. Requires numpy.
+# The function is called with an array of xs, unless vectorized is False. The curve is sampled again only when
+# the function, the data, the ranges or the geometry change, and is drawn with one pygame.draw.lines call.
+# Adaptive sampling starts coarse and splits the segments that bend by more than tolerance pixels.
+# More than two points per pixel column are decimated to the minimum and the maximum of the column
+class Plot(UIBoxElement):
+    ADAPTIVE_INITIAL_STEP = 8
+    ADAPTIVE_MAX_DEPTH = 5
+    TOLERANCE = 0.5
+
+    def __init__(self, position: Vector2, size: Vector2, style: UIBoxElementStyle,
+                 function, x_range: tuple[float, float], y_range: tuple[float, float],
+                 vectorized: bool = True, samples_per_pixel: float = 1, adaptive: bool = False,
+                 tolerance: float = TOLERANCE):
+        if numpy is None:
+            raise ImportError("Plot requires numpy")
+        super().__init__(position, size, style)
+        self._function = function
+        self._data = None
+        self._data_version = 0
+        self._x_range = tuple(x_range)
+        self._y_range = tuple(y_range)
+        self.vectorized = vectorized
+        self.samples_per_pixel = samples_per_pixel
+        self.adaptive = adaptive
+        self.tolerance = tolerance
+
+        # Reused while the number of samples stays the same
+        self._unit_samples = numpy.empty(0)
+        self._xs = numpy.empty(0)
+        self._screen_points = numpy.empty((0, 2))
+
+        self._curve_key = None
+        self._curve: list[list[list[float]]] = []
+
+    @property
+    def function(self):
+        return self._function
+
+    @function.setter
+    def function(self, function):
+        self._function = function
+        self.invalidate()
+
+    # Points plotted instead of the function, a pair of arrays of xs and ys, the xs in increasing order
+    @property
+    def data(self) -> Union[tuple, None]:
+        return self._data
+
+    @data.setter
+    def data(self, data: Union[tuple, None]):
+        self._data = None if data is None else (numpy.asarray(data[0], dtype=float), numpy.asarray(data[1], dtype=float))
+        self._data_version += 1
+        self.invalidate()
+
+    @property
+    def x_range(self) -> tuple[float, float]:
+        return self._x_range
+
+    @x_range.setter
+    def x_range(self, x_range: tuple[float, float]):
+        self._x_range = tuple(x_range)
+        self.invalidate()
+
+    @property
+    def y_range(self) -> tuple[float, float]:
+        return self._y_range
+
+    @y_range.setter
+    def y_range(self, y_range: tuple[float, float]):
+        self._y_range = tuple(y_range)
+        self.invalidate()
+
+    def _evaluate(self, xs: "numpy.ndarray") -> "numpy.ndarray":
+        if self.vectorized:
+            return numpy.asarray(self._function(xs), dtype=float)
+        return numpy.fromiter(map(self._function, xs), dtype=float, count=len(xs))
+
+    def _sample_uniform(self, number_of_samples: int) -> tuple["numpy.ndarray", "numpy.ndarray"]:
+        if len(self._xs) != number_of_samples:
+            self._unit_samples = numpy.linspace(0, 1, number_of_samples)
+            self._xs = numpy.empty(number_of_samples)
+        x_start, x_stop = self._x_range
+        numpy.multiply(self._unit_samples, x_stop - x_start, out=self._xs)
+        self._xs += x_start
+        return self._xs, self._evaluate(self._xs)
+
+    # Midpoints of the segments that bend too much are added, level by level, all the midpoints of a level at once
+    def _sample_adaptive(self) -> tuple["numpy.ndarray", "numpy.ndarray"]:
+        width = max(1, int(self.size.x))
+        xs = numpy.linspace(self._x_range[0], self._x_range[1], max(2, width // self.ADAPTIVE_INITIAL_STEP + 1))
+        ys = self._evaluate(xs)
+        pixels_per_y = self.size.y / (self._y_range[1] - self._y_range[0])
+        refine = numpy.ones(len(xs) - 1, dtype=bool)
+        for _ in range(self.ADAPTIVE_MAX_DEPTH):
+            segments = numpy.flatnonzero(refine)
+            if len(segments) == 0:
+                break
+            middle_xs = (xs[segments] + xs[segments + 1]) / 2
+            middle_ys = self._evaluate(middle_xs)
+            chord_ys = (ys[segments] + ys[segments + 1]) / 2
+            # Not finite errors are refined too, the function may be undefined around there
+            bends = ~(numpy.abs(middle_ys - chord_ys) * pixels_per_y <= self.tolerance)
+
+            xs = numpy.insert(xs, segments + 1, middle_xs)
+            ys = numpy.insert(ys, segments + 1, middle_ys)
+            refine = numpy.zeros(len(xs) - 1, dtype=bool)
+            left_halves = segments + numpy.arange(len(segments))
+            refine[left_halves] = bends
+            refine[left_halves + 1] = bends
+        return xs, ys
+
+    def _to_screen(self, xs: "numpy.ndarray", ys: "numpy.ndarray") -> "numpy.ndarray":
+        if len(self._screen_points) != len(xs):
+            self._screen_points = numpy.empty((len(xs), 2))
+        left, top = self.position_up_left_corner
+        x_start, x_stop = self._x_range
+        y_start, y_stop = self._y_range
+        screen_xs = self._screen_points[:, 0]
+        screen_ys = self._screen_points[:, 1]
+        numpy.subtract(xs, x_start, out=screen_xs)
+        screen_xs *= self.size.x / (x_stop - x_start)
+        screen_xs += left
+        numpy.subtract(ys, y_start, out=screen_ys)
+        screen_ys *= -self.size.y / (y_stop - y_start)
+        screen_ys += top + self.size.y
+        return self._screen_points
+
+    # Every pixel column keeps its minimum and its maximum, in the order the curve passes them
+    def _decimate(self, points: "numpy.ndarray") -> "numpy.ndarray":
+        left = self.position_up_left_corner.x
+        columns = numpy.floor(points[:, 0] - left)
+        starts = numpy.flatnonzero(numpy.diff(columns, prepend=columns[0] - 1))
+        ends = numpy.append(starts[1:], len(points)) - 1
+        minimums = numpy.minimum.reduceat(points[:, 1], starts)
+        maximums = numpy.maximum.reduceat(points[:, 1], starts)
+        rising = points[ends, 1] >= points[starts, 1]
+
+        decimated = numpy.empty((2 * len(starts), 2))
+        decimated[0::2, 0] = points[starts, 0]
+        decimated[1::2, 0] = points[ends, 0]
+        decimated[0::2, 1] = numpy.where(rising, minimums, maximums)
+        decimated[1::2, 1] = numpy.where(rising, maximums, minimums)
+        return decimated
+
+    # Lists of points, the curve is broken where the function isn't finite
+    def _sample_curve(self) -> list[list[list[float]]]:
+        if self._data is not None:
+            xs, ys = self._data
+        elif self.adaptive:
+            xs, ys = self._sample_adaptive()
+        else:
+            xs, ys = self._sample_uniform(max(2, math.ceil(self.size.x * self.samples_per_pixel) + 1))
+
+        points = self._to_screen(xs, ys)
+        finite = numpy.isfinite(points).all(axis=1)
+        if finite.all():
+            runs = [points]
+        else:
+            breaks = numpy.flatnonzero(numpy.diff(finite.astype(numpy.int8))) + 1
+            runs = [run for run in numpy.split(points, breaks) if numpy.isfinite(run[0]).all()]
+
+        curve = []
+        for run in runs:
+            if len(run) > 2 * max(1, self.size.x):
+                run = self._decimate(run)
+            if len(run) >= 2:
+                curve.append(run.tolist())
+        return curve
+
+    @property
+    def curve(self) -> list[list[list[float]]]:
+        position = self.position
+        key = (self._function, self._data_version, self._x_range, self._y_range, position.x, position.y, self.size.x, self.size.y,
+               self.vectorized, self.samples_per_pixel, self.adaptive, self.tolerance)
+        if key != self._curve_key:
+            self._curve = self._sample_curve()
+            self._curve_key = key
+        return self._curve
+
+    def draw(self, surface):
+        draw_rectangle(surface, self.rectangle, self.style.rectangle_color, self.style.outline, self.style.outline_color)
+        if self.style.content_color is None:
+            return
+
+        clip = surface.get_clip()
+        surface.set_clip(self.rectangle.clip(clip))
+        for points in self.curve:
+            if self.style.antialiasing:
+                draw_aalines(surface, self.style.content_color, False, points)
+            else:
+                draw_lines(surface, self.style.content_color, False, points)
+        surface.set_clip(clip)
+
+
+# Fractions of the width and the height of a rectangle
+class Anchor:
+    TOP_LEFT = (0, 0)
+    TOP = (0.5, 0)
+    TOP_RIGHT = (1, 0)
+    LEFT = (0, 0.5)
+    CENTER = (0.5, 0.5)
+    RIGHT = (1, 0.5)
+    BOTTOM_LEFT = (0, 1)
+    BOTTOM = (0.5, 1)
+    BOTTOM_RIGHT = (1, 1)
+
+
+# Places its children, elements with a position and a size or other layouts, inside its rectangle.
+# Layouts aren't drawn, the elements stay in their layers. A layout without a size takes the size of its content,
+# the position of a layout inside another layout is set by the outer layout.
+# Layouts are laid out again only where something changed: a change of the size of a child, or of the text of a Text,
+# marks the layouts above it, and Layout.update_layouts recomputes only the marked subtrees.
+# A layout that only moves, with the same size, moves its children by the same offset instead of placing them again.
+# A root layout added to a UIContext with add_layout is laid out by that UIContext once per frame,
+# the root layouts that weren't added to one are laid out by Layout.update_layouts, which every UIContext calls too.
+# Every element a layout moves is still assigned its position: moving a whole window of 5000 elements takes
+# about 7 ms, of 20000 elements about 23 ms, which is more than a frame
+class Layout:
+    START = -1
+    CENTER = 0
+    END = 1
+
+    # Layouts without a parent that have something to lay out and weren't added to a UIContext,
+    # a root added to a UIContext is put into the list of the UIContext instead
+    _dirty_roots: list["Layout"] = []
+
+    def __init__(self, position: Union[Vector2, list[float]] = (0, 0), size: Union[Vector2, list[float], None] = None,
+                 padding: float = 0):
+        self._parent = None
+        self._children = []
+        self._child_index = {}
+        # Sizes of the children that aren't layouts, measured when they change
+        self._child_sizes = []
+        self._position = Vector2(position[0], position[1])
+        self._fixed_size = None if size is None else Vector2(size[0], size[1])
+        self._size = Vector2(0, 0)
+        self._padding = padding
+
+        self._content_size = None
+        self._arrange_dirty = False
+        self._subtree_dirty = False
+        self._arranging = False
+        self._registered = False
+        self._mark_dirty(True)
+
+    @property
+    def parent(self) -> Union["Layout", None]:
+        return self._parent
+
+    @property
+    def children(self) -> list:
+        return self._children
+
+    @property
+    def position(self) -> Vector2:
+        return self._position
+
+    @position.setter
+    def position(self, position: Union[Vector2, list[float]]):
+        self._position = Vector2(position[0], position[1])
+        self._mark_dirty(False)
+
+    # The size given to the layout, the size of its content if it wasn't given one
+    @property
+    def size(self) -> Vector2:
+        return self._size
+
+    @size.setter
+    def size(self, size: Union[Vector2, list[float], None]):
+        self._fixed_size = None if size is None else Vector2(size[0], size[1])
+        self._mark_dirty(True)
+
+    @property
+    def rectangle(self) -> Rectangle:
+        return Rectangle(self._position - self._size / 2, self._size)
+
+    @property
+    def preferred_size(self) -> Vector2:
+        if self._fixed_size is not None:
+            return self._fixed_size
+        if self._content_size is None:
+            self._content_size = self._measure_content() + Vector2(2 * self._padding, 2 * self._padding)
+        return self._content_size
+
+    def add(self, child):
+        self.insert(len(self._children), child)
+
+    def insert(self, index: int, child):
+        self._children.insert(index, child)
+        self._child_sizes.insert(index, None if isinstance(child, Layout) else self._measure(child))
+        self._reindex()
+        if isinstance(child, Layout):
+            child._parent = self
+        else:
+            child.add_geometry_listener(self._child_changed)
+            if isinstance(child, Text):
+                child.add_redraw_listener(self._child_changed)
+        self._mark_dirty(True)
+
+    def remove(self, child):
+        index = self._child_index[child]
+        self._children.pop(index)
+        self._child_sizes.pop(index)
+        self._reindex()
+        if isinstance(child, Layout):
+            child._parent = None
+            child._subtree_dirty = False
+            child._mark_dirty(False)
+        else:
+            child.remove_geometry_listener(self._child_changed)
+            child.remove_redraw_listener(self._child_changed)
+        self._mark_dirty(True)
+
+    def _reindex(self):
+        self._child_index = {child: i for i, child in enumerate(self._children)}
+
+    @staticmethod
+    def _measure(element) -> Vector2:
+        if isinstance(element, Text):
+            return element.text_size
+        if isinstance(element, UIBoxElement):
+            return element.size_with_outline
+        return Vector2(element.size)
+
+    def _child_changed(self, element):
+        if self._arranging:
+            return
+        index = self._child_index[element]
+        size = self._measure(element)
+        if size != self._child_sizes[index]:
+            self._child_sizes[index] = size
+            self._mark_dirty(True)
+
+    def _measured_sizes(self) -> list[Vector2]:
+        return [child.preferred_size if size is None else size for child, size in zip(self._children, self._child_sizes)]
+
+    # Marks the layout, and the layouts above it as having a marked subtree.
+    # When the size of the content changed, the layouts above that take the size of their content are marked too
+    def _mark_dirty(self, content_changed: bool):
+        node = self
+        node._arrange_dirty = True
+        while True:
+            if content_changed and node._fixed_size is None:
+                node._content_size = None
+            else:
+                content_changed = False
+            if node._subtree_dirty and not content_changed:
+                return
+            node._subtree_dirty = True
+
+            parent = node._parent
+            if parent is None:
+                if not node._registered:
+                    node._registered = True
+                    node._dirty_roots.append(node)
+                return
+            if content_changed:
+                parent._arrange_dirty = True
+            node = parent
+
+    @classmethod
+    def update_layouts(cls):
+        cls._update_roots(cls._dirty_roots)
+
+    # The list is emptied in place, the roots keep a reference to it
+    @staticmethod
+    def _update_roots(dirty_roots: list["Layout"]):
+        roots = dirty_roots[:]
+        dirty_roots.clear()
+        for root in roots:
+            root._registered = False
+            if root._parent is None:
+                root._update()
+
+    # Moves the root into another list of dirty roots, None is the list of Layout.update_layouts
+    def _set_dirty_roots(self, dirty_roots: Union[list["Layout"], None]):
+        if self._registered and self in self._dirty_roots:
+            self._dirty_roots.remove(self)
+            self._registered = False
+        if dirty_roots is None:
+            self.__dict__.pop("_dirty_roots", None)
+        else:
+            self._dirty_roots = dirty_roots
+        if self._subtree_dirty and self._parent is None:
+            self._registered = True
+            self._dirty_roots.append(self)
+
+    # Lays out this layout now, with the layouts around it
+    def update(self):
+        root = self
+        while root._parent is not None:
+            root = root._parent
+        root._update()
+
+    def _update(self):
+        if self._parent is None:
+            size = self.preferred_size
+            if size != self._size:
+                self._size = Vector2(size)
+                self._arrange_dirty = True
+
+        if self._arrange_dirty:
+            self._arrange()
+        elif self._subtree_dirty:
+            for child in self._children:
+                if isinstance(child, Layout) and child._subtree_dirty:
+                    child._update()
+        self._arrange_dirty = False
+        self._subtree_dirty = False
+
+    def _arrange(self):
+        self._arranging = True
+        try:
+            for child, center, size in self._placements(self._measured_sizes()):
+                self._place(child, center, size)
+        finally:
+            self._arranging = False
+
+    # A layout child is always given a size, an element only when it is stretched
+    def _place(self, child, center: Vector2, size: Union[Vector2, None]):
+        if isinstance(child, Layout):
+            if child._size != size:
+                child._position = Vector2(center)
+                child._size = Vector2(size)
+                child._arrange_dirty = True
+            elif child._position != center:
+                if child._arrange_dirty:
+                    child._position = Vector2(center)
+                else:
+                    child._translate(center - child._position)
+            if child._arrange_dirty or child._subtree_dirty:
+                child._update()
+            return
+
+        if size is not None and isinstance(child, UIBoxElement):
+            outline = child.style.outline
+            inner_size = size - Vector2(2 * outline, 2 * outline)
+            if child.size != inner_size:
+                child.size = inner_size
+                self._child_sizes[self._child_index[child]] = self._measure(child)
+        if child.position != center:
+            child.position = center
+
+    # The children keep their places relative to the layout
+    def _translate(self, offset: Vector2):
+        self._position += offset
+        self._arranging = True
+        try:
+            for child in self._children:
+                if isinstance(child, Layout):
+                    child._translate(offset)
+                else:
+                    child.position = child.position + offset
+        finally:
+            self._arranging = False
+
+    @property
+    def _inner_rectangle(self) -> tuple[Vector2, Vector2]:
+        padding = Vector2(self._padding, self._padding)
+        return self._position - self._size / 2 + padding, self._size - 2 * padding
+
+    def _measure_content(self) -> Vector2:
+        pass
+
+    # Yields the child, the position of its center and its size or None
+    def _placements(self, sizes: list[Vector2]):
+        pass
 
 
+# Puts its children one after the other, from the left or from the top
+class StackLayout(Layout):
+    def __init__(self, is_vertical: bool, position: Union[Vector2, list[float]] = (0, 0), size: Union[Vector2, list[float], None] = None,
+                 spacing: float = 0, padding: float = 0, alignment: int = Layout.CENTER, stretch: bool = False):
+        self._is_vertical = is_vertical
+        self._spacing = spacing
+        self._alignment = alignment
+        self._stretch = stretch
+        super().__init__(position, size, padding)
+
+    @property
+    def is_vertical(self) -> bool:
+        return self._is_vertical
+
+    def _measure_content(self) -> Vector2:
+        sizes = self._measured_sizes()
+        if not sizes:
+            return Vector2(0, 0)
+        along, across = (1, 0) if self._is_vertical else (0, 1)
+        content = Vector2(0, 0)
+        content[along] = sum(size[along] for size in sizes) + self._spacing * (len(sizes) - 1)
+        content[across] = max(size[across] for size in sizes)
+        return content
+
+    def _placements(self, sizes: list[Vector2]):
+        along, across = (1, 0) if self._is_vertical else (0, 1)
+        inner_position, inner_size = self._inner_rectangle
+        cursor = inner_position[along]
+        for child, size in zip(self._children, sizes):
+            given_size = Vector2(size)
+            if self._stretch:
+                given_size[across] = inner_size[across]
+
+            center = Vector2(0, 0)
+            center[along] = cursor + size[along] / 2
+            if self._alignment == Layout.START:
+                center[across] = inner_position[across] + given_size[across] / 2
+            elif self._alignment == Layout.END:
+                center[across] = inner_position[across] + inner_size[across] - given_size[across] / 2
+            else:
+                center[across] = inner_position[across] + inner_size[across] / 2
+            cursor += size[along] + self._spacing
+
+            yield child, center, given_size if self._stretch or isinstance(child, Layout) else None
+
+
+class HorizontalStack(StackLayout):
+    def __init__(self, position: Union[Vector2, list[float]] = (0, 0), size: Union[Vector2, list[float], None] = None,
+                 spacing: float = 0, padding: float = 0, alignment: int = Layout.CENTER, stretch: bool = False):
+        super().__init__(False, position, size, spacing, padding, alignment, stretch)
+
+
+class VerticalStack(StackLayout):
+    def __init__(self, position: Union[Vector2, list[float]] = (0, 0), size: Union[Vector2, list[float], None] = None,
+                 spacing: float = 0, padding: float = 0, alignment: int = Layout.CENTER, stretch: bool = False):
+        super().__init__(True, position, size, spacing, padding, alignment, stretch)
+
+
+# Puts its children row by row into cells of the same size, the size of the largest child if no cell size is given
+class GridLayout(Layout):
+    def __init__(self, columns: int, position: Union[Vector2, list[float]] = (0, 0), size: Union[Vector2, list[float], None] = None,
+                 cell_size: Union[Vector2, list[float], None] = None, spacing: float = 0, padding: float = 0, stretch: bool = False):
+        self._columns = max(1, columns)
+        self._cell_size = None if cell_size is None else Vector2(cell_size[0], cell_size[1])
+        self._spacing = spacing
+        self._stretch = stretch
+        super().__init__(position, size, padding)
+
+    @property
+    def columns(self) -> int:
+        return self._columns
+
+    def _cell(self, sizes: list[Vector2]) -> Vector2:
+        if self._cell_size is not None:
+            return self._cell_size
+        if not sizes:
+            return Vector2(0, 0)
+        return Vector2(max(size.x for size in sizes), max(size.y for size in sizes))
+
+    def _measure_content(self) -> Vector2:
+        sizes = self._measured_sizes()
+        if not sizes:
+            return Vector2(0, 0)
+        cell = self._cell(sizes)
+        columns = min(self._columns, len(sizes))
+        rows = math.ceil(len(sizes) / self._columns)
+        return Vector2(columns * cell.x + (columns - 1) * self._spacing, rows * cell.y + (rows - 1) * self._spacing)
+
+    def _placements(self, sizes: list[Vector2]):
+        cell = self._cell(sizes)
+        inner_position, inner_size = self._inner_rectangle
+        step = cell + Vector2(self._spacing, self._spacing)
+        for i, (child, size) in enumerate(zip(self._children, sizes)):
+            row, column = divmod(i, self._columns)
+            center = inner_position + Vector2(column * step.x, row * step.y) + cell / 2
+            if self._stretch:
+                yield child, center, Vector2(cell)
+            else:
+                yield child, center, size if isinstance(child, Layout) else None
+
+
+# Puts the anchor point of each child, plus an offset, on the same anchor point of the layout
+class AnchorLayout(Layout):
+    def __init__(self, position: Union[Vector2, list[float]] = (0, 0), size: Union[Vector2, list[float], None] = None,
+                 padding: float = 0):
+        self._anchors = {}
+        super().__init__(position, size, padding)
+
+    def add(self, child, anchor: tuple[float, float] = Anchor.CENTER, offset: Union[Vector2, list[float]] = (0, 0)):
+        self._anchors[child] = (anchor, Vector2(offset[0], offset[1]))
+        super().add(child)
+
+    def insert(self, index: int, child, anchor: tuple[float, float] = Anchor.CENTER, offset: Union[Vector2, list[float]] = (0, 0)):
+        self._anchors.setdefault(child, (anchor, Vector2(offset[0], offset[1])))
+        super().insert(index, child)
+
+    def remove(self, child):
+        super().remove(child)
+        del self._anchors[child]
+
+    def _measure_content(self) -> Vector2:
+        sizes = self._measured_sizes()
+        if not sizes:
+            return Vector2(0, 0)
+        return Vector2(max(size.x for size in sizes), max(size.y for size in sizes))
+
+    def _placements(self, sizes: list[Vector2]):
+        inner_position, inner_size = self._inner_rectangle
+        for child, size in zip(self._children, sizes):
+            (anchor_x, anchor_y), offset = self._anchors[child]
+            point = inner_position + Vector2(anchor_x * inner_size.x, anchor_y * inner_size.y) + offset
+            center = point + Vector2((0.5 - anchor_x) * size.x, (0.5 - anchor_y) * size.y)
+            yield child, center, size if isinstance(child, Layout) else None
+
+
+# A value shared between elements and bindings. Subscribers are called with the new value when it really changes,
+# by more than epsilon for numbers. Notifications are batched: they are sent by Reference.flush_notifications,
+# which UIContext.draw_elements calls once per frame. A value that changes and changes back before then notifies nobody.
+# The references aren't owned by a UIContext, so the queue of changes is shared by all of them: the first UIContext
+# drawn in a frame sends the notifications of every reference, whichever elements subscribed. Code that changes
+# references without drawing a UIContext, like a headless script, calls flush_notifications itself:
+# until then the subscribers aren't called and the queue keeps the changed references alive
 class Reference:
-    def __init__(self, value):
-        self.value = value
+    # A binding that keeps changing the references it depends on is stopped after this many rounds
+    MAX_FLUSH_ROUNDS = 16
+
+    # References that changed since the last flush, in the order they changed, of all the UIContexts
+    _changed: list["Reference"] = []
+
+    def __init__(self, value, epsilon: float = 0):
+        self._value = value
+        self._notified_value = value
+        self.epsilon = epsilon
+        self._subscribers = []
+        self._is_changed = False
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        if self._subscribers and not self._is_changed and self._differs(value, self._notified_value):
+            self._is_changed = True
+            Reference._changed.append(self)
+
+    def _differs(self, value, other_value) -> bool:
+        if self.epsilon and isinstance(value, (int, float)) and isinstance(other_value, (int, float)):
+            return abs(value - other_value) > self.epsilon
+        return value != other_value
+
+    # callback(value) is called after every real change of the value. A weak subscription doesn't keep the callback
+    # alive, or the object of a bound method, it ends when they are collected: a lambda subscribed weakly
+    # has to be kept by someone else. Built-in functions and methods can't be subscribed weakly
+    def subscribe(self, callback, weak: bool = False):
+        if weak:
+            if isinstance(callback, types.MethodType):
+                callback = weakref.WeakMethod(callback)
+            elif isinstance(callback, types.BuiltinMethodType):
+                raise TypeError("a built-in function or method can't be subscribed weakly")
+            else:
+                callback = weakref.ref(callback)
+        if not self._subscribers:
+            self._notified_value = self._value
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        for i, subscriber in enumerate(self._subscribers):
+            if subscriber == callback or (isinstance(subscriber, weakref.ref) and subscriber() == callback):
+                del self._subscribers[i]
+                return
+        raise ValueError("callback is not subscribed")
+
+    # A reference that follows function(value), updated when the value changes
+    def derive(self, function, epsilon: float = 0) -> "Reference":
+        derived = Reference(function(self._value), epsilon)
+
+        def update_derived(value):
+            derived.value = function(value)
+        self.subscribe(update_derived)
+        return derived
+
+    # Sends the pending notifications of every reference, of all the UIContexts. Changes made by subscribers
+    # are sent in the next round, returns how many subscribers were called
+    @classmethod
+    def flush_notifications(cls) -> int:
+        notifications = 0
+        rounds = 0
+        while cls._changed:
+            changed, cls._changed = cls._changed, []
+            if rounds == cls.MAX_FLUSH_ROUNDS:
+                warnings.warn("WARNING: references keep changing each other")
+                for reference in changed:
+                    reference._is_changed = False
+                break
+
+            for reference in changed:
+                reference._is_changed = False
+                if not reference._differs(reference._value, reference._notified_value):
+                    continue
+                reference._notified_value = reference._value
+                for callback in list(reference._subscribers):
+                    if isinstance(callback, weakref.ref):
+                        subscriber = callback
+                        callback = subscriber()
+                        if callback is None:
+                            reference._subscribers.remove(subscriber)
+                            continue
+                    callback(reference._value)
+                    notifications += 1
+            rounds += 1
+        return notifications
 
 
 def clamp(x, minimum, maximum):
@@ -554,25 +3576,29 @@ class Slider(UIElement):
 
     SLIDER_LOCK_ON_RADIUS = 5
 
+    # Fraction of the span moved by one step of the mouse wheel
+    MOUSE_WHEEL_STEP = 0.05
+
     def __init__(self, position: Vector2, length: float, is_vertical: bool, tick_mark_text_side,
                  slider_style: UIBoxElementStyle, knob_style: UIBoxElementStyle, tick_mark_style: UIBoxElementStyle,
                  reference_to_variable: Reference,
                  min_value: SliderValue, max_value: SliderValue, default_value: SliderValue,
                  values_to_display: list[SliderValue],
-                 font: Font = default_ui_font_slider_tick_mark, text_color: Union[Pixel, None] = None):
+                 font: Union[Font, None] = None, text_color: Union[Pixel, None] = None):
         super().__init__()
 
         self._is_vertical = is_vertical
         self._tick_mark_text_side = tick_mark_text_side
+        # Created once the value is known
+        self._knob_box = None
 
         self.position = position
-        self.size = Vector2(self.SLIDER_WIDTH, length) if self._is_vertical else Vector2(length, self.SLIDER_WIDTH)
-        self._length = length
+        self.length = length
 
         self.slider_style = slider_style
         self.knob_style = knob_style
         self.tick_mark_style = tick_mark_style
-        self.font = font
+        self.font = font if font is not None else default_slider_tick_mark_font()
         self.text_color = text_color if text_color is not None else self.tick_mark_style.rectangle_color
 
         self.min_value = min_value
@@ -580,9 +3606,20 @@ class Slider(UIElement):
         self.default_value = default_value
         self.values_to_display = values_to_display
 
-        self._value_in_span = default_value.position
+        self._value_in_span = self.reference_value_to_value_in_span(default_value.position)
         self._reference = reference_to_variable
-
+        # The knob follows changes of the reference made outside the slider.
+        # The reference can outlive the slider, like a reference shared between scenes
+        self._reference.subscribe(self._reference_changed, weak=True)
+        self._attached = True
+
+        # The track, the tick marks and the labels are drawn once into a surface,
+        # which is redrawn only when they change. Only the knob is drawn every frame
+        self._static_surface = None
+        self._static_surface_offset = Vector2(0, 0)
+        self._static_surface_key = None
+        knob_size = Vector2(self.KNOB_LENGTH, self.KNOB_WIDTH) if self._is_vertical else Vector2(self.KNOB_WIDTH, self.KNOB_LENGTH)
+        self._knob_box = Box(self.value_in_span_to_position_vector2(self._value_in_span), knob_size, self.knob_style)
 
         self.function_value_in_span_to_value = lambda value_in_span, minimum_value, maximum_value, values: value_in_span
         self.function_value_in_span_lock_to_nearest = _function_value_in_span_lock_to_nearest
@@ -614,6 +3651,12 @@ class Slider(UIElement):
     def length(self):
         return self._length
 
+    @length.setter
+    def length(self, length: float):
+        self._length = length
+        self.size = Vector2(self.SLIDER_WIDTH, length) if self._is_vertical else Vector2(length, self.SLIDER_WIDTH)
+        self._geometry_changed()
+
     @property
     def signed_span(self):
         return self.max_value.position - self.min_value.position
@@ -642,11 +3685,42 @@ class Slider(UIElement):
     def max_point_position(self) -> Vector2:
         return self.position + self.min_point_to_max_point_vector2 / 2
 
+    @property
+    def position(self) -> Vector2:
+        return self._position
+
+    @position.setter
+    def position(self, position: Union[Vector2, list[float]]):
+        self._position = Vector2(position[0], position[1])
+        self._geometry_changed()
+
+    @property
+    def knob_style(self) -> UIBoxElementStyle:
+        return self._knob_style
+
+    @knob_style.setter
+    def knob_style(self, knob_style: UIBoxElementStyle):
+        self._knob_style = knob_style
+        if self._knob_box is not None:
+            self._knob_box.style = knob_style
+            self.invalidate()
+
+    # The knob is moved before the listeners read the new rectangles
+    def _geometry_changed(self):
+        self._arrange_knob()
+        super()._geometry_changed()
+
     @property
     def rectangle_slider(self) -> Rectangle:
         position_up_left_corner = self.position - self.size / 2
         return Rectangle(position_up_left_corner[0], position_up_left_corner[1], self.size[0], self.size[1])
 
+    # The knob can be anywhere along the slider
+    @property
+    def bounding_rectangle(self) -> Rectangle:
+        knob_size = self.knob_box.size_with_outline
+        return self.rectangle_slider.inflate(math.ceil(knob_size.x), math.ceil(knob_size.y))
+
     def value_in_span_to_reference_value(self, value_in_span):
         pass
 
@@ -659,7 +3733,10 @@ class Slider(UIElement):
 
     @value_in_span.setter
     def value_in_span(self, value):
+        if value != self._value_in_span:
+            self.invalidate()
         self._value_in_span = value
+        self._arrange_knob()
         self._reference.value = self.value_in_span_to_reference_value(value)
 
     @property
@@ -669,13 +3746,26 @@ class Slider(UIElement):
     @reference_value.setter
     def reference_value(self, reference_value: Union[int, float]):
         self._reference.value = reference_value
-        self._value_in_span = self.reference_value_to_value_in_span(reference_value)
+        self._reference_changed(reference_value)
 
     def get_reference(self) -> Reference:
         return self._reference
 
+    # The slider stops following the reference, it can't be used anymore
+    def detach(self):
+        if self._attached:
+            self._reference.unsubscribe(self._reference_changed)
+            self._attached = False
+
+    def _reference_changed(self, reference_value: Union[int, float]):
+        value_in_span = self.reference_value_to_value_in_span(reference_value)
+        if value_in_span != self._value_in_span:
+            self.invalidate()
+        self._value_in_span = value_in_span
+        self._arrange_knob()
+
     def reset_value(self):
-        self.value_in_span = self.default_value
+        self.reference_value = self.default_value.position
 
     def value_in_span_to_position_vector2(self, value_in_span: float) -> Vector2:
         position = self.min_point_position
@@ -696,12 +3786,19 @@ class Slider(UIElement):
     def position_of_mouse_to_value_in_span(self, mouse_position: Vector2):
         return self.position_of_knob_to_value_in_span(self.projection_float(mouse_position))
 
+    # The same Box is moved along the slider, it must not be modified
     @property
     def knob_box(self) -> Box:
-        knob_size = Vector2(self.KNOB_LENGTH, self.KNOB_WIDTH) if self._is_vertical else Vector2(self.KNOB_WIDTH, self.KNOB_LENGTH)
-        knob = Box(self.value_in_span_to_position_vector2(self.value_in_span), knob_size, self.knob_style)
+        return self._knob_box
 
-        return knob
+    # Moves the knob to the value. Called when the value or the geometry of the slider changes,
+    # and by on_update for the span, whose values can be replaced
+    def _arrange_knob(self):
+        if self._knob_box is None:
+            return
+        knob_position = self.value_in_span_to_position_vector2(self._value_in_span)
+        if self._knob_box.position != knob_position:
+            self._knob_box.position = knob_position
 
     def tick_mark(self, value_in_span) -> Box:
         tick_mark_size = Vector2(self.TICK_MARK_LENGTH, self.TICK_MARK_WIDTH) if self._is_vertical else Vector2(self.TICK_MARK_WIDTH, self.TICK_MARK_LENGTH)
@@ -710,6 +3807,7 @@ class Slider(UIElement):
         return tick_mark
 
     def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
+        self._arrange_knob()
         if not mouse_already_collides_with_another_element and not self.active:
             if point_vs_rect(mouse_position, self.knob_box.rectangle_with_outline) and mouse_key.pressed:
                 self._active = True
@@ -722,37 +3820,86 @@ class Slider(UIElement):
         if self.active and mouse_key.held:
             self.value_in_span = self.position_of_mouse_to_value_in_span(mouse_position)
 
-    def draw(self, surface):
-        draw_rectangle(surface, self.rectangle_slider, self.slider_style.rectangle_color, self.slider_style.outline, self.slider_style.outline_color)
-
-        for list_of_values_to_display in [self.min_value, self.max_value, self.default_value], self.values_to_display:
-            for value_to_display in list_of_values_to_display:
+    @property
+    def mouse_wheel_step(self) -> float:
+        return self.signed_span * self.MOUSE_WHEEL_STEP
+
+    def on_mouse_wheel(self, mouse_position: Vector2, scroll: Vector2) -> bool:
+        if self.active or not point_vs_rect(mouse_position, self.bounding_rectangle):
+            return False
+        minimum = min(self.min_value.position, self.max_value.position)
+        maximum = max(self.min_value.position, self.max_value.position)
+        self.value_in_span = clamp(self.value_in_span + scroll.y * self.mouse_wheel_step, minimum, maximum)
+        return True
+
+    # min_value and max_value are positions in the span, default_value and values_to_display are reference values
+    def tick_marks_with_labels(self) -> list[tuple[Box, Text]]:
+        tick_marks_with_labels = []
+        knob_size_with_outline = self.knob_box.size_with_outline
+        for value_to_display in [self.min_value, self.max_value, self.default_value] + self.values_to_display:
+            if value_to_display is self.min_value or value_to_display is self.max_value:
+                value_in_span = value_to_display.position
+            else:
                 value_in_span = self.reference_value_to_value_in_span(value_to_display.position)
-                tick_mark = self.tick_mark(value_in_span)
-                tick_mark.draw(surface)
-                text_size = Vector2(self.font.size(value_to_display.text)[0], self.font.size(value_to_display.text)[1])
-                tick_mark_text_position = tick_mark.position + \
-                                          self.tick_mark_text_side * self.unit_perpendicular_direction * (
-                                              self.projection_orthogonal_float(self.knob_box.size_with_outline) / 2 +
-                                              self.projection_orthogonal_float(text_size) / 2 +
-                                              self.projection_orthogonal_float(Vector2(self.TEXT_LABEL_OFFSET))
-                                          )
-                #line1point1 = tick_mark.position
-                #line1point2 = line1point1 + self.tick_mark_text_side * self.unit_perpendicular_direction * (
-                #        self.projection_orthogonal_float(self.knob_box.size_with_outline) / 2)
-                #line2point1 = line1point2
-                #line2point2 = line1point2 + self.tick_mark_text_side * self.unit_perpendicular_direction * (
-                #        self.projection_orthogonal_float(text_size) / 2
-                #)
-                #pygame.draw.circle(surface, Color.MAGENTA, line1point1, 2)
-                #pygame.draw.line(surface, Color.WHITE, line1point1, line1point2)
-                #pygame.draw.circle(surface, Color.MAGENTA, line1point2, 2)
-                #pygame.draw.line(surface, Color.WHITE, line2point1, line2point2)
-                #pygame.draw.circle(surface, Color.MAGENTA, line2point2, 2)
-                #additional_offset = self.tick_mark_text_side * self.unit_perpendicular_direction * (self.projection_orthogonal_float(self.knob_box.size) / 2 + self.projection_orthogonal_float(Vector2(self.TEXT_LABEL_OFFSET)))
-                #tick_mark_text_position += additional_offset
-                tick_mark_text = Text(tick_mark_text_position, self.text_color, self.font, value_to_display.text)
-                tick_mark_text.draw(surface)
+            tick_mark = self.tick_mark(value_in_span)
+            text_size = Vector2(measure_text(self.font, value_to_display.text))
+            tick_mark_text_position = tick_mark.position + \
+                                      self.tick_mark_text_side * self.unit_perpendicular_direction * (
+                                          self.projection_orthogonal_float(knob_size_with_outline) / 2 +
+                                          self.projection_orthogonal_float(text_size) / 2 +
+                                          self.projection_orthogonal_float(Vector2(self.TEXT_LABEL_OFFSET))
+                                      )
+            tick_mark_text = Text(tick_mark_text_position, self.text_color, self.font, value_to_display.text)
+            tick_marks_with_labels.append((tick_mark, tick_mark_text))
+
+        return tick_marks_with_labels
+
+    # Everything the static surface depends on, except for the integer part of the position
+    def _static_surface_cache_key(self) -> tuple:
+        return (self.position.x % 1, self.position.y % 1, self._length, self._is_vertical, self._tick_mark_text_side,
+                self.slider_style.cache_key, self.knob_style.cache_key, self.tick_mark_style.cache_key,
+                self.font, color_key(self.text_color),
+                tuple((value.position, value.text) for value in [self.min_value, self.max_value, self.default_value] + self.values_to_display))
+
+    def _render_static_surface(self):
+        tick_marks_with_labels = self.tick_marks_with_labels()
+        rectangle_slider = self.rectangle_slider
+        outline = math.ceil(self.slider_style.outline)
+        rectangle = rectangle_slider.inflate(2 * outline, 2 * outline)
+        for tick_mark, tick_mark_text in tick_marks_with_labels:
+            rectangle.union_ip(tick_mark.visual_rectangle)
+            rectangle.union_ip(tick_mark_text.visual_rectangle)
+        # Covers the rounding of float geometry
+        rectangle.inflate_ip(2, 2)
+
+        static_surface = new_surface(rectangle.size, pygame.SRCALPHA)
+        offset = Vector2(-rectangle.x, -rectangle.y)
+        draw_rectangle(static_surface, rectangle_slider.move(offset), self.slider_style.rectangle_color, self.slider_style.outline, self.slider_style.outline_color)
+        for tick_mark, tick_mark_text in tick_marks_with_labels:
+            tick_mark.position = tick_mark.position + offset
+            tick_mark.draw(static_surface)
+            tick_mark_text.position = tick_mark_text.position + offset
+            tick_mark_text.draw(static_surface)
+
+        self._static_surface = static_surface
+        self._static_surface_offset = Vector2(rectangle.topleft) - self.position
+
+    def static_surface(self) -> tuple[pygame.Surface, Vector2]:
+        key = self._static_surface_cache_key()
+        if key != self._static_surface_key:
+            self._render_static_surface()
+            self._static_surface_key = key
+        return self._static_surface, self.position + self._static_surface_offset
+
+    @property
+    def visual_rectangle(self) -> Rectangle:
+        static_surface, static_surface_position = self.static_surface()
+        rectangle = static_surface.get_rect(topleft=(round(static_surface_position.x), round(static_surface_position.y)))
+        return rectangle.union(self.bounding_rectangle)
+
+    def draw(self, surface):
+        static_surface, static_surface_position = self.static_surface()
+        surface.blit(static_surface, (round(static_surface_position.x), round(static_surface_position.y)))
 
         self.knob_box.draw(surface)
 
@@ -763,7 +3910,7 @@ class SliderFree(Slider):
                  reference_to_variable: Reference,
                  min_value: SliderValue, max_value: SliderValue, default_value: SliderValue,
                  values_to_display: list[SliderValue],
-                 font: Font = default_ui_font_slider_tick_mark, text_color: Union[Pixel, None] = None):
+                 font: Union[Font, None] = None, text_color: Union[Pixel, None] = None):
         super().__init__(position, length, is_vertical, tick_mark_text_side,
                          slider_style, knob_style, tick_mark_style,
                          reference_to_variable,
@@ -783,7 +3930,7 @@ class SliderWithStep(Slider):
                  reference_to_variable: Reference,
                  min_value: SliderValue, max_value: SliderValue, default_value: SliderValue,
                  values_to_display: list[SliderValue],
-                 font: Font = default_ui_font_slider_tick_mark, text_color: Union[Pixel, None] = None):
+                 font: Union[Font, None] = None, text_color: Union[Pixel, None] = None):
         pass
 
     def value_in_span_to_reference_value(self, value_in_span):
@@ -798,19 +3945,471 @@ class SliderDiscrete(Slider):
                  slider_style: UIBoxElementStyle, knob_style: UIBoxElementStyle, tick_mark_style: UIBoxElementStyle,
                  reference_to_variable: Reference,
                  values: list[SliderValue], default_value: SliderValue,
-                 font: Font = default_ui_font_slider_tick_mark, text_color: Union[Pixel, None] = None):
+                 font: Union[Font, None] = None, text_color: Union[Pixel, None] = None):
+        # The span is the indices of the values, the knob snaps to them
+        self.values = values
         super().__init__(position, length, is_vertical, tick_mark_text_side,
                          slider_style, knob_style, tick_mark_style,
                          reference_to_variable,
-                         SliderValue(0, values[0].text), SliderValue(0, values[-1].text), values[], values_to_display,
+                         SliderValue(0, values[0].text), SliderValue(len(values) - 1, values[-1].text), default_value, values[1:-1],
                          font, text_color)
-        self.values = values
 
     def value_in_span_to_reference_value(self, value_in_span):
-        return self.values[int(math.ceil((value_in_span - self.min_value) / (self.max_value.position - self.min_value.position) * len(self.values) - 0.5))]
+        return self.values[int(round(clamp(value_in_span, 0, len(self.values) - 1)))].position
 
     def reference_value_to_value_in_span(self, reference_value: Union[float, int]) -> float:
-        return reference_value
+        return min(range(len(self.values)), key=lambda index: abs(self.values[index].position - reference_value))
+
+    def position_of_mouse_to_value_in_span(self, mouse_position: Vector2):
+        return round(super().position_of_mouse_to_value_in_span(mouse_position))
+
+    @property
+    def mouse_wheel_step(self) -> float:
+        return 1
+
+
+# Shows number_of_rows rows, the text of a row is given by row_text(index) when the row scrolls into view.
+# Only the rows in view exist, as Buttons that are reused for other rows as the list scrolls,
+# and the Buttons draw through the sprite cache, so a row that scrolls back into view isn't rendered again.
+# Pressing a row calls function(index, *args). The scrollbar is a SliderFree over scroll_reference,
+# which is the scrolled distance in pixels
+class ScrollList(UIBoxElement):
+    # The rows move with the list
+    GEOMETRY_STORE_COMPATIBLE = False
+
+    SCROLLBAR_WIDTH = Slider.KNOB_LENGTH + 4
+    MOUSE_WHEEL_ROWS = 3
+
+    def __init__(self, position: Vector2, size: Vector2, style: UIBoxElementStyle,
+                 row_height: int, number_of_rows: int, row_text,
+                 row_style_idle: UIBoxElementStyle, row_style_hovered: UIBoxElementStyle,
+                 slider_style: UIBoxElementStyle, knob_style: UIBoxElementStyle,
+                 font: Union[Font, None] = None, antialiasing: bool = False,
+                 scroll_reference: Union[Reference, None] = None,
+                 function=None, *args):
+        self._rows: list[Button] = []
+        self._row_indices: list[Union[int, None]] = []
+        self._scrollbar = None
+        super().__init__(position, size, style)
+
+        self.row_height = row_height
+        self._number_of_rows = number_of_rows
+        self.row_text = row_text
+        self.row_style_idle = row_style_idle
+        self.row_style_hovered = row_style_hovered
+        self.font = font if font is not None else default_slider_tick_mark_font()
+        self.antialiasing = antialiasing
+        self.function = function
+        self.arguments = args
+
+        self._scroll = scroll_reference if scroll_reference is not None else Reference(0)
+        self._scroll.subscribe(self._scroll_changed, weak=True)
+        self._attached = True
+        self._scrollbar = SliderFree(Vector2(0, 0), 1, True, Slider.RIGHT,
+                                     slider_style, knob_style, EMPTY_UI_BOX_ELEMENT_STYLE,
+                                     self._scroll,
+                                     SliderValue(0, SliderValue.EMPTY), SliderValue(1, SliderValue.EMPTY),
+                                     SliderValue(self._scroll.value, SliderValue.EMPTY), [],
+                                     self.font, Color.WHITE)
+        self._scrollbar.add_redraw_listener(self._on_part_invalidated)
+        self._arrange()
+
+    @property
+    def number_of_rows(self) -> int:
+        return self._number_of_rows
+
+    @number_of_rows.setter
+    def number_of_rows(self, number_of_rows: int):
+        self._number_of_rows = number_of_rows
+        if self._scroll.value > self.maximum_scroll:
+            self._scroll.value = self.maximum_scroll
+        self.refresh()
+
+    @property
+    def scroll_reference(self) -> Reference:
+        return self._scroll
+
+    # The list and its scrollbar stop following the scroll reference, the list can't be used anymore
+    def detach(self):
+        if self._attached:
+            self._scroll.unsubscribe(self._scroll_changed)
+            self._scrollbar.detach()
+            self._attached = False
+
+    # Must be called when the texts of the rows change, they are asked for again
+    def refresh(self):
+        self._row_indices = [None] * len(self._rows)
+        self._arrange()
+        self.invalidate()
+
+    # The scrollbar is on the right of the rows
+    @property
+    def view_rectangle(self) -> Rectangle:
+        rectangle = self.rectangle
+        return Rectangle(rectangle.x, rectangle.y, max(0, rectangle.width - self.SCROLLBAR_WIDTH), rectangle.height)
+
+    @property
+    def maximum_scroll(self) -> int:
+        return max(0, self._number_of_rows * self.row_height - self.rectangle.height)
+
+    # The list is scrolled by whole pixels, so the rows keep the same sprites
+    @property
+    def scroll(self) -> int:
+        return round(clamp(self._scroll.value, 0, self.maximum_scroll))
+
+    @property
+    def scrollbar_visible(self) -> bool:
+        return self.maximum_scroll > 0
+
+    def scroll_to_row(self, index: int):
+        self._scroll.value = clamp(index * self.row_height, 0, self.maximum_scroll)
+        self._arrange()
+
+    def _scroll_changed(self, scroll: float):
+        self._arrange()
+        self.invalidate()
+
+    def _on_part_invalidated(self, element: UIElement):
+        self.invalidate()
+
+    def _row_pressed(self, slot: int):
+        if self.function is not None:
+            self.function(self._row_indices[slot], *self.arguments)
+
+    def _arrange_scrollbar(self):
+        if self._scrollbar is None:
+            return
+        rectangle = self.rectangle
+        position = Vector2(rectangle.right - self.SCROLLBAR_WIDTH / 2, rectangle.centery)
+        if self._scrollbar.position != position:
+            self._scrollbar.position = position
+        length = max(1, rectangle.height - 2 * Slider.KNOB_WIDTH)
+        if self._scrollbar.length != length:
+            self._scrollbar.length = length
+        # The slider needs a span, it isn't shown while there is nothing to scroll
+        maximum_scroll = max(1, self.maximum_scroll)
+        if self._scrollbar.max_value.position != maximum_scroll:
+            self._scrollbar.max_value = SliderValue(maximum_scroll, SliderValue.EMPTY)
+            self._scrollbar.invalidate()
+
+    # Each row shown has its own slot, row index % number of slots, so a row keeps its Button while it is in view
+    def _visible_slots(self) -> range:
+        if not self._rows:
+            return range(0)
+        first_index = self.scroll // self.row_height
+        last_index = min(self._number_of_rows, first_index + len(self._rows))
+        return range(first_index, last_index)
+
+    def _arrange(self):
+        view_rectangle = self.view_rectangle
+        number_of_slots = math.ceil(view_rectangle.height / self.row_height) + 1
+        row_size = Vector2(view_rectangle.width, self.row_height)
+        if len(self._rows) != number_of_slots:
+            for row in self._rows:
+                row.remove_redraw_listener(self._on_part_invalidated)
+            self._rows = [Button(Vector2(0, 0), row_size, self.row_style_idle, self.row_style_hovered,
+                                 "", self.font, self.antialiasing, self._row_pressed, slot)
+                          for slot in range(number_of_slots)]
+            self._row_indices = [None] * number_of_slots
+            for row in self._rows:
+                row.add_redraw_listener(self._on_part_invalidated)
+
+        scroll = self.scroll
+        for index in self._visible_slots():
+            slot = index % number_of_slots
+            row = self._rows[slot]
+            if self._row_indices[slot] != index:
+                self._row_indices[slot] = index
+                row.text = self.row_text(index)
+            position = Vector2(view_rectangle.centerx, view_rectangle.top + index * self.row_height - scroll + self.row_height / 2)
+            if row.position != position:
+                row.position = position
+            if row.size != row_size:
+                row.size = row_size
+        self._arrange_scrollbar()
+
+    # The rows and the scrollbar are moved before the listeners read the new rectangles
+    def _geometry_changed(self):
+        if self._scrollbar is not None:
+            self._arrange()
+        super()._geometry_changed()
+
+    @property
+    def bounding_rectangle(self) -> Rectangle:
+        return self.rectangle_with_outline.union(self._scrollbar.bounding_rectangle)
+
+    @property
+    def visual_rectangle(self) -> Rectangle:
+        return self.rectangle_with_outline.union(self._scrollbar.visual_rectangle)
+
+    # Only the part of a row inside the view can be hovered
+    def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
+        mouse_is_taken = mouse_already_collides_with_another_element
+        self._active = False
+        if self.scrollbar_visible:
+            self._scrollbar.on_update(mouse_is_taken, mouse_position, mouse_key, delta_time_seconds)
+            if self._scrollbar.active:
+                self._active = True
+                mouse_is_taken = True
+        self._arrange()
+
+        mouse_is_taken = mouse_is_taken or not point_vs_rect(mouse_position, self.view_rectangle)
+        for index in self._visible_slots():
+            row = self._rows[index % len(self._rows)]
+            row.on_update(mouse_is_taken, mouse_position, mouse_key, delta_time_seconds)
+            if row.collides_with_mouse:
+                mouse_is_taken = True
+            if row.active:
+                self._active = True
+
+        self._collides_with_mouse = not mouse_already_collides_with_another_element and \
+            (point_vs_rect(mouse_position, self.rectangle_with_outline) or self._scrollbar.collides_with_mouse or self._scrollbar.active)
+
+    def on_mouse_wheel(self, mouse_position: Vector2, scroll: Vector2) -> bool:
+        if not point_vs_rect(mouse_position, self.rectangle_with_outline) or not self.scrollbar_visible:
+            return False
+        self._scroll.value = clamp(self.scroll - scroll.y * self.MOUSE_WHEEL_ROWS * self.row_height, 0, self.maximum_scroll)
+        self._arrange()
+        return True
+
+    def draw(self, surface):
+        draw_rectangle(surface, self.rectangle, self.style.rectangle_color, self.style.outline, self.style.outline_color)
+
+        previous_clip = surface.get_clip()
+        view_rectangle = self.view_rectangle.clip(previous_clip)
+        if view_rectangle.width > 0 and view_rectangle.height > 0:
+            surface.set_clip(view_rectangle)
+            for index in self._visible_slots():
+                self._rows[index % len(self._rows)].draw(surface)
+            surface.set_clip(previous_clip)
+
+        if self.scrollbar_visible:
+            self._scrollbar.draw(surface)
+
+
+# Curves from the fraction of the duration elapsed to the fraction of the change done,
+# each one is applied to the array of all the tweens using it
+class Easing:
+    LINEAR = 0
+    EASE_IN = 1
+    EASE_OUT = 2
+    EASE_IN_OUT = 3
+    EASE_OUT_BACK = 4
+
+    BACK_OVERSHOOT = 1.70158
+
+    FUNCTIONS = {
+        LINEAR: lambda t: t,
+        EASE_IN: lambda t: t * t,
+        EASE_OUT: lambda t: t * (2 - t),
+        EASE_IN_OUT: lambda t: numpy.where(t < 0.5, 2 * t * t, 1 - (2 - 2 * t) ** 2 / 2),
+        EASE_OUT_BACK: lambda t: 1 + (Easing.BACK_OVERSHOOT + 1) * (t - 1) ** 3 + Easing.BACK_OVERSHOOT * (t - 1) ** 2,
+    }
+
+
+# Tweens the position and size of elements, colors of styles and values of sliders over time.
+# Each tween is a row of arrays, all of them are advanced together by update(delta_time_seconds),
+# then only the targets of the tweens that started are set, as by their setters.
+# Positions of elements in a GeometryStore are written into its array together, the other elements are moved
+# one by one through their position setter. Starting a tween of a target that is already animated replaces the tween.
+# Requires numpy
+class Animator:
+    POSITION = 0
+    SIZE = 1
+    COLOR = 2
+    SLIDER_VALUE = 3
+
+    INITIAL_CAPACITY = 64
+    # A color has the most components
+    MAX_COMPONENTS = 4
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        if numpy is None:
+            raise ImportError("Animator requires numpy")
+        capacity = max(1, capacity)
+        self._start = numpy.zeros((capacity, self.MAX_COMPONENTS))
+        self._change = numpy.zeros((capacity, self.MAX_COMPONENTS))
+        self._elapsed = numpy.zeros(capacity)
+        self._duration = numpy.ones(capacity)
+        self._easing = numpy.zeros(capacity, dtype=numpy.intp)
+        self._kinds = numpy.zeros(capacity, dtype=numpy.intp)
+
+        # (kind, animated object, style attribute) of each row
+        self._targets: list[tuple] = []
+        self._elements_to_invalidate: list[list[UIElement]] = []
+        self._on_finished: list = []
+        self._row_of_target: dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._elapsed)
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name in ("_start", "_change", "_elapsed", "_duration", "_easing", "_kinds"):
+            array = getattr(self, name)
+            grown_array = numpy.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown_array[:len(array)] = array
+            setattr(self, name, grown_array)
+
+    def _add(self, target: tuple, start, end, duration: float, easing: int, delay: float,
+             elements_to_invalidate: list[UIElement], on_finished):
+        if easing not in Easing.FUNCTIONS:
+            warnings.warn("WARNING: easing is incorrect")
+            easing = Easing.LINEAR
+        row = self._row_of_target.get(target)
+        if row is None:
+            if len(self._targets) == self.capacity:
+                self._grow()
+            row = len(self._targets)
+            self._targets.append(target)
+            self._elements_to_invalidate.append(elements_to_invalidate)
+            self._on_finished.append(on_finished)
+            self._row_of_target[target] = row
+        else:
+            self._elements_to_invalidate[row] = elements_to_invalidate
+            self._on_finished[row] = on_finished
+
+        self._start[row] = 0
+        self._change[row] = 0
+        self._start[row, :len(start)] = start
+        self._change[row, :len(start)] = numpy.subtract(end, start)
+        self._elapsed[row] = -delay
+        # A tween without duration ends on the next update with time
+        self._duration[row] = max(duration, 1e-9)
+        self._easing[row] = easing
+        self._kinds[row] = target[0]
+
+    # on_finished() is called once the element reached the position
+    def move(self, element: UIBoxElement, position: Union[Vector2, list[float]], duration: float,
+             easing: int = Easing.EASE_IN_OUT, delay: float = 0, on_finished=None):
+        current_position = element.position
+        self._add((self.POSITION, element, None), (current_position.x, current_position.y), (position[0], position[1]),
+                  duration, easing, delay, [], on_finished)
+
+    def resize(self, element: UIBoxElement, size: Union[Vector2, list[float]], duration: float,
+               easing: int = Easing.EASE_IN_OUT, delay: float = 0, on_finished=None):
+        current_size = element.size
+        self._add((self.SIZE, element, None), (current_size.x, current_size.y), (size[0], size[1]),
+                  duration, easing, delay, [], on_finished)
+
+    # The style is modified in place, so every element using it changes color, the elements given are invalidated.
+    # attribute is "rectangle_color", "content_color" or "outline_color"
+    def fade(self, style: UIBoxElementStyle, attribute: str, color: Pixel, elements: list[UIElement], duration: float,
+             easing: int = Easing.EASE_IN_OUT, delay: float = 0, on_finished=None):
+        current_color = getattr(style, attribute)
+        if current_color is None:
+            warnings.warn("WARNING: the color to fade from is None")
+            current_color = color
+        self._add((self.COLOR, style, attribute), tuple(Pixel(current_color)), tuple(Pixel(color)),
+                  duration, easing, delay, list(elements), on_finished)
+
+    def slide(self, slider: Slider, reference_value: float, duration: float,
+              easing: int = Easing.EASE_IN_OUT, delay: float = 0, on_finished=None):
+        self._add((self.SLIDER_VALUE, slider, None), (slider.reference_value,), (reference_value,),
+                  duration, easing, delay, [], on_finished)
+
+    def is_animated(self, animated_object) -> bool:
+        return any(target[1] is animated_object for target in self._targets)
+
+    # The tweens of the object end where they are, without calling on_finished
+    def stop(self, animated_object):
+        keep = numpy.fromiter((target[1] is not animated_object for target in self._targets), dtype=bool, count=len(self._targets))
+        self._keep_rows(keep)
+
+    def _keep_rows(self, keep):
+        n = len(self._targets)
+        rows = numpy.flatnonzero(keep)
+        for name in ("_start", "_change", "_elapsed", "_duration", "_easing", "_kinds"):
+            array = getattr(self, name)
+            array[:len(rows)] = array[:n][rows]
+        rows = rows.tolist()
+        self._targets = [self._targets[row] for row in rows]
+        self._elements_to_invalidate = [self._elements_to_invalidate[row] for row in rows]
+        self._on_finished = [self._on_finished[row] for row in rows]
+        self._row_of_target = {target: row for row, target in enumerate(self._targets)}
+
+    # Returns how many tweens were running. An update without time, like the ones the InputDispatcher makes
+    # between the frames, changes nothing
+    def update(self, delta_time_seconds: float) -> int:
+        n = len(self._targets)
+        if n == 0 or delta_time_seconds == 0:
+            return 0
+        elapsed = self._elapsed[:n]
+        elapsed += delta_time_seconds
+        rows = numpy.flatnonzero(elapsed >= 0)
+        if len(rows) == 0:
+            return 0
+
+        fractions = numpy.minimum(elapsed[rows] / self._duration[rows], 1)
+        eased = numpy.empty_like(fractions)
+        easings = self._easing[rows]
+        for easing in numpy.unique(easings).tolist():
+            mask = easings == easing
+            eased[mask] = Easing.FUNCTIONS[easing](fractions[mask])
+        values = self._start[rows] + self._change[rows] * eased[:, None]
+
+        self._apply(rows, values)
+
+        finished_rows = rows[fractions >= 1]
+        if len(finished_rows):
+            on_finished = [self._on_finished[row] for row in finished_rows.tolist()]
+            keep = numpy.ones(n, dtype=bool)
+            keep[finished_rows] = False
+            self._keep_rows(keep)
+            # The functions can start new tweens
+            for function in on_finished:
+                if function is not None:
+                    function()
+        return len(rows)
+
+    # Each kind of tween is applied to all of its rows together
+    def _apply(self, rows, values):
+        kinds = self._kinds[rows]
+        for kind in numpy.unique(kinds).tolist():
+            mask = kinds == kind
+            kind_rows = rows[mask].tolist()
+            kind_values = values[mask]
+            animated_objects = [self._targets[row][1] for row in kind_rows]
+            if kind == self.POSITION:
+                self._apply_positions(animated_objects, kind_values)
+            elif kind == self.SIZE:
+                for element, (width, height) in zip(animated_objects, kind_values[:, :2].tolist()):
+                    element.size = (width, height)
+            elif kind == self.COLOR:
+                colors = numpy.clip(numpy.rint(kind_values), 0, 255).astype(int).tolist()
+                for row, style, color in zip(kind_rows, animated_objects, colors):
+                    setattr(style, self._targets[row][2], Pixel(*color))
+                    for element in self._elements_to_invalidate[row]:
+                        element.invalidate()
+            elif kind == self.SLIDER_VALUE:
+                for slider, value in zip(animated_objects, kind_values[:, 0].tolist()):
+                    slider.reference_value = value
+
+    # The rows of the elements of a geometry store are written with one array operation, then the elements are
+    # notified as by their position setter, which every other element that has a position goes through
+    def _apply_positions(self, elements: list, values):
+        geometry_stores = [getattr(element, "_geometry_store", None) for element in elements]
+        different_geometry_stores = set(geometry_stores)
+        for geometry_store in different_geometry_stores:
+            if len(different_geometry_stores) == 1:
+                mask = slice(None)
+                stored_elements = elements
+            else:
+                mask = numpy.fromiter((stored_in is geometry_store for stored_in in geometry_stores), dtype=bool, count=len(elements))
+                stored_elements = [element for element, stored_in in zip(elements, geometry_stores) if stored_in is geometry_store]
+            if geometry_store is None:
+                for element, position in zip(stored_elements, values[mask, :2].tolist()):
+                    element.position = position
+                continue
+
+            geometry_rows = numpy.fromiter((element._geometry_row for element in stored_elements), dtype=numpy.intp, count=len(stored_elements))
+            geometry_store.positions[geometry_rows] = values[mask, :2]
+            for element in stored_elements:
+                element._position_changed()
 
 
 class SliderLegacy:
@@ -972,7 +4571,7 @@ _checkStyleInfo = {
 }
 
 
-class Checkbox:
+class CheckboxLegacy:
     """
     Checkbox (Tickbox)
 
@@ -1019,23 +4618,432 @@ class Checkbox:
             self.draw_check(self, surface, self.pos, checkColor)
 
     def draw_text(self, surface, textColor, font, text, place, antialiasing=0):
-        textSurface = font.render(text, antialiasing, textColor)
+        textSurface = render_text(font, text, antialiasing, textColor)
         textPos = self.pos[:]
         if place == Direction.UP:
-            textPos[0] += (self.boxSide // 2 - font.size(text)[0] // 2)
-            textPos[1] -= (self.outlineThickness + font.size(text)[1] + font.size(" ")[1])
+            textPos[0] += (self.boxSide // 2 - measure_text(font, text)[0] // 2)
+            textPos[1] -= (self.outlineThickness + measure_text(font, text)[1] + measure_text(font, " ")[1])
         elif place == Direction.DOWN:
-            textPos[0] += (self.boxSide // 2 - font.size(text)[0] // 2)
-            textPos[1] += self.boxSide + self.outlineThickness + font.size(" ")[1]
+            textPos[0] += (self.boxSide // 2 - measure_text(font, text)[0] // 2)
+            textPos[1] += self.boxSide + self.outlineThickness + measure_text(font, " ")[1]
         elif place == Direction.RIGHT:
-            textPos[0] += self.boxSide + self.outlineThickness + font.size(" ")[0]
-            textPos[1] += (self.boxSide // 2 - font.size(text)[1] // 2)
+            textPos[0] += self.boxSide + self.outlineThickness + measure_text(font, " ")[0]
+            textPos[1] += (self.boxSide // 2 - measure_text(font, text)[1] // 2)
         elif place == Direction.LEFT:
-            textPos[0] -= (self.outlineThickness + font.size(text)[0] + font.size(" ")[0])
-            textPos[1] += (self.boxSide // 2 - font.size(text)[1] // 2)
+            textPos[0] -= (self.outlineThickness + measure_text(font, text)[0] + measure_text(font, " ")[0])
+            textPos[1] += (self.boxSide // 2 - measure_text(font, text)[1] // 2)
         surface.blit(textSurface, textPos)
 
     def color(self, boxColorIfTrue, boxColorIfFalse):
         if self.state:
             return boxColorIfTrue
         return boxColorIfFalse
+
+
+# The check glyph of each check style, box side and color is rendered once and shared between all the checkboxes.
+# The glyph is drawn by the same functions as the legacy checkbox, which read its geometry from the checkbox
+def check_glyph(check_style: str, box_side: int, color: Pixel) -> pygame.Surface:
+    def render_glyph() -> pygame.Surface:
+        checkbox = CheckboxLegacy((0, 0), box_side, 0, True, check_style)
+        glyph = new_surface((box_side + 1, box_side + 1), pygame.SRCALPHA)
+        checkbox.draw_check(checkbox, glyph, checkbox.pos, color)
+        return to_display_format(glyph)
+
+    return sprite_cache.get(("check glyph", check_style, box_side, color_key(color)), render_glyph)
+
+
+class Checkbox(Box):
+    """
+    Checkbox (Tickbox) that toggles when clicked.
+
+    The style draws the box, its content color is the color of the check.
+
+    Available check styles:
+    "check1",
+    "check2",
+    "check3",
+    "cross1",
+    "cross2",
+    "box",
+    """
+
+    def __init__(self, position: Vector2, box_side: float, style: UIBoxElementStyle,
+                 checked: bool = False, check_style: str = "check1",
+                 text: str = "", font: Union[Font, None] = None, text_side=Direction.RIGHT,
+                 function=null_function, *args):
+        super().__init__(position, Vector2(box_side, box_side), style)
+        # Without a check style the checkbox is drawn empty
+        if check_style not in _checkStyleInfo:
+            warnings.warn("WARNING: check_style is incorrect")
+            check_style = None
+
+        self._checked = checked
+        self.check_style = check_style
+        self.text = text
+        self.font = font if font is not None else default_font()
+        self.text_side = text_side
+
+        self.function = function
+        self.arguments = args
+
+    @property
+    def checked(self) -> bool:
+        return self._checked
+
+    @checked.setter
+    def checked(self, checked: bool):
+        if checked != self._checked:
+            self._checked = checked
+            self.invalidate()
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+        self.invalidate()
+
+    # Relative to the up left corner of the rectangle, the text is one space away from the outline
+    def _text_offset(self) -> tuple[int, int]:
+        rectangle = self.rectangle
+        outline = math.ceil(self.style.outline)
+        text_width, text_height = measure_text(self.font, self.text)
+        space_width, space_height = measure_text(self.font, " ")
+        if self.text_side == Direction.UP:
+            return rectangle.width // 2 - text_width // 2, -(outline + text_height + space_height)
+        elif self.text_side == Direction.DOWN:
+            return rectangle.width // 2 - text_width // 2, rectangle.height + outline + space_height
+        elif self.text_side == Direction.LEFT:
+            return -(outline + text_width + space_width), rectangle.height // 2 - text_height // 2
+        return rectangle.width + outline + space_width, rectangle.height // 2 - text_height // 2
+
+    @property
+    def text_rectangle(self) -> Union[Rectangle, None]:
+        if not self.text:
+            return None
+        rectangle = self.rectangle
+        x, y = self._text_offset()
+        return pygame.Rect((rectangle.x + x, rectangle.y + y), measure_text(self.font, self.text))
+
+    @property
+    def visual_rectangle(self) -> Rectangle:
+        text_rectangle = self.text_rectangle
+        if text_rectangle is None:
+            return self.rectangle_with_outline
+        return self.rectangle_with_outline.union(text_rectangle)
+
+    def _sprite_key(self) -> tuple:
+        return super()._sprite_key() + (self.checked, self.check_style, self.text, self.font, self.text_side)
+
+    def _sprite_rectangle(self) -> Rectangle:
+        text_rectangle = self.text_rectangle
+        if text_rectangle is None:
+            return super()._sprite_rectangle()
+        return super()._sprite_rectangle().union(text_rectangle)
+
+    def draw_shapes(self, surface: pygame.Surface, offset: tuple[int, int] = (0, 0)):
+        super().draw_shapes(surface, offset)
+
+        rectangle = self.rectangle.move(offset)
+        if self.checked and self.check_style is not None:
+            surface.blit(check_glyph(self.check_style, rectangle.width, self.style.content_color), rectangle.topleft)
+        if self.text:
+            x, y = self._text_offset()
+            text_surface = render_text(self.font, self.text, self.style.antialiasing, self.style.content_color)
+            surface.blit(text_surface, (rectangle.x + x, rectangle.y + y))
+
+    def on_update(self, mouse_already_collides_with_another_element: bool, mouse_position: Vector2, mouse_key: Key, delta_time_seconds: float):
+        self._collides_with_mouse = not mouse_already_collides_with_another_element and point_vs_rect(mouse_position, self.rectangle_with_outline)
+        self._active = self.collides_with_mouse and mouse_key.pressed
+        if self.active:
+            self.checked = not self.checked
+            self.function(*self.arguments)
+
+
+# What load_scene returns: the UIContext and what its elements were built from, by name
+class Scene:
+    def __init__(self, ui_context: UIContext, elements: dict[str, UIElement], references: dict[str, Reference],
+                 styles: dict[str, UIBoxElementStyle], fonts: dict[str, Font]):
+        self.ui_context = ui_context
+        self.elements = elements
+        self.references = references
+        self.styles = styles
+        self.fonts = fonts
+
+
+# Builds a UIContext from a declarative scene, a JSON or TOML file or the dict read from one:
+#   "context": the arguments of UIContext other than number_of_layers
+#   "fonts": {name: {"path": ..., "size": ...}}, "default" and "slider_tick_mark" are the default fonts
+#   "styles": {name: the arguments of UIBoxElementStyle}, colors are names, "#rrggbb" or [r, g, b] or [r, g, b, a]
+#   "references": {name: value}, the references of the sliders, created if they aren't given to load
+#   "layers": [{"cached": false, "elements": [...]}, ...], the front layer first
+# An element is a dict of its "type", an optional "id" and the arguments of its class by name. Fonts and styles are
+# given by name, functions by their name in functions, the sides of sliders and checkboxes as "up", "right", "down"
+# or "left". A missing size, length or box_side, or an unknown name, warns and falls back to a default.
+# Relative font paths are relative to the scene file, or to the package for a dict. With a raster cache,
+# the static surfaces of the elements, sprites of boxes, texts and tracks of sliders, are rasterized while loading,
+# or loaded from the cache if a previous run rasterized them. The cache knows a scene by the path of its file,
+# or by its "name" for a dict
+class SceneLoader:
+    ELEMENT_TYPES = ("Text", "Box", "TextBox", "Button", "TextButton", "SliderFree", "Checkbox")
+
+    SLIDER_SIDES = {"up": Slider.UP, "right": Slider.RIGHT, "down": Slider.DOWN, "left": Slider.LEFT}
+    DIRECTIONS = {"up": Direction.UP, "right": Direction.RIGHT, "down": Direction.DOWN, "left": Direction.LEFT}
+
+    DEFAULT_SIZE = (100, 40)
+    DEFAULT_LENGTH = 100
+    DEFAULT_BOX_SIDE = 24
+
+    def __init__(self, functions: Union[dict, None] = None, references: Union[dict[str, Reference], None] = None,
+                 raster_cache: Union[RasterCache, None] = None):
+        self.functions = functions if functions is not None else {}
+        self.references = references if references is not None else {}
+        self.raster_cache = raster_cache
+
+        self._directory = ""
+        self._scene = ""
+        self._fonts: dict[str, Font] = {}
+        self._styles: dict[str, UIBoxElementStyle] = {}
+        self._file_hashes: dict[str, str] = {}
+        self._surfaces: dict[tuple, Union[tuple[pygame.Surface, tuple[float, float]], None]] = {}
+
+    @staticmethod
+    def read(path: str) -> dict:
+        if path.endswith(".toml"):
+            if tomllib is None:
+                raise ImportError("TOML scenes require tomllib, Python 3.11 or later")
+            with open(path, "rb") as file:
+                return tomllib.load(file)
+        with open(path) as file:
+            return json.load(file)
+
+    def load(self, definition: Union[str, dict]) -> Scene:
+        if isinstance(definition, str):
+            self._scene = os.path.abspath(definition)
+            self._directory = os.path.dirname(self._scene)
+            definition = self.read(definition)
+        else:
+            self._scene = definition.get("name", "")
+
+        self._fonts = {"default": default_font(), "slider_tick_mark": default_slider_tick_mark_font()}
+        for name, font_definition in definition.get("fonts", {}).items():
+            self._fonts[name] = load_font(os.path.join(self._directory, font_definition["path"]), font_definition["size"])
+
+        self._styles = {name: UIBoxElementStyle(self._color(style_definition.get("rectangle_color")),
+                                                self._color(style_definition.get("content_color")),
+                                                style_definition.get("outline", 0),
+                                                self._color(style_definition.get("outline_color")),
+                                                style_definition.get("antialiasing", False))
+                        for name, style_definition in definition.get("styles", {}).items()}
+
+        for name, value in definition.get("references", {}).items():
+            if name not in self.references:
+                self.references[name] = Reference(value)
+
+        layer_definitions = definition.get("layers", [])
+        ui_context = UIContext(max(1, len(layer_definitions)), **definition.get("context", {}))
+        elements = {}
+        for layer, layer_definition in zip(ui_context.layers, layer_definitions):
+            layer.cached = layer_definition.get("cached", False)
+            for element_definition in layer_definition.get("elements", []):
+                element = self.build_element(element_definition)
+                if element is None:
+                    continue
+                if self.raster_cache is not None:
+                    self.rasterize(element)
+                layer.add_element(element)
+                if "id" in element_definition:
+                    if element_definition["id"] in elements:
+                        warnings.warn(f"WARNING: the id {element_definition['id']} is used by several elements")
+                    elements[element_definition["id"]] = element
+        if self.raster_cache is not None:
+            self.raster_cache.flush()
+            self.raster_cache.close()
+
+        return Scene(ui_context, elements, self.references, self._styles, self._fonts)
+
+    # What the pixels drawn with a font depend on: the font file and the size.
+    # Raises KeyError for a font that wasn't loaded through the font registry
+    def _font_content(self, font: Font) -> tuple[str, int]:
+        path_and_size = font_registry.path_and_size(font)
+        if path_and_size is None:
+            raise KeyError(font)
+        path, size = path_and_size
+        file_hash = self._file_hashes.get(path)
+        if file_hash is None:
+            with open(path, "rb") as file:
+                file_hash = self._file_hashes[path] = hashlib.sha256(file.read()).hexdigest()
+        return file_hash, size
+
+    @staticmethod
+    def _color(value) -> Union[Pixel, None]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return Pixel(value)
+        return Pixel(*value)
+
+    def _font(self, name: Union[str, None]) -> Font:
+        if name is None:
+            return default_font()
+        font = self._fonts.get(name)
+        if font is None:
+            warnings.warn(f"WARNING: there is no font {name}")
+            return default_font()
+        return font
+
+    def _style(self, name: Union[str, None]) -> UIBoxElementStyle:
+        style = self._styles.get(name)
+        if style is None:
+            warnings.warn(f"WARNING: there is no style {name}")
+            return EMPTY_UI_BOX_ELEMENT_STYLE
+        return style
+
+    def _function(self, name: Union[str, None]):
+        if name is None:
+            return null_function
+        function = self.functions.get(name)
+        if function is None:
+            warnings.warn(f"WARNING: there is no function {name}")
+            return null_function
+        return function
+
+    @staticmethod
+    def _required(definition: dict, key: str, default):
+        value = definition.get(key)
+        if value is None:
+            warnings.warn(f"WARNING: the {definition.get('type', 'slider value')} has no {key}")
+            return default
+        return value
+
+    @staticmethod
+    def _side(sides: dict, name: str, default: str):
+        side = sides.get(name)
+        if side is None:
+            warnings.warn(f"WARNING: the side {name} is incorrect")
+            return sides[default]
+        return side
+
+    def _slider_value(self, value) -> SliderValue:
+        if isinstance(value, dict):
+            return SliderValue(self._required(value, "position", 0), value.get("text", SliderValue.SAME_AS_VALUE))
+        return SliderValue(value)
+
+    def build_element(self, definition: dict) -> Union[UIElement, None]:
+        element_type = definition.get("type")
+        if element_type not in self.ELEMENT_TYPES:
+            warnings.warn(f"WARNING: the element type {element_type} is incorrect")
+            return None
+
+        position = Vector2(definition.get("position", (0, 0)))
+        if element_type == "Text":
+            return Text(position, self._color(definition.get("color", "white")), self._font(definition.get("font")),
+                        definition.get("text", ""), definition.get("antialiasing", False),
+                        definition.get("use_glyph_atlas", False))
+        if element_type == "Box":
+            return Box(position, Vector2(self._required(definition, "size", self.DEFAULT_SIZE)), self._style(definition.get("style")))
+        if element_type == "TextBox":
+            return TextBox(position, Vector2(self._required(definition, "size", self.DEFAULT_SIZE)), self._style(definition.get("style")),
+                           definition.get("text", ""), self._font(definition.get("font")),
+                           definition.get("antialiasing", False))
+        if element_type == "Button":
+            return Button(position, Vector2(self._required(definition, "size", self.DEFAULT_SIZE)),
+                          self._style(definition.get("style_idle")), self._style(definition.get("style_hovered")),
+                          definition.get("text", ""), self._font(definition.get("font")), definition.get("antialiasing", False),
+                          self._function(definition.get("function")), *definition.get("arguments", []))
+        if element_type == "TextButton":
+            return TextButton(position,
+                              self._style(definition.get("style_idle")), self._style(definition.get("style_hovered")),
+                              definition.get("text", ""), self._font(definition.get("font")), definition.get("antialiasing", False),
+                              self._function(definition.get("function")), *definition.get("arguments", []))
+        if element_type == "SliderFree":
+            default_value = self._slider_value(definition.get("default_value", 0))
+            reference_name = definition.get("reference")
+            reference = self.references.get(reference_name)
+            if reference is None:
+                reference = Reference(default_value.position)
+                if reference_name is not None:
+                    self.references[reference_name] = reference
+            return SliderFree(position, self._required(definition, "length", self.DEFAULT_LENGTH), definition.get("is_vertical", False),
+                              self._side(self.SLIDER_SIDES, definition.get("tick_mark_text_side", "down"), "down"),
+                              self._style(definition.get("slider_style")), self._style(definition.get("knob_style")),
+                              self._style(definition.get("tick_mark_style")),
+                              reference,
+                              self._slider_value(definition.get("min_value", 0)), self._slider_value(definition.get("max_value", 1)),
+                              default_value,
+                              [self._slider_value(value) for value in definition.get("values_to_display", [])],
+                              self._font(definition.get("font", "slider_tick_mark")), self._color(definition.get("text_color")))
+        return Checkbox(position, self._required(definition, "box_side", self.DEFAULT_BOX_SIDE), self._style(definition.get("style")),
+                        definition.get("checked", False), definition.get("check_style", "check1"),
+                        definition.get("text", ""), self._font(definition.get("font")),
+                        self._side(self.DIRECTIONS, definition.get("text_side", "right"), "right"),
+                        self._function(definition.get("function")), *definition.get("arguments", []))
+
+    # The same in every run, the fonts and the classes in the key are replaced by what they draw with
+    def _content(self, key: tuple) -> tuple:
+        return tuple(self._font_content(item) if isinstance(item, Font) else
+                     item.__qualname__ if isinstance(item, type) else item
+                     for item in key)
+
+    # Loads the surface of the key from the raster cache, or renders it with render() and stores it.
+    # render returns the surface and its offset, or None. Elements with the same key share the surface
+    def _surface(self, kind: str, key: tuple, render) -> Union[tuple[pygame.Surface, tuple[float, float]], None]:
+        if (kind, key) in self._surfaces:
+            return self._surfaces[(kind, key)]
+        try:
+            content_hash = RasterCache.content_hash((kind, self._content(key)))
+        except KeyError:
+            # Drawn with a font the loader doesn't know the file of
+            content_hash = None
+
+        surface = None if content_hash is None else self.raster_cache.load(content_hash, self._scene)
+        if surface is None:
+            surface = render()
+            if surface is not None and content_hash is not None:
+                self.raster_cache.save(content_hash, surface[0], surface[1], self._scene)
+        self._surfaces[(kind, key)] = surface
+        return surface
+
+    # The surfaces the element draws from are put where the element looks for them. Only the state the element
+    # is in is rasterized, the surfaces of the other states, like hovered, are rendered when they are first drawn
+    def rasterize(self, element: UIElement):
+        if isinstance(element, Box):
+            self._rasterize_sprite(element)
+        elif isinstance(element, Text) and not element.use_glyph_atlas:
+            self._rasterize_text(element)
+        elif isinstance(element, Slider):
+            self._rasterize_static_surface(element)
+            self._rasterize_sprite(element.knob_box)
+
+    def _rasterize_sprite(self, element: Box):
+        if not element.CACHE_SPRITES:
+            return
+        key = element._sprite_key()
+        sprite = self._surface("sprite", key, element._render_sprite)
+        if sprite is not None:
+            surface, (x, y) = sprite
+            sprite_cache.put(key, (surface, (int(x), int(y))))
+
+    def _rasterize_text(self, element: Text):
+        key = element._text_surface_cache_key()
+        element._text_surface, _ = self._surface("text", key, lambda: (element.text_surface(), (0, 0)))
+        element._text_surface_key = key
+
+    def _rasterize_static_surface(self, element: Slider):
+        key = element._static_surface_cache_key()
+        static_surface, offset = self._surface("static surface", key,
+                                               lambda: (element.static_surface()[0], tuple(element._static_surface_offset)))
+        element._static_surface = static_surface
+        element._static_surface_offset = Vector2(offset)
+        element._static_surface_key = key
+
+
+# raster_cache is a RasterCache or the path of its file
+def load_scene(definition: Union[str, dict], functions: Union[dict, None] = None,
+               references: Union[dict[str, Reference], None] = None,
+               raster_cache: Union[RasterCache, str, None] = None) -> Scene:
+    if isinstance(raster_cache, str):
+        raster_cache = RasterCache(raster_cache)
+    return SceneLoader(functions, references, raster_cache).load(definition)
@@ -0,0 +1,176 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import time
+import pygame
+import ui
+from ui import Color
+from ui import Vector2
+
+
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+SCENES = ["Button", "TextButton", "TriangleButton", "SliderFree", "Checkbox", "mixed"]
+PERCENTILES = [50, 90, 95, 99]
+
+button_idle_style = ui.UIBoxElementStyle(Color.BLACK, Color.CYAN, 2, Color.CYAN)
+button_hovered_style = ui.UIBoxElementStyle(Color.CYAN, Color.BLACK, 2, Color.BLACK)
+text_button_idle_style = ui.UIBoxElementStyle(None, Color.WHITE)
+text_button_hovered_style = ui.UIBoxElementStyle(None, Color.YELLOW)
+slider_style = ui.UIBoxElementStyle(Color.GREEN, None, 0, None)
+knob_style = ui.UIBoxElementStyle(Color.GREEN, None, 2, Color.WHITE)
+tick_mark_style = ui.UIBoxElementStyle(Color.GREEN, None, 0, None)
+checkbox_style = ui.UIBoxElementStyle(None, Color.GREEN, 2, Color.WHITE)
+
+
+def random_position() -> Vector2:
+    return Vector2(random.uniform(0, SCREEN_WIDTH), random.uniform(0, SCREEN_HEIGHT))
+
+
+def make_element(kind: str):
+    if kind == "Button":
+        return ui.Button(random_position(), Vector2(60, 30),
+                         button_idle_style, button_hovered_style, "OK", ui.default_ui_font, False,
+                         ui.null_function)
+    if kind == "TextButton":
+        return ui.TextButton(random_position(),
+                             text_button_idle_style, text_button_hovered_style, "PLAY", ui.default_ui_font, False,
+                             ui.null_function)
+    if kind == "TriangleButton":
+        return ui.TriangleButton(random_position(), Vector2(40, 40),
+                                 button_idle_style, button_hovered_style, Vector2(1, 1), random.choice([0, 90, 180, 270]), False,
+                                 ui.null_function)
+    if kind == "SliderFree":
+        return ui.SliderFree(random_position(), 150, random.random() < 0.5, ui.Slider.DOWN,
+                             slider_style, knob_style, tick_mark_style,
+                             ui.Reference(0),
+                             ui.SliderValue(-1), ui.SliderValue(1), ui.SliderValue(0),
+                             [])
+    if kind == "Checkbox":
+        return ui.Checkbox(random_position(), 24, checkbox_style, random.random() < 0.5, "check1")
+    raise ValueError(kind)
+
+
+class Scene:
+    def __init__(self, kind: str, number_of_elements: int, number_of_layers: int, context_arguments: dict):
+        random.seed(0)
+        self.ui_context = ui.UIContext(number_of_layers, **context_arguments)
+        kinds = SCENES[:-1] if kind == "mixed" else [kind]
+        for i in range(number_of_elements):
+            self.ui_context.layer(i % number_of_layers).add_element(make_element(kinds[i % len(kinds)]))
+
+    def update_state(self, mouse_position: Vector2, mouse_keys: list[ui.Key], delta_time_seconds: float):
+        self.ui_context.update_state(mouse_position, mouse_keys, delta_time_seconds)
+
+    def draw_elements(self, surface: pygame.Surface):
+        self.ui_context.draw_elements(surface)
+
+
+# The mouse wanders over the screen, pressing and dragging every few frames
+def mouse_states(frames: int):
+    random.seed(1)
+    mouse = ui.ScanHardware(5)
+    key_states = [False] * 5
+    mouse.get_keys_raw_states = lambda: key_states
+    position = random_position()
+    for frame in range(frames):
+        key_states[ui.Mouse.LEFT] = frame % 10 in (3, 4, 5, 6)
+        mouse.update_state()
+        position = Vector2(ui.clamp(position.x + random.uniform(-40, 40), 0, SCREEN_WIDTH),
+                           ui.clamp(position.y + random.uniform(-40, 40), 0, SCREEN_HEIGHT))
+        yield position, mouse.get_pressed()
+
+
+def statistics(seconds: list[float]) -> dict:
+    milliseconds = sorted(second * 1000 for second in seconds)
+    result = {"mean": sum(milliseconds) / len(milliseconds), "min": milliseconds[0], "max": milliseconds[-1]}
+    for percentile in PERCENTILES:
+        index = min(len(milliseconds) - 1, round(percentile / 100 * (len(milliseconds) - 1)))
+        result[f"p{percentile}"] = milliseconds[index]
+    return result
+
+
+def run_scene(kind: str, number_of_elements: int, number_of_layers: int, frames: int, warmup_frames: int,
+              context_arguments: dict, surface: pygame.Surface) -> dict:
+    ui.text_metrics.clear()
+    scene = Scene(kind, number_of_elements, number_of_layers, context_arguments)
+    retained_mode = context_arguments.get("retained_mode", False)
+    update_seconds = []
+    draw_seconds = []
+    for frame, (mouse_position, mouse_keys) in enumerate(mouse_states(warmup_frames + frames)):
+        start = time.perf_counter()
+        scene.update_state(mouse_position, mouse_keys, 1 / 60)
+        update_end = time.perf_counter()
+
+        if not retained_mode:
+            surface.fill(Color.BLACK)
+        draw_start = time.perf_counter()
+        scene.draw_elements(surface)
+        draw_end = time.perf_counter()
+
+        if frame >= warmup_frames:
+            update_seconds.append(update_end - start)
+            draw_seconds.append(draw_end - draw_start)
+
+    return {
+        "scene": kind,
+        "elements": number_of_elements,
+        "layers": number_of_layers,
+        "frames": frames,
+        "update_state_ms": statistics(update_seconds),
+        "draw_elements_ms": statistics(draw_seconds),
+        "text_metrics": {"hits": ui.text_metrics.hits, "misses": ui.text_metrics.misses},
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Headless benchmark of UIContext.update_state and draw_elements")
+    parser.add_argument("--scenes", nargs="+", default=SCENES, choices=SCENES)
+    parser.add_argument("--elements", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup-frames", type=int, default=20)
+    parser.add_argument("--spatial-hash-cell-size", type=float, default=None)
+    parser.add_argument("--geometry-store", action="store_true")
+    parser.add_argument("--retained-mode", action="store_true")
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    context_arguments = {
+        "spatial_hash_cell_size": arguments.spatial_hash_cell_size,
+        "use_geometry_store": arguments.geometry_store,
+        "retained_mode": arguments.retained_mode,
+    }
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    results = []
+    for kind in arguments.scenes:
+        for number_of_elements in arguments.elements:
+            result = run_scene(kind, number_of_elements, arguments.layers, arguments.frames, arguments.warmup_frames,
+                               context_arguments, surface)
+            results.append(result)
+            print(f"{kind:>15} {number_of_elements:>7} elements: "
+                  f"update p50 {result['update_state_ms']['p50']:8.3f} ms p99 {result['update_state_ms']['p99']:8.3f} ms, "
+                  f"draw p50 {result['draw_elements_ms']['p50']:8.3f} ms p99 {result['draw_elements_ms']['p99']:8.3f} ms")
+
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "context": context_arguments,
+        "results": results,
+    }
+    with open(arguments.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {arguments.output}")
+
+    pygame.quit()